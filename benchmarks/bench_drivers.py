@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from core.emulator import EmulatedReader, create_card
+from core.write_pacer import WritePacer
+from drivers.sle4442 import SLE4442
+from drivers.sle4428 import SLE4428
+from drivers.sle5528 import SLE5528
+
+
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "budgets.json")
+
+OPS = ("read_all", "read_range", "write_bytes", "set_protection_bits", "authenticate", "change_psc")
+
+
+class Scenario:
+
+    def __init__(self, driver_cls, psc, new_psc, read_range, write_at, protect):
+        self.driver_cls = driver_cls
+        self.psc = psc
+        self.new_psc = new_psc
+        self.read_range = read_range
+        self.write_at = write_at
+        self.protect = protect
+
+
+SCENARIOS = {
+    "SLE4442": Scenario(SLE4442, [0x12, 0x34, 0x56], [0x65, 0x43, 0x21],
+                        read_range=(32, 64), write_at=(64, 64), protect=range(8, 16)),
+    "SLE4428": Scenario(SLE4428, [0x12, 0x34], [0x43, 0x21],
+                        read_range=(512, 128), write_at=(256, 128), protect=range(512, 528)),
+    "SLE5528": Scenario(SLE5528, [0xFF, 0xFF], [0x43, 0x21],
+                        read_range=(512, 128), write_at=(256, 128), protect=range(512, 528)),
+}
+
+
+def _expect(card_type: str, op: str, what: str, got, want):
+    if got != want:
+        raise Exception(f"{card_type}.{op}: {what} not on the card ({got!r} != {want!r})")
+
+
+def _prepare(card_type: str, op: str, latency: float, byte_time: float, sleep: bool):
+    sc = SCENARIOS[card_type]
+    emulated = create_card(card_type, psc=sc.psc, strict=True)
+    reader = EmulatedReader(f"bench ({card_type})", emulated,
+                            latency=latency, byte_time=byte_time, sleep=sleep)
+    conn = reader.createConnection()
+    conn.connect()
+
+    card = sc.driver_cls(conn)
+    if card.pacer is not None:
+        card.pacer = WritePacer(delay=0.0, adaptive=False)
+    card.max_read_chunk()
+
+    if op in ("write_bytes", "set_protection_bits"):
+        card.read_all()
+    if op in ("write_bytes", "set_protection_bits", "change_psc"):
+        card.authenticate(sc.psc)
+
+    check = None
+    if op == "read_all":
+        run = card.read_all
+    elif op == "read_range":
+        run = lambda: card.read_range(*sc.read_range)
+    elif op == "write_bytes":
+        addr, length = sc.write_at
+        data = bytes((addr + i * 7 + 1) & 0xFF for i in range(length))
+        run = lambda: card.write_bytes(addr, data)
+        check = lambda: _expect(card_type, op, "data",
+                                [addr + i for i, b in enumerate(data) if emulated.memory[addr + i] != b][:8], [])
+    elif op == "set_protection_bits":
+        run = lambda: card.set_protection_bits(list(sc.protect))
+        check = lambda: _expect(card_type, op, "protection",
+                                [a for a in sc.protect if not emulated.memory.protection[a]], [])
+    elif op == "authenticate":
+        run = lambda: card.authenticate(sc.psc)
+        check = lambda: _expect(card_type, op, "authentication", emulated.authenticated, True)
+    else:
+        run = lambda: card.change_psc(sc.new_psc)
+        check = lambda: _expect(card_type, op, "PSC", list(emulated.psc), sc.new_psc)
+
+    return reader, run, check
+
+
+def measure(card_type: str, op: str, latency: float, byte_time: float,
+            sleep: bool = False, repeat: int = 3) -> dict:
+    result = {"driver": card_type, "op": op}
+    if not hasattr(SCENARIOS[card_type].driver_cls, op):
+        result["skipped"] = f"{card_type} has no {op}"
+        return result
+
+    best = None
+    for _ in range(repeat):
+        try:
+            reader, run, check = _prepare(card_type, op, latency, byte_time, sleep)
+            reader.stats.reset()
+            t0 = time.perf_counter()
+            run()
+            wall = time.perf_counter() - t0
+            if check is not None:
+                check()
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            return result
+        if best is None or wall < best[0]:
+            best = (wall, reader.stats.as_dict())
+
+    wall, stats = best
+    apdus = stats["apdus"]
+    overhead = wall - stats["busy"] if sleep else wall
+    result.update({
+        "apdus": apdus,
+        "bytes_sent": stats["bytes_sent"],
+        "bytes_received": stats["bytes_received"],
+        "wire_bytes": stats["bytes_sent"] + stats["bytes_received"],
+        "by_ins": stats["by_ins"],
+        "wall_s": wall,
+        "modeled_s": stats["busy"] + (0.0 if sleep else wall),
+        "overhead_us_per_apdu": overhead / apdus * 1e6 if apdus else 0.0,
+    })
+    return result
+
+
+def run_suite(drivers, ops, latency: float, byte_time: float, sleep: bool, repeat: int) -> list:
+    return [measure(d, op, latency, byte_time, sleep, repeat) for d in drivers for op in ops]
+
+
+def load_budgets(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"tolerance": 0.25, "budgets": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_budgets(results: list, budgets: dict, max_overhead_us: float = None) -> list:
+    tolerance = budgets.get("tolerance", 0.25)
+    by_key = {(r["driver"], r["op"]): r for r in results}
+    failures = [f"{r['driver']}.{r['op']}: {r['error']}" for r in results if "error" in r]
+
+    for driver, ops in budgets.get("budgets", {}).items():
+        for op, limits in ops.items():
+            r = by_key.get((driver, op))
+            if r is None or "skipped" in r or "error" in r:
+                continue
+            for metric in ("apdus", "wire_bytes"):
+                if metric not in limits:
+                    continue
+                allowed = limits[metric] * (1 + tolerance)
+                if r[metric] > allowed:
+                    failures.append(f"{driver}.{op}: {metric}={r[metric]} > budget {limits[metric]} "
+                                    f"(+{tolerance:.0%})")
+
+    if max_overhead_us is not None:
+        for r in results:
+            if r.get("overhead_us_per_apdu", 0.0) > max_overhead_us:
+                failures.append(f"{r['driver']}.{r['op']}: overhead "
+                                f"{r['overhead_us_per_apdu']:.1f} us/APDU > {max_overhead_us:.1f}")
+    return failures
+
+
+def update_budgets(results: list, budgets: dict) -> dict:
+    table = budgets.setdefault("budgets", {})
+    for r in results:
+        if "error" in r or "skipped" in r:
+            continue
+        table.setdefault(r["driver"], {})[r["op"]] = {"apdus": r["apdus"], "wire_bytes": r["wire_bytes"]}
+    return budgets
+
+
+def print_table(results: list):
+    print(f"{'driver':8s} {'op':20s} {'apdus':>6s} {'wire':>7s} {'us/apdu':>8s} {'modeled ms':>11s}")
+    for r in results:
+        if "skipped" in r:
+            print(f"{r['driver']:8s} {r['op']:20s} {'-':>6s} {'-':>7s} {'-':>8s} {'-':>11s}  skipped: {r['skipped']}")
+            continue
+        if "error" in r:
+            print(f"{r['driver']:8s} {r['op']:20s} {'-':>6s} {'-':>7s} {'-':>8s} {'-':>11s}  {r['error']}")
+            continue
+        print(f"{r['driver']:8s} {r['op']:20s} {r['apdus']:6d} {r['wire_bytes']:7d} "
+              f"{r['overhead_us_per_apdu']:8.1f} {r['modeled_s'] * 1000:11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Driver benchmark against the card emulator")
+    parser.add_argument("--driver", action="append", choices=sorted(SCENARIOS), help="default: all")
+    parser.add_argument("--op", action="append", choices=OPS, help="default: all")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per APDU")
+    parser.add_argument("--byte-time", type=float, default=0.0001, help="seconds per byte on the wire")
+    parser.add_argument("--sleep", action="store_true", help="really sleep the injected latency")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_drivers.json", help="JSON results file")
+    parser.add_argument("--budgets", default=BUDGETS_PATH, help="regression thresholds file")
+    parser.add_argument("--max-overhead-us", type=float, help="fail above this Python overhead per APDU")
+    parser.add_argument("--update-budgets", action="store_true", help="store current numbers as budgets")
+    args = parser.parse_args()
+
+    drivers = args.driver or sorted(SCENARIOS)
+    ops = args.op or list(OPS)
+    results = run_suite(drivers, ops, args.latency, args.byte_time, args.sleep, args.repeat)
+    print_table(results)
+
+    budgets = load_budgets(args.budgets)
+    if args.update_budgets:
+        with open(args.budgets, "w", encoding="utf-8") as f:
+            json.dump(update_budgets(results, budgets), f, indent=4, sort_keys=True)
+            f.write("\n")
+        failures = []
+    else:
+        failures = check_budgets(results, budgets, args.max_overhead_us)
+
+    report = {
+        "latency": args.latency,
+        "byte_time": args.byte_time,
+        "sleep": args.sleep,
+        "repeat": args.repeat,
+        "results": results,
+        "regressions": failures,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    if failures:
+        print("\nBUDGET REGRESSIONS:", file=sys.stderr)
+        for line in failures:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import time
+
+from benchmarks.bench_sle5528 import MockConnection
+from core.write_pacer import WritePacer, calibrate
+from drivers.sle4428 import SLE4428
+
+
+class BusyMockConnection(MockConnection):
+
+    def __init__(self, busy: float = 0.01, **kwargs):
+        super().__init__(**kwargs)
+        self.busy = busy
+        self._busy_until = 0.0
+
+    def transmit(self, apdu):
+        if time.perf_counter() < self._busy_until:
+            self.apdu_count += 1
+            return [], 0x6F, 0x00
+
+        if apdu[1] == 0xD0:
+            self.apdu_count += 1
+            addr = (apdu[2] << 8) | apdu[3]
+            self.memory[addr:addr + apdu[4]] = bytes(apdu[5:])
+            self._busy_until = time.perf_counter() + self.busy
+            return [], 0x90, 0x00
+
+        return super().transmit(apdu)
+
+
+def bench_mock(busy: float):
+    for label, pacer in (("fixed 200ms", WritePacer(delay=0.2, adaptive=False)),
+                         ("adaptive", WritePacer(write_time=SLE4428.WRITE_TIME))):
+        conn = BusyMockConnection(busy=busy)
+        card = SLE4428(conn)
+        card.read_all()
+        card.is_authenticated = True
+        card.pacer = pacer
+
+        image = bytes((b + 1) & 0xFF for b in card.main_memory)
+        t0 = time.perf_counter()
+        card.write_bytes(0, image)
+        elapsed = time.perf_counter() - t0
+        print(f"{label:12s} wall={elapsed:7.3f} s apdus={conn.apdu_count:5d} "
+              f"final_delay={pacer.delay * 1000:.1f} ms")
+
+    conn = BusyMockConnection(busy=busy)
+    card = SLE4428(conn)
+    print(f"{'calibrated':12s} {calibrate(card, 0) * 1000:.1f} ms")
+
+
+def bench_readers(psc, addr: int, samples: int, save: bool):
+    from core.pcsc_manager import PCSCManager
+    from core.settings_manager import SettingsManager
+
+    settings = SettingsManager() if save else None
+    for reader in PCSCManager().list_readers():
+        try:
+            conn = reader.createConnection()
+            conn.connect()
+            card = SLE4428(conn)
+            card.authenticate(psc)
+            delay = calibrate(card, addr, samples=samples)
+            conn.disconnect()
+        except Exception as e:
+            print(f"{reader}: ERROR {e}")
+            continue
+
+        print(f"{reader}: {delay * 1000:.1f} ms")
+        if settings:
+            settings.set_write_floor(reader, delay)
+            settings.set_write_delay(reader, delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SLE4428 write pacing benchmark")
+    parser.add_argument("--mock", action="store_true", help="use a simulated busy card")
+    parser.add_argument("--busy", type=float, default=0.01, help="mock EEPROM busy time (s)")
+    parser.add_argument("--psc", default="FFFF", help="PSC as hex, e.g. FFFF")
+    parser.add_argument("--addr", type=int, default=32, help="address rewritten during calibration")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="store calibrated delays as the per-reader pacing floor")
+    args = parser.parse_args()
+
+    if args.mock:
+        bench_mock(args.busy)
+    else:
+        psc = list(bytes.fromhex(args.psc))
+        bench_readers(psc, args.addr, args.samples, args.save)
+
+
+if __name__ == "__main__":
+    main()
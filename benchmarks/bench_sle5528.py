@@ -0,0 +1,78 @@
+import argparse
+import time
+
+from drivers.sle5528 import SLE5528
+from drivers.acr_commands import ACS, SLE3W
+
+
+class MockConnection:
+
+    def __init__(self, size=1024, batch=True, latency=0.0):
+        self.size = size
+        self.batch = batch
+        self.latency = latency
+        self.memory = bytearray((i * 7) & 0xFF for i in range(size))
+        self.prot = bytearray(size)
+        for i in range(0, 32):
+            self.prot[i] = 1
+        self.apdu_count = 0
+
+    def transmit(self, apdu):
+        self.apdu_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        ins = apdu[1]
+        if ins == ACS.SELECT_CARD:
+            return [], 0x90, 0x00
+
+        if ins in (ACS.READ_BINARY, ACS.READ_PROTECTION_BITS):
+            if not self.batch:
+                return [], 0x6D, 0x00
+            addr = (apdu[2] << 8) | apdu[3]
+            if ins == ACS.READ_BINARY:
+                return list(self.memory[addr:addr + apdu[4]]), 0x90, 0x00
+            out = []
+            for n in range(apdu[4]):
+                byte = 0
+                for bit in range(8):
+                    a = addr + n * 8 + bit
+                    if a < self.size and not self.prot[a]:
+                        byte |= 1 << bit
+                out.append(byte)
+            return out, 0x90, 0x00
+
+        if ins == 0x70 and (apdu[9] & 0x3F) == SLE3W.READ_9BITS_DATA_WITH_PROTECT:
+            addr = ((apdu[9] >> 6) << 8) | apdu[10]
+            return [0x00, 0x00, self.memory[addr], 0x00 if self.prot[addr] else 0x01], 0x90, 0x00
+
+        return [], 0x6A, 0x81
+
+
+def run(batch: bool, latency: float, repeat: int):
+    best = None
+    apdus = 0
+    for _ in range(repeat):
+        conn = MockConnection(batch=batch, latency=latency)
+        card = SLE5528(conn)
+        t0 = time.perf_counter()
+        card.read_all()
+        elapsed = time.perf_counter() - t0
+        apdus = conn.apdu_count
+        best = elapsed if best is None else min(best, elapsed)
+    return apdus, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SLE5528 read_all benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per APDU")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, batch in (("per-byte", False), ("batched", True)):
+        apdus, elapsed = run(batch, args.latency, args.repeat)
+        print(f"{label:10s} apdus={apdus:5d} wall={elapsed * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import json
+import sys
+import time
+
+from core.apdu_trace import TraceRecorder, TraceReplayer, TraceMismatch, load_trace, diff_traces
+from core.atr_detector import ATRDetector
+from drivers.base_card import clear_read_chunk_cache
+from drivers.registry import driver_for, resolve_card_type
+
+
+OPS = ("read_all", "read_protection_memory", "read_security_memory")
+
+
+def _run_ops(card, ops):
+    for op in ops:
+        getattr(card, op)()
+
+
+def cmd_record(args):
+    from core.emulator import EmulatedReader, create_card
+
+    reader = EmulatedReader(f"emulator ({args.card_type})", create_card(args.card_type),
+                            latency=args.latency, sleep=args.latency > 0)
+    conn = reader.createConnection()
+    conn.connect()
+    rec = TraceRecorder(conn, args.trace)
+    card = driver_for(resolve_card_type(ATRDetector.detect(rec.getATR())))(rec)
+    _run_ops(card, args.op or ["read_all"])
+    rec.close()
+    print(f"{args.trace}: {reader.stats.apdus} APDUs")
+
+
+def cmd_stats(args):
+    print(json.dumps(load_trace(args.trace).stats(), indent=4))
+
+
+def cmd_dump(args):
+    trace = load_trace(args.trace)
+    print(f"# reader: {trace.reader}")
+    for r in trace.records:
+        print(f"{r.t * 1000:10.3f} ms {r.duration * 1000:8.3f} ms  {r!r}")
+
+
+def cmd_diff(args):
+    result = diff_traces(load_trace(args.a), load_trace(args.b))
+    print(json.dumps(result, indent=4))
+    if not result["identical"]:
+        sys.exit(1)
+
+
+def cmd_replay(args):
+    trace = load_trace(args.trace)
+    ctype = args.card_type or resolve_card_type(ATRDetector.detect(TraceReplayer(trace).getATR()))
+
+    best = None
+    for _ in range(args.repeat):
+        clear_read_chunk_cache()
+        conn = TraceReplayer(trace, speed=args.speed, strict=not args.lenient, gaps=not args.no_gaps)
+        card = driver_for(ctype)(conn)
+        t0 = time.perf_counter()
+        try:
+            _run_ops(card, args.op or ["read_all"])
+        except TraceMismatch as e:
+            print(f"MISMATCH {e}", file=sys.stderr)
+            sys.exit(1)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    apdus = conn.replayed
+    print(f"{ctype}: replayed={apdus} remaining={conn.remaining} wall={best * 1000:.2f} ms "
+          f"({best / apdus * 1e6 if apdus else 0.0:.1f} us/APDU)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="APDU trace recorder / replayer")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("record", help="record a session against the card emulator")
+    p.add_argument("trace")
+    p.add_argument("--card-type", default="SLE4442", choices=("SLE4442", "SLE4428", "SLE5528"))
+    p.add_argument("--op", action="append", choices=OPS)
+    p.add_argument("--latency", type=float, default=0.0)
+    p.set_defaults(fn=cmd_record)
+
+    p = sub.add_parser("stats", help="summary of a trace")
+    p.add_argument("trace")
+    p.set_defaults(fn=cmd_stats)
+
+    p = sub.add_parser("dump", help="print every record")
+    p.add_argument("trace")
+    p.set_defaults(fn=cmd_dump)
+
+    p = sub.add_parser("diff", help="compare two traces; exit 1 if they differ")
+    p.add_argument("a")
+    p.add_argument("b")
+    p.set_defaults(fn=cmd_diff)
+
+    p = sub.add_parser("replay", help="feed a trace back to the driver")
+    p.add_argument("trace")
+    p.add_argument("--card-type", choices=("SLE4442", "SLE4428", "SLE5528"))
+    p.add_argument("--op", action="append", choices=OPS)
+    p.add_argument("--speed", type=float,
+                   help="replay card latency and the gaps between APDUs at this speed (1.0 = original)")
+    p.add_argument("--no-gaps", action="store_true",
+                   help="with --speed, replay only card latency and send each APDU as soon as the driver does")
+    p.add_argument("--lenient", action="store_true", help="match APDUs out of order")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(fn=cmd_replay)
+
+    args = parser.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import argparse
+import json
+import sys
+
+from controllers.app_controller import AppController
+from core.language_manager import tr, init_language
+from core.settings_manager import SettingsManager
+from core.connection_manager import ConnectionManager
+from core.personalize import Personalizer, FieldMap, OutcomeLog, CardFeeder, iter_records, STATUS_OK
+from core.emulator import EmulatedReader, create_card, emulated_readers
+from drivers.registry import driver_for
+from model.ranges import diff_ranges
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+class CliError(Exception):
+    pass
+
+
+class EmulatorPCSC:
+
+    def __init__(self, readers):
+        self.readers = readers
+        self.connections = ConnectionManager()
+
+    def list_readers(self):
+        return self.readers
+
+
+def parse_hex(text: str) -> bytes:
+    try:
+        return bytes.fromhex(text.replace(":", "").replace("-", ""))
+    except ValueError:
+        raise CliError(f"invalid hex: {text}")
+
+
+def parse_indices(text: str) -> list[int]:
+    out = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                lo, hi = part.split("-", 1)
+                out.update(range(int(lo, 0), int(hi, 0) + 1))
+            else:
+                out.add(int(part, 0))
+        except ValueError:
+            raise CliError(f"invalid index: {part}")
+    return sorted(out)
+
+
+class Cli:
+
+    def __init__(self, args):
+        self.args = args
+        self.settings = SettingsManager()
+        init_language(args.lang or self.settings.get("language", "es"))
+
+        level = ("error", "info", "debug")[min(args.verbose, 2)]
+        self.emulated_image = None
+        self.controller = AppController(self._pcsc(), self.settings, self.log, log_level=level,
+                                        use_cache=not (args.no_cache or args.emulate))
+
+    def log(self, msg):
+        if self.args.verbose:
+            print(msg, file=sys.stderr)
+
+    def out(self, payload: dict, text: str):
+        if self.args.json:
+            print(json.dumps(payload))
+        else:
+            print(text)
+
+    def _pcsc(self):
+        if self.args.emulate:
+            image = None
+            if self.args.emulate_image:
+                with open(self.args.emulate_image, "rb") as f:
+                    image = f.read()
+            self.emulated_image = image
+            card = create_card(self.args.emulate, image=image)
+            return EmulatorPCSC([EmulatedReader(f"SLE Suite Emulator ({self.args.emulate})", card)])
+
+        from core.pcsc_manager import PCSCManager
+        return PCSCManager(logger=self.log, emulated=emulated_readers(self.settings.get("emulated_readers", [])),
+                           exclusive=self.settings.get("exclusive_connections", True))
+
+    def reader(self):
+        readers = self.controller.list_readers()
+        if not readers:
+            raise Exception(tr("msg.no_readers"))
+
+        wanted = self.args.reader
+        if wanted is None:
+            return readers[0]
+        if wanted.isdigit() and int(wanted) < len(readers):
+            return readers[int(wanted)]
+        for r in readers:
+            if wanted.lower() in str(r).lower():
+                return r
+        raise Exception(f"{tr('msg.no_readers')}: {wanted}")
+
+    def connect(self):
+        reader = self.reader()
+        self.controller.connect_reader(reader)
+        ctype = self.args.card_type or self.controller.detect_card_type()
+        self.controller.card_type = ctype
+        return reader, ctype
+
+    def load(self):
+        reader, ctype = self.connect()
+        self.controller.load_card(ctype)
+        return reader, ctype
+
+    def authenticate(self):
+        if not self.args.psc:
+            raise Exception(tr("msg.psc_required"))
+        card = self.controller.card
+        card.authenticate(list(parse_hex(self.args.psc)))
+        if not card.is_authenticated:
+            raise Exception(tr("error.auth_failed"))
+
+    def close(self):
+        self.controller.disconnect_reader()
+        self.controller.connections.close_all()
+
+    def cmd_readers(self):
+        readers = [str(r) for r in self.controller.list_readers()]
+        self.out({"readers": readers}, "\n".join(f"{i}: {r}" for i, r in enumerate(readers)))
+        return EXIT_OK
+
+    def cmd_info(self):
+        reader, ctype = self.connect()
+        atr = self.controller.conn.getATR()
+        card = driver_for(ctype)(conn=self.controller.transport, logger=self.controller.card_logger())
+        self.controller.card = card
+        card.select_card()
+        header = bytes(card.read_range(0, min(32, card.size)))
+        try:
+            sm = card.read_security_memory()
+        except Exception:
+            sm = []
+        protected = None
+        if hasattr(card, "read_protection_memory"):
+            try:
+                card.read_protection_memory()
+                protected = card.protection_bits.indices()
+            except Exception:
+                pass
+
+        info = {
+            "reader": str(reader),
+            "atr": " ".join(f"{b:02X}" for b in atr),
+            "card_type": ctype,
+            "size": card.size,
+            "header": header.hex(" ").upper(),
+            "error_counter": sm[0] if sm else None,
+            "protected": protected,
+        }
+        lines = [f"{k}: {v}" for k, v in info.items() if k != "protected"]
+        if protected is not None:
+            lines.append(f"protected: {len(protected)}")
+        self.out(info, "\n".join(lines))
+        return EXIT_OK
+
+    def cmd_dump(self):
+        reader, ctype = self.load()
+        data = bytes(self.controller.memory)
+        if self.args.output == "-":
+            if self.args.json:
+                print(json.dumps({"reader": str(reader), "card_type": ctype, "memory": data.hex()}))
+            else:
+                for off in range(0, len(data), 16):
+                    print(f"{off:04X}: {data[off:off + 16].hex(' ').upper()}")
+        else:
+            with open(self.args.output, "wb") as f:
+                f.write(data)
+            self.out({"reader": str(reader), "card_type": ctype, "output": self.args.output, "size": len(data)},
+                     f"{ctype} {len(data)} bytes -> {self.args.output}")
+        return EXIT_OK
+
+    def cmd_write(self):
+        with open(self.args.file, "rb") as f:
+            data = f.read()
+        reader, ctype = self.load()
+        self.authenticate()
+
+        card = self.controller.card
+        card.verify_writes = False
+        plan = card.write_bytes(self.args.addr, data)
+        written = plan.bytes_written if plan is not None else 0
+        apdus = plan.apdu_count if plan is not None else 0
+        blocked = len(plan.blocked) if plan is not None else 0
+        payload = {"reader": str(reader), "card_type": ctype, "bytes_written": written,
+                   "apdus": apdus, "blocked": blocked}
+        text = f"{ctype}: {written} bytes in {apdus} APDU, {blocked} blocked"
+
+        mismatched = 0
+        if self.args.verify:
+            report = card.verify_touched()
+            mismatched = report.mismatched
+            payload.update({"verified": report.checked, "verify_apdus": report.apdus, "mismatched": mismatched,
+                            "ranges": report.mismatch_ranges()})
+            text += "\n" + report.describe()
+        self.out(payload, text)
+        return EXIT_FAILED if blocked or mismatched else EXIT_OK
+
+    def cmd_verify(self):
+        with open(self.args.file, "rb") as f:
+            expected = f.read()
+        reader, ctype = self.connect()
+        self.controller.load_card(ctype, use_cache=False)
+
+        addr = self.args.addr
+        actual = bytes(self.controller.memory[addr:addr + len(expected)])
+        ranges = list(diff_ranges(actual, expected))
+        mismatched = sum(e - s for s, e in ranges)
+        self.out({"reader": str(reader), "card_type": ctype, "ok": not ranges,
+                  "mismatched": mismatched, "ranges": [(addr + s, addr + e) for s, e in ranges]},
+                 "OK" if not ranges else "MISMATCH " + ", ".join(
+                     f"{addr + s:04X}-{addr + e - 1:04X}" for s, e in ranges))
+        return EXIT_OK if not ranges else EXIT_FAILED
+
+    def cmd_protect(self):
+        indices = parse_indices(self.args.indices)
+        reader, ctype = self.load()
+        card = self.controller.card
+        if not hasattr(card, "set_protection_bits"):
+            raise CliError(f"{ctype}: set_protection_bits")
+        self.authenticate()
+
+        card.set_protection_bits(indices)
+        protected = set(card.protection_bits.indices())
+        missing = [i for i in indices if i not in protected]
+        self.out({"reader": str(reader), "card_type": ctype, "requested": len(indices), "missing": missing},
+                 f"{ctype}: {len(indices) - len(missing)}/{len(indices)} protected")
+        return EXIT_FAILED if missing else EXIT_OK
+
+    def cmd_personalize(self):
+        with open(self.args.base, "rb") as f:
+            base = f.read()
+        psc = list(parse_hex(self.args.psc)) if self.args.psc else None
+        personalizer = Personalizer(base, FieldMap.load(self.args.fields), psc=psc, key_field=self.args.key,
+                                    trust_base=self.args.trust_base, verify=not self.args.no_verify,
+                                    logger=lambda msg: print(msg, file=sys.stderr))
+
+        reader = self.reader()
+        if self.args.emulate:
+            def on_wait(index):
+                reader.insert(create_card(self.args.emulate, image=self.emulated_image))
+        else:
+            def on_wait(index):
+                print(f"#{index}: {tr('msg.insert_next_card')}", file=sys.stderr)
+
+        skip = OutcomeLog.done_indices(self.args.log) if self.args.resume and self.args.log else None
+        outcome_log = OutcomeLog(self.args.log) if self.args.log else None
+        feeder = CardFeeder(self.controller, reader, self.args.card_type, self.args.timeout, on_wait).start()
+        try:
+            summary = personalizer.run(iter_records(self.args.records), feeder, outcome_log,
+                                       skip=skip, limit=self.args.limit)
+        finally:
+            feeder.stop()
+            if outcome_log is not None:
+                outcome_log.close()
+
+        self.out(summary, " ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                                   for k, v in summary.items()))
+        return EXIT_OK if summary[STATUS_OK] == summary["total"] else EXIT_FAILED
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="SLE Suite headless tool")
+    parser.add_argument("-r", "--reader", help="reader index or name substring (default: first)")
+    parser.add_argument("-t", "--card-type", choices=("SLE4442", "SLE5542", "SLE4428", "SLE5528"),
+                        help="skip ATR detection")
+    parser.add_argument("--emulate", choices=("SLE4442", "SLE4428", "SLE5528"),
+                        help="use an in-process emulated reader")
+    parser.add_argument("--emulate-image", help="initial memory of the emulated card")
+    parser.add_argument("--psc", help="PSC as hex, e.g. FFFFFF")
+    parser.add_argument("--lang")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    parser.add_argument("--no-cache", action="store_true", help="always read the card")
+    parser.add_argument("-v", "--verbose", action="count", default=0)
+
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("readers", help="list readers")
+    sub.add_parser("info", help="ATR, type, header and counters")
+
+    p = sub.add_parser("dump", help="read the whole memory")
+    p.add_argument("-o", "--output", default="-", help="binary output file (default: hex to stdout)")
+
+    p = sub.add_parser("write", help="write a binary image")
+    p.add_argument("file")
+    p.add_argument("--addr", type=lambda s: int(s, 0), default=0)
+    p.add_argument("--verify", action="store_true", help="read back only the written ranges")
+
+    p = sub.add_parser("verify", help="compare the card against a binary image")
+    p.add_argument("file")
+    p.add_argument("--addr", type=lambda s: int(s, 0), default=0)
+
+    p = sub.add_parser("protect", help="set protection bits")
+    p.add_argument("indices", help="e.g. 0-31,40")
+
+    p = sub.add_parser("personalize", help="write a base image plus per-card fields to a batch of cards")
+    p.add_argument("base", help="base binary image")
+    p.add_argument("fields", help="JSON field map")
+    p.add_argument("records", help="CSV or JSONL records, one per card")
+    p.add_argument("--log", help="append one JSONL outcome per card")
+    p.add_argument("--key", help="record column reported as the card key")
+    p.add_argument("--trust-base", action="store_true", help="assume blank cards already hold the base image")
+    p.add_argument("--no-verify", action="store_true")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--resume", action="store_true", help="skip records already logged as ok")
+    p.add_argument("--timeout", type=float, help="seconds to wait for each card")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    cli = None
+    try:
+        cli = Cli(args)
+        return getattr(cli, f"cmd_{args.command}")()
+    except CliError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        if cli is not None:
+            cli.close()
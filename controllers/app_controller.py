@@ -1,45 +1,139 @@
+import os
+import time
+
 from core.language_manager import tr
-from drivers.sle4442 import SLE4442
-from drivers.sle4428 import SLE4428
-from drivers.sle5528 import SLE5528
+from drivers.registry import driver_for
 from drivers.pin_obtain import PinObtain
 from core.atr_detector import ATRDetector, CardType
+from core.card_log import CardLogger, level_from_name
+from core.transport import Transport
+from core.card_cache import CardImageCache
+from core.apdu_trace import TraceRecorder
+from core.settings_manager import get_config_dir
+from core.connection_manager import ConnectionManager
+from core.card_monitor import READER_ADDED, READER_REMOVED, CARD_REMOVED
+from model.memory_image import MemoryImage
 
 class AppController:
-    def __init__(self, pcsc, settings, logger):
+    def __init__(self, pcsc, settings, logger, log_level=None, use_cache: bool = True):
         self.pcsc = pcsc
         self.settings = settings
         self.log = logger
+        self.log_level = log_level
+        self.use_cache = use_cache
         self.main = None
+        self.connections = getattr(pcsc, "connections", None) or ConnectionManager()
+        self.link = None
         self.conn = None
+        self.transport = None
         self.connected_reader = None
         self.card = None
         self.memory = None
         self.card_type = None
+        self.checkpoint = None
+        self.cache = None
+        self.cache_key = None
+        self.readers = []
+
+    def card_logger(self):
+        level = self.log_level
+        if level is None:
+            level = self.settings.get("log_level", "debug") if self.settings is not None else "debug"
+        return CardLogger(self.log, level_from_name(level))
 
     def list_readers(self):
-        return self.pcsc.list_readers()
+        self.readers = list(self.pcsc.list_readers())
+        return self.readers
+
+    def reader_by_name(self, name: str):
+        for r in self.readers:
+            if str(r) == name:
+                return r
+        for r in self.list_readers():
+            if str(r) == name:
+                return r
+        return None
+
+    def is_connected_to(self, name: str) -> bool:
+        return self.connected_reader is not None and str(self.connected_reader) == name
+
+    def handle_event(self, event):
+        if event.kind == READER_ADDED:
+            if self.reader_by_name(event.reader) is None:
+                self.list_readers()
+        elif event.kind == READER_REMOVED:
+            self.readers = [r for r in self.readers if str(r) != event.reader]
+        if event.kind in (CARD_REMOVED, READER_REMOVED) and self.is_connected_to(event.reader):
+            self.disconnect_reader()
+        if event.kind == READER_REMOVED:
+            self.connections.drop(event.reader)
+
+    def auto_connect(self, name: str):
+        reader = self.reader_by_name(name)
+        if reader is None:
+            raise Exception(f"{tr('msg.no_readers')}: {name}")
+        if self.link is not None:
+            self.disconnect_reader()
+        return self.connect_reader(reader)
 
     def connect_reader(self, reader):
         try:
-            conn = reader.createConnection()
-            conn.connect()
+            self.link = self.connections.acquire(reader)
+            conn = self.link
+            if self.settings is not None and self.settings.get("apdu_trace", False):
+                conn = TraceRecorder(conn, self._trace_path(), reader=str(reader))
             self.conn = conn
+            self.transport = Transport(conn)
             self.connected_reader = reader
             atr = conn.getATR()
             return atr
         except Exception as exc:
+            if self.link is not None:
+                self.connections.release(reader)
+            self.link = None
             self.conn = None
+            self.transport = None
             self.connected_reader = None
             raise exc
 
+    def _trace_path(self) -> str:
+        name = time.strftime("%Y%m%d-%H%M%S") + ".sletrace"
+        return os.path.join(get_config_dir(), "traces", name)
+
+    def _apply_write_delay(self):
+        pacer = getattr(self.card, "pacer", None)
+        if pacer is None or self.settings is None or self.connected_reader is None:
+            return
+        floor = self.settings.get_write_floor(self.connected_reader)
+        if floor is not None:
+            pacer.min_delay = floor
+        delay = self.settings.get_write_delay(self.connected_reader)
+        if delay is not None:
+            pacer.delay = delay
+        pacer.delay = max(pacer.delay, pacer.floor)
+
+    def _save_write_delay(self):
+        pacer = getattr(self.card, "pacer", None)
+        if pacer is None or self.settings is None or self.connected_reader is None:
+            return
+        if hasattr(self.connected_reader, "add_observer"):
+            return
+        try:
+            self.settings.set_write_delay(self.connected_reader, pacer.delay)
+        except Exception:
+            pass
+
     def disconnect_reader(self):
-        if self.conn:
-            try:
-                self.conn.disconnect()
-            except Exception:
-                pass
+        self._save_write_delay()
+        if self.transport:
+            self.transport.close()
+        if isinstance(self.conn, TraceRecorder):
+            self.conn.close()
+        if self.link is not None:
+            self.connections.release(self.link.reader)
+        self.link = None
         self.conn = None
+        self.transport = None
         self.connected_reader = None
         self.card = None
         self.memory = None
@@ -65,19 +159,30 @@ class AppController:
             self.card_type = "SLE4442"
         return self.card_type
 
-    def load_card(self, card_type: str):
+    def load_card(self, card_type: str, use_cache: bool = True):
+        for _ in self.iter_load_card(card_type, use_cache):
+            pass
+        return self.memory
+
+    def iter_load_card(self, card_type: str, use_cache: bool = True):
         if not self.conn:
             raise Exception("No active reader connection.")
-        driver_cls = {
-            "SLE4442": SLE4442,
-            "SLE4428": SLE4428,
-            "SLE5528": SLE5528,
-            "SLE5542": SLE4442,
-        }.get(card_type)
+        driver_cls = driver_for(card_type)
         if not driver_cls:
             raise Exception(tr("error.unsupported_card_type") + f": {card_type}")
-        self.card = driver_cls(conn=self.conn, logger=self.log)
-        self.memory = self.card.read_all()
+        self.card = driver_cls(conn=self.transport or self.conn, logger=self.card_logger())
+        self.card.checkpoint = self.checkpoint
+        if self.settings is not None:
+            self.card.verify_writes = self.settings.get("verify_writes", False)
+        self._apply_write_delay()
+        self.memory = self._load_cached_image(card_type, use_cache)
+        if self.memory is not None:
+            yield 0, bytes(self.memory)
+        else:
+            yield from self.card.iter_all()
+            self.memory = self.card.main_memory
+            self._store_card_image(self.card)
+        self.card.on_change = self._store_card_image
         try:
             sm = self.card.read_security_memory()
             chv = sm[0]
@@ -87,7 +192,42 @@ class AppController:
                 self.card.is_authenticated = False
         except Exception:
             pass
-        return self.memory
+
+    def _card_cache(self):
+        if not self.use_cache:
+            return None
+        if self.cache is None and self.settings is not None and self.settings.get("card_cache", True):
+            self.cache = CardImageCache()
+        return self.cache
+
+    def _load_cached_image(self, card_type: str, use_cache: bool = True):
+        self.cache_key = None
+        cache = self._card_cache() if use_cache else None
+        if cache is None:
+            return None
+        try:
+            key, entry = cache.lookup(self.card, card_type, self.conn.getATR())
+        except Exception:
+            return None
+
+        self.cache_key = key
+        if entry is None:
+            return None
+
+        self.card.restore(entry)
+        self.log(tr("msg.card_cache_hit"))
+        return self.card.main_memory
+
+    def _store_card_image(self, card):
+        cache = self._card_cache()
+        if cache is None or card is not self.card or not card.memory_loaded:
+            return
+        try:
+            if self.cache_key is None:
+                self.cache_key = cache.make_key(self.conn.getATR(), card.main_memory[:32])
+            cache.store(self.cache_key, self.card_type or card.__class__.__name__, card.snapshot())
+        except Exception:
+            pass
 
     def obtain_psc(self):
         if not self.card:
@@ -100,7 +240,6 @@ class AppController:
 
         from drivers.sle4428 import SLE4428 as _S4428
         from drivers.sle5528 import SLE5528 as _S5528
-        from drivers.sle4442 import SLE4442 as _S4442
 
         if isinstance(self.card, (_S4428, _S5528)):
             
@@ -116,22 +255,24 @@ class AppController:
                 self.main.update_psc_state()
                 return None
 
-        if isinstance(self.card, _S4442):
-            po = PinObtain(self.card, logger=self.log)
-            psc = po.recover_4442()
-            self.main.update_psc_state()
-            return psc
-
-        po = PinObtain(self.card, logger=self.log)
-        psc = po.recover_4442()
+        psc = self.recover_psc()
         self.main.update_psc_state()
         return psc
 
+    def recover_psc(self):
+        if not self.card:
+            raise Exception(tr('error.no_card_loaded'))
+        if self.card.is_authenticated:
+            self.log(tr('msg.pin_autenthicated'))
+            return None
+        po = PinObtain(self.card, logger=self.log)
+        return po.recover_4442()
+
     def import_memory(self, data: bytes):
-        self.memory = list(data)
+        self.memory = MemoryImage(data)
         return self.memory
 
-    def export_memory(self) -> bytes:
+    def export_memory(self) -> memoryview:
         if self.memory is None:
             raise Exception(tr("error.no_memory_export"))
-        return bytes(self.memory)
+        return memoryview(self.memory)
@@ -0,0 +1,349 @@
+import difflib
+import os
+import re
+import struct
+import threading
+import time
+from collections import Counter, deque
+
+from drivers.acr_commands import ACS, SLE3W, FIXED
+
+
+MAGIC = b"SLETRACE"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHdH")
+RECORD = struct.Struct("<BQIHHBB")
+
+APDU = 1
+ATR = 2
+ERROR = 3
+
+INS_CHANGE_PSC = 0xD2
+INS_THREE_WIRE = 0x70
+REDACTED = 0x00
+
+
+def _blank(buf: bytearray, start: int, end: int):
+    for i in range(max(start, 0), min(end, len(buf))):
+        buf[i] = REDACTED
+
+
+def redact(apdu, response=b""):
+    apdu = bytearray(apdu)
+    response = bytearray(response)
+    if len(apdu) < 5 or apdu[0] != 0xFF:
+        return bytes(apdu), bytes(response)
+
+    ins = apdu[1]
+    if ins in (ACS.VERIFY_PSC, INS_CHANGE_PSC):
+        _blank(apdu, 5, len(apdu))
+    elif ins == ACS.READ_PROTECTION:
+        _blank(response, 1, len(response))
+    elif ins in (ACS.READ_BINARY, ACS.WRITE_BINARY):
+        addr = (apdu[2] << 8) | apdu[3]
+        start, end = FIXED.PSC1 - addr, FIXED.PSC2 + 1 - addr
+        if ins == ACS.READ_BINARY:
+            _blank(response, start, end)
+        else:
+            _blank(apdu, 5 + max(start, 0), 5 + end)
+    elif ins == INS_THREE_WIRE and len(apdu) >= 12:
+        control = apdu[9]
+        addr = ((control >> 6) << 8) | apdu[10]
+        if (control & 0x3F) == (SLE3W.VERIFY_PSC & 0x3F) or FIXED.PSC1 <= addr <= FIXED.PSC2:
+            _blank(apdu, 11, 12)
+            _blank(response, 2, 3)
+    return bytes(apdu), bytes(response)
+
+
+_HEX_TAIL = re.compile(r": ((?:[0-9A-F]{2} )*[0-9A-F]{2})\s*$")
+
+
+class LogRedactor:
+
+    def __init__(self):
+        self._last = None
+
+    def __call__(self, line: str) -> str:
+        m = _HEX_TAIL.search(line)
+        if m is None:
+            return line
+        raw = bytes.fromhex(m.group(1))
+        head = line.lstrip()
+        if head.startswith("<<"):
+            self._last = raw
+            out = redact(raw)[0]
+        elif head.startswith(">>") and self._last is not None:
+            out = redact(self._last, raw)[1]
+        else:
+            return line
+        return line[:m.start(1)] + out.hex(" ").upper() + line[m.end(1):]
+
+
+class TraceRecord:
+    __slots__ = ("kind", "t", "duration", "apdu", "response", "sw1", "sw2")
+
+    def __init__(self, kind: int, t: float, duration: float, apdu: bytes, response: bytes,
+                 sw1: int = 0, sw2: int = 0):
+        self.kind = kind
+        self.t = t
+        self.duration = duration
+        self.apdu = apdu
+        self.response = response
+        self.sw1 = sw1
+        self.sw2 = sw2
+
+    @property
+    def sw(self) -> int:
+        return (self.sw1 << 8) | self.sw2
+
+    def __repr__(self):
+        if self.kind == ATR:
+            return f"ATR {self.response.hex(' ').upper()}"
+        if self.kind == ERROR:
+            return f"{self.apdu.hex(' ').upper()} -> ERROR {self.response.decode('utf-8', 'replace')}"
+        return f"{self.apdu.hex(' ').upper()} -> {self.response.hex(' ').upper()} {self.sw:04X}"
+
+
+class TraceWriter:
+
+    def __init__(self, path_or_file, reader: str = ""):
+        if isinstance(path_or_file, (str, os.PathLike)):
+            os.makedirs(os.path.dirname(os.path.abspath(path_or_file)), exist_ok=True)
+            self.f = open(path_or_file, "wb")
+            self._owns = True
+        else:
+            self.f = path_or_file
+            self._owns = False
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter_ns()
+        name = reader.encode("utf-8")
+        self.f.write(HEADER.pack(MAGIC, VERSION, time.time(), len(name)) + name)
+
+    def write(self, kind: int, start_ns: int, end_ns: int, apdu=b"", response=b"", sw1: int = 0, sw2: int = 0):
+        apdu = bytes(apdu)
+        response = bytes(response)
+        head = RECORD.pack(kind, start_ns - self._t0, min((end_ns - start_ns) // 1000, 0xFFFFFFFF),
+                           len(apdu), len(response), sw1 & 0xFF, sw2 & 0xFF)
+        with self._lock:
+            self.f.write(head + apdu + response)
+
+    def flush(self):
+        with self._lock:
+            self.f.flush()
+
+    def close(self):
+        with self._lock:
+            if self._owns and not self.f.closed:
+                self.f.close()
+            elif not self._owns:
+                self.f.flush()
+
+
+class TraceRecorder:
+
+    def __init__(self, conn, path_or_file, reader: str = None):
+        self.conn = conn
+        if reader is None:
+            try:
+                reader = str(conn.getReader())
+            except Exception:
+                reader = ""
+        self.writer = TraceWriter(path_or_file, reader)
+        self._atr_logged = False
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def getATR(self):
+        atr = self.conn.getATR()
+        if not self._atr_logged:
+            now = time.perf_counter_ns()
+            self.writer.write(ATR, now, now, b"", atr)
+            self._atr_logged = True
+        return atr
+
+    def transmit(self, apdu, *args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            data, sw1, sw2 = self.conn.transmit(apdu, *args, **kwargs)
+        except Exception as e:
+            self.writer.write(ERROR, start, time.perf_counter_ns(), redact(apdu)[0], str(e).encode("utf-8"))
+            raise
+        self.writer.write(APDU, start, time.perf_counter_ns(), *redact(apdu, data), sw1, sw2)
+        return data, sw1, sw2
+
+    def disconnect(self):
+        try:
+            return self.conn.disconnect()
+        finally:
+            self.close()
+
+    def close(self):
+        self.writer.close()
+
+
+class Trace:
+
+    def __init__(self, reader: str, started: float, records: list):
+        self.reader = reader
+        self.started = started
+        self.records = records
+
+    @property
+    def atr(self):
+        for r in self.records:
+            if r.kind == ATR:
+                return list(r.response)
+        return None
+
+    @property
+    def exchanges(self) -> list:
+        return [r for r in self.records if r.kind != ATR]
+
+    def stats(self) -> dict:
+        ex = self.exchanges
+        return {
+            "reader": self.reader,
+            "apdus": len(ex),
+            "errors": sum(1 for r in ex if r.kind == ERROR or r.sw1 != 0x90),
+            "bytes_sent": sum(len(r.apdu) for r in ex),
+            "bytes_received": sum(len(r.response) + 2 for r in ex if r.kind == APDU),
+            "card_time": sum(r.duration for r in ex),
+            "span": (ex[-1].t + ex[-1].duration - ex[0].t) if ex else 0.0,
+            "by_ins": {f"{ins:02X}": n for ins, n in sorted(Counter(
+                r.apdu[1] for r in ex if len(r.apdu) > 1).items())},
+        }
+
+
+def iter_trace(f):
+    raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError("truncated trace header")
+    magic, version, started, name_len = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not an APDU trace")
+    reader = f.read(name_len).decode("utf-8", "replace")
+    yield reader, started
+
+    size = RECORD.size
+    unpack = RECORD.unpack
+    while True:
+        head = f.read(size)
+        if len(head) < size:
+            return
+        kind, t_ns, dur_us, n_apdu, n_resp, sw1, sw2 = unpack(head)
+        body = f.read(n_apdu + n_resp)
+        if len(body) < n_apdu + n_resp:
+            return
+        yield TraceRecord(kind, t_ns / 1e9, dur_us / 1e6, body[:n_apdu], body[n_apdu:], sw1, sw2)
+
+
+def load_trace(path) -> Trace:
+    with open(path, "rb") as f:
+        it = iter_trace(f)
+        reader, started = next(it)
+        return Trace(reader, started, list(it))
+
+
+class TraceMismatch(Exception):
+    pass
+
+
+class TraceReplayer:
+
+    def __init__(self, trace: Trace, speed: float = None, strict: bool = True, gaps: bool = True):
+        self.trace = trace
+        self.speed = speed
+        self.strict = strict
+        self.gaps = gaps
+        self.replayed = 0
+        self._prev = None
+        self._prev_end = 0.0
+        self._pos = 0
+        self._records = trace.exchanges
+        self._by_apdu = {}
+        if not strict:
+            for r in self._records:
+                self._by_apdu.setdefault(r.apdu, deque()).append(r)
+
+    def connect(self, *args, **kwargs):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def getReader(self) -> str:
+        return self.trace.reader
+
+    def getATR(self):
+        atr = self.trace.atr
+        if atr is None:
+            raise TraceMismatch("trace has no ATR")
+        return atr
+
+    @property
+    def remaining(self) -> int:
+        if self.strict:
+            return len(self._records) - self._pos
+        return sum(len(q) for q in self._by_apdu.values())
+
+    def _next(self, apdu: bytes) -> TraceRecord:
+        if not self.strict:
+            queue = self._by_apdu.get(apdu)
+            if not queue:
+                raise TraceMismatch(f"#{self.replayed}: APDU not in trace: {apdu.hex(' ').upper()}")
+            return queue.popleft()
+
+        if self._pos >= len(self._records):
+            raise TraceMismatch(f"#{self._pos}: trace exhausted, got {apdu.hex(' ').upper()}")
+        record = self._records[self._pos]
+        if record.apdu != apdu:
+            raise TraceMismatch(f"#{self._pos}: expected {record.apdu.hex(' ').upper()}, "
+                                f"got {apdu.hex(' ').upper()}")
+        self._pos += 1
+        return record
+
+    def transmit(self, apdu, protocol=None):
+        record = self._next(redact(apdu)[0])
+        self.replayed += 1
+        if self.speed:
+            if self.gaps and self._prev is not None:
+                gap = (record.t - self._prev.t - self._prev.duration) / self.speed
+                remaining = gap - (time.perf_counter() - self._prev_end)
+                if remaining > 0:
+                    time.sleep(remaining)
+            time.sleep(record.duration / self.speed)
+        self._prev = record
+        self._prev_end = time.perf_counter()
+        if record.kind == ERROR:
+            raise Exception(record.response.decode("utf-8", "replace"))
+        return list(record.response), record.sw1, record.sw2
+
+
+def diff_traces(a: Trace, b: Trace) -> dict:
+    ea, eb = a.exchanges, b.exchanges
+    keys_a = [(r.apdu, r.response, r.sw) for r in ea]
+    keys_b = [(r.apdu, r.response, r.sw) for r in eb]
+
+    changes = []
+    matcher = difflib.SequenceMatcher(None, keys_a, keys_b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            changes.append({
+                "op": tag,
+                "a": (i1, i2),
+                "b": (j1, j2),
+                "a_records": [repr(r) for r in ea[i1:i2]],
+                "b_records": [repr(r) for r in eb[j1:j2]],
+            })
+
+    sa, sb = a.stats(), b.stats()
+    return {
+        "identical": not changes,
+        "changes": changes,
+        "apdus": (sa["apdus"], sb["apdus"]),
+        "bytes_sent": (sa["bytes_sent"], sb["bytes_sent"]),
+        "bytes_received": (sa["bytes_received"], sb["bytes_received"]),
+        "card_time": (sa["card_time"], sb["card_time"]),
+    }
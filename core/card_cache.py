@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import time
+
+from core.settings_manager import get_config_dir
+
+
+HEADER_LEN = 32
+SENTINEL_LEN = 16
+
+
+def _get_cache_dir():
+    path = os.path.join(get_config_dir(), "cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class CardImageCache:
+
+    def __init__(self, path=None, max_entries: int = 256):
+        self.path = path or _get_cache_dir()
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(atr, header) -> str:
+        h = hashlib.sha1()
+        h.update(bytes(atr))
+        h.update(bytes(header[8:17]))
+        return h.hexdigest()
+
+    @staticmethod
+    def sentinel_ranges(size: int, end: int = None):
+        end = size if end is None else min(end, size)
+        ranges = [(0, min(HEADER_LEN, size))]
+        if end > HEADER_LEN + SENTINEL_LEN:
+            ranges.append(((end // 2) & ~0x0F, SENTINEL_LEN))
+            ranges.append((end - SENTINEL_LEN, SENTINEL_LEN))
+        return ranges
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def load(self, key: str):
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            return {
+                "card_type": raw["card_type"],
+                "memory": bytes.fromhex(raw["memory"]),
+                "protection": bytes.fromhex(raw.get("protection", "")),
+                "security": bytes.fromhex(raw.get("security", "")),
+            }
+        except (KeyError, ValueError):
+            return None
+
+    def store(self, key: str, card_type: str, snap: dict):
+        entry = {
+            "card_type": card_type,
+            "stored": time.time(),
+            "memory": bytes(snap["memory"]).hex(),
+            "protection": bytes(snap.get("protection", b"")).hex(),
+            "security": bytes(snap.get("security", b"")).hex(),
+        }
+        tmp = self._file(key) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._file(key))
+        self._prune()
+
+    def forget(self, key: str):
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def _prune(self):
+        try:
+            files = [os.path.join(self.path, f) for f in os.listdir(self.path) if f.endswith(".json")]
+        except OSError:
+            return
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for f in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(f)
+            except OSError:
+                pass
+
+    def lookup(self, card, card_type: str, atr):
+        card.select_card()
+        header = bytes(card.read_range(0, min(HEADER_LEN, card.size)))
+        key = self.make_key(atr, header)
+
+        entry = self.load(key)
+        if entry is None or entry["card_type"] != card_type:
+            return key, None
+
+        memory = entry["memory"]
+        if len(memory) != card.size or memory[:len(header)] != header:
+            return key, None
+
+        for start, length in self.sentinel_ranges(card.size, getattr(card, "VOLATILE_FROM", None))[1:]:
+            if bytes(card.read_range(start, length)) != memory[start:start + length]:
+                return key, None
+
+        return key, entry
@@ -0,0 +1,81 @@
+DEBUG = 10
+INFO = 20
+ERROR = 40
+
+LEVELS = {
+    "debug": DEBUG,
+    "info": INFO,
+    "error": ERROR,
+}
+
+
+def level_from_name(name, default=DEBUG):
+    if isinstance(name, int):
+        return name
+    return LEVELS.get(str(name).lower(), default)
+
+
+def lazy_text(value) -> str:
+    if callable(value):
+        return value()
+    return value
+
+
+class LogRecord:
+    __slots__ = ("level", "fmt", "args", "_text")
+
+    def __init__(self, level: int, fmt, *args):
+        self.level = level
+        self.fmt = fmt
+        self.args = args
+        self._text = None
+
+    def render(self) -> str:
+        if self._text is None:
+            if callable(self.fmt):
+                self._text = self.fmt(*self.args)
+            else:
+                self._text = str(self.fmt)
+        return self._text
+
+    def __str__(self):
+        return self.render()
+
+
+class CardLogger:
+
+    def __init__(self, sink=None, level: int = DEBUG):
+        self.sinks = []
+        self.level = None
+        if sink is not None:
+            self.add_sink(sink, level)
+
+    def add_sink(self, sink, level: int = DEBUG):
+        self.sinks.append((level, sink))
+        self.level = min(lv for lv, _ in self.sinks)
+
+    def remove_sink(self, sink):
+        self.sinks = [(lv, s) for lv, s in self.sinks if s is not sink]
+        self.level = min((lv for lv, _ in self.sinks), default=None)
+
+    def enabled(self, level: int) -> bool:
+        return self.level is not None and level >= self.level
+
+    def emit(self, record: LogRecord):
+        for level, sink in self.sinks:
+            if record.level < level:
+                continue
+            sink(record.render())
+
+    def log(self, level: int, fmt, *args):
+        if self.enabled(level):
+            self.emit(LogRecord(level, fmt, *args))
+
+    def __call__(self, msg):
+        self.log(INFO, msg)
+
+
+def as_card_logger(logger, level: int = DEBUG) -> CardLogger:
+    if isinstance(logger, CardLogger):
+        return logger
+    return CardLogger(logger, level)
@@ -0,0 +1,113 @@
+import threading
+
+
+READER_ADDED = "reader_added"
+READER_REMOVED = "reader_removed"
+CARD_INSERTED = "card_inserted"
+CARD_REMOVED = "card_removed"
+
+
+class CardEvent:
+    __slots__ = ("kind", "reader", "atr")
+
+    def __init__(self, kind: str, reader: str, atr=None):
+        self.kind = kind
+        self.reader = reader
+        self.atr = list(atr) if atr is not None else None
+
+    def __repr__(self):
+        atr = " ".join(f"{b:02X}" for b in self.atr) if self.atr else ""
+        return f"CardEvent({self.kind}, {self.reader!r}{', ' + atr if atr else ''})"
+
+
+class CardMonitor:
+
+    def __init__(self, callback, logger=None):
+        self.callback = callback
+        self.log = logger if logger else (lambda msg: None)
+        self._lock = threading.Lock()
+        self._cards: dict = {}
+        self._readers: set = set()
+        self._pcsc = None
+        self._emulated = []
+
+    def _emit(self, event: CardEvent):
+        with self._lock:
+            if event.kind == READER_ADDED:
+                if event.reader in self._readers:
+                    return
+                self._readers.add(event.reader)
+            elif event.kind == READER_REMOVED:
+                if event.reader not in self._readers:
+                    return
+                self._readers.discard(event.reader)
+            elif event.kind == CARD_INSERTED:
+                if self._cards.get(event.reader) == event.atr:
+                    return
+                self._cards[event.reader] = event.atr
+            elif event.kind == CARD_REMOVED:
+                if self._cards.pop(event.reader, None) is None:
+                    return
+        self.callback(event)
+
+    def start(self, pcsc: bool = True, emulated=()):
+        for reader in emulated:
+            self.watch_emulated(reader)
+        if pcsc:
+            self._start_pcsc()
+
+    def _start_pcsc(self):
+        from smartcard.CardMonitoring import CardMonitor as _CardMonitor, CardObserver
+        from smartcard.ReaderMonitoring import ReaderMonitor as _ReaderMonitor, ReaderObserver
+
+        monitor = self
+
+        class _Readers(ReaderObserver):
+            def update(self, observable, actions):
+                added, removed = actions
+                for r in removed:
+                    monitor._emit(CardEvent(CARD_REMOVED, str(r)))
+                    monitor._emit(CardEvent(READER_REMOVED, str(r)))
+                for r in added:
+                    monitor._emit(CardEvent(READER_ADDED, str(r)))
+
+        class _Cards(CardObserver):
+            def update(self, observable, actions):
+                added, removed = actions
+                for card in removed:
+                    monitor._emit(CardEvent(CARD_REMOVED, str(card.reader)))
+                for card in added:
+                    monitor._emit(CardEvent(READER_ADDED, str(card.reader)))
+                    monitor._emit(CardEvent(CARD_INSERTED, str(card.reader), card.atr))
+
+        readers, cards = _ReaderMonitor(), _CardMonitor()
+        reader_obs, card_obs = _Readers(), _Cards()
+        readers.addObserver(reader_obs)
+        cards.addObserver(card_obs)
+        self._pcsc = (readers, reader_obs, cards, card_obs)
+
+    def watch_emulated(self, reader):
+        def changed(r, card):
+            if card is None:
+                self._emit(CardEvent(CARD_REMOVED, str(r)))
+            else:
+                self._emit(CardEvent(CARD_INSERTED, str(r), card.ATR))
+
+        reader.add_observer(changed)
+        self._emulated.append((reader, changed))
+        self._emit(CardEvent(READER_ADDED, str(reader)))
+        if reader.card is not None:
+            changed(reader, reader.card)
+
+    def stop(self):
+        if self._pcsc is not None:
+            readers, reader_obs, cards, card_obs = self._pcsc
+            for monitor, observer in ((cards, card_obs), (readers, reader_obs)):
+                try:
+                    monitor.deleteObserver(observer)
+                except Exception:
+                    pass
+            self._pcsc = None
+        for reader, changed in self._emulated:
+            reader.remove_observer(changed)
+        self._emulated = []
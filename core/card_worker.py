@@ -1,38 +1,177 @@
 from PySide6.QtCore import QObject, Signal, Slot
 
+from core.language_manager import tr
+from core.job_scheduler import JobScheduler, INTERACTIVE, NORMAL, BACKGROUND
+from core.card_monitor import READER_ADDED, READER_REMOVED
+
+
+PRIORITIES = {
+    "card_event": INTERACTIVE,
+    "connect": INTERACTIVE,
+    "disconnect": INTERACTIVE,
+    "read_range": INTERACTIVE,
+    "authenticate": INTERACTIVE,
+    "change_psc": INTERACTIVE,
+    "read_protection": NORMAL,
+    "write_ranges": NORMAL,
+    "write_bytes": NORMAL,
+    "set_protection_bits": NORMAL,
+    "card_inserted": NORMAL,
+    "read_card": BACKGROUND,
+    "recover_psc": BACKGROUND,
+}
+
+COALESCED = ("card_inserted", "read_card", "read_protection", "read_range")
+PREEMPTING = ("read_range",)
+# Reader bookkeeping must survive a cancel, or a removal could be lost.
+UNCANCELLED = ("card_event", "disconnect")
+
+
 class CardWorker(QObject):
-    finished = Signal(object)
-    error = Signal(str)
     log = Signal(str)
+    failed = Signal(str, str)
+    progress = Signal(int, str, int, int)
+    cancelled = Signal(int, str)
+    wake = Signal()
+    cardEvent = Signal(object)
+    connected = Signal(str, object)
+    disconnected = Signal()
+    readersChanged = Signal(object)
+
+    cardStarted = Signal(str, int)
+    chunkRead = Signal(int, object)
+    cardLoaded = Signal(object)
+    protectionLoaded = Signal(object)
+    protectionWritten = Signal(object)
+    authenticated = Signal(bool)
+    pscChanged = Signal(object)
+    pscRecovered = Signal(object)
+    written = Signal(object)
+    rangeRead = Signal(int, object)
 
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
+        self.scheduler = JobScheduler(
+            self._run_job,
+            on_progress=lambda job, done, total: self.progress.emit(job.id, job.command, done, total),
+            on_cancelled=lambda job: self.cancelled.emit(job.id, job.command),
+        )
+        self.controller.checkpoint = self.scheduler.checkpoint
+        self.wake.connect(self.drain)
+
+    def submit(self, command: str, *args, priority: int = None):
+        job = self.scheduler.submit(
+            command,
+            tuple(args),
+            priority=PRIORITIES.get(command, NORMAL) if priority is None else priority,
+            coalesce=command in COALESCED,
+            preempts=command in PREEMPTING,
+        )
+        self.wake.emit()
+        return job
+
+    def cancel(self, job_id: int = None):
+        self.scheduler.cancel(job_id)
+
+    def cancel_all(self):
+        self.scheduler.cancel_all(keep=UNCANCELLED)
 
     @Slot()
-    def read_card(self):
-        try:
-            ctype = self.controller.detect_card_type()
-            self.log.emit(f"Tipo de tarjeta: {ctype}")
-            data = self.controller.load_card(ctype)
-            self.finished.emit(data)
-        except Exception as e:
-            self.error.emit(str(e))
+    def drain(self):
+        self.scheduler.run_pending()
 
-    @Slot(list)
-    def authenticate(self, psc):
+    def _run_job(self, job):
+        self.execute(job.command, job.args)
+
+    def _card(self):
+        card = self.controller.card
+        if card is None:
+            raise Exception(tr("error.no_card_loaded"))
+        return card
+
+    @Slot(str, object)
+    def execute(self, command, args):
+        handler = getattr(self, f"_cmd_{command}", None)
         try:
-            card = self.controller.card
-            card.authenticate(psc)
-            self.finished.emit(True)
+            if handler is None:
+                raise Exception(f"{command}?")
+            handler(*args)
         except Exception as e:
-            self.error.emit(str(e))
+            self.failed.emit(command, str(e))
 
-    @Slot(int, list)
-    def write_bytes(self, addr, data):
-        try:
-            card = self.controller.card
+    def _cmd_read_card(self):
+        ctype = self.controller.detect_card_type()
+        self.log.emit(f"Tipo de tarjeta: {ctype}")
+        started = False
+        for addr, data in self.controller.iter_load_card(ctype):
+            if not started:
+                self.cardStarted.emit(ctype, self.controller.card.size)
+                started = True
+            self.chunkRead.emit(addr, data)
+        self.cardLoaded.emit(self.controller.memory)
+        self.execute("read_protection", ())
+
+    def _cmd_card_inserted(self, reader_name):
+        atr = self.controller.auto_connect(reader_name)
+        self.connected.emit(reader_name, list(atr))
+        self._cmd_read_card()
+
+    def _cmd_card_event(self, event):
+        connected = self.controller.connected_reader is not None
+        self.controller.handle_event(event)
+        if connected and self.controller.connected_reader is None:
+            self.disconnected.emit()
+        if event.kind in (READER_ADDED, READER_REMOVED):
+            self.readersChanged.emit([str(r) for r in self.controller.readers])
+
+    def _cmd_connect(self, reader_name):
+        atr = self.controller.auto_connect(reader_name)
+        self.connected.emit(reader_name, list(atr))
+
+    def _cmd_disconnect(self):
+        self.controller.disconnect_reader()
+        self.disconnected.emit()
+
+    def _cmd_read_protection(self):
+        card = self._card()
+        if not hasattr(card, "read_protection_memory"):
+            self.protectionLoaded.emit(None)
+            return
+        card.read_protection_memory()
+        bits = getattr(card, "protection_bits", None)
+        self.protectionLoaded.emit(list(bits) if bits is not None else [])
+
+    def _cmd_authenticate(self, psc):
+        self._card().authenticate(list(psc))
+        self.authenticated.emit(True)
+
+    def _cmd_change_psc(self, new_psc):
+        self._card().change_psc(list(new_psc))
+        self.pscChanged.emit(list(new_psc))
+
+    def _cmd_recover_psc(self):
+        self._card()
+        self.pscRecovered.emit(self.controller.recover_psc())
+
+    def _cmd_read_range(self, addr, length):
+        card = self._card()
+        data = card.read_range(addr, length)
+        card._store_memory(addr, data)
+        self.rangeRead.emit(addr, bytes(data))
+
+    def _cmd_write_ranges(self, chunks):
+        card = self._card()
+        ranges = []
+        for addr, data in chunks:
             card.write_bytes(addr, data)
-            self.finished.emit(True)
-        except Exception as e:
-            self.error.emit(str(e))
+            ranges.append((addr, addr + len(data)))
+        self.written.emit(ranges)
+
+    def _cmd_write_bytes(self, addr, data):
+        self._cmd_write_ranges([(addr, bytes(data))])
+
+    def _cmd_set_protection_bits(self, indices):
+        self._card().set_protection_bits(list(indices))
+        self.protectionWritten.emit(list(indices))
+        self.execute("read_protection", ())
@@ -0,0 +1,318 @@
+import threading
+from contextlib import contextmanager
+
+from core.language_manager import tr
+
+try:
+    from smartcard.Exceptions import NoCardException
+except ImportError:
+    from core.emulator import NoCardException
+
+
+SCARD_SHARE_EXCLUSIVE = 1
+SCARD_SHARE_SHARED = 2
+SCARD_LEAVE_CARD = 0
+SCARD_RESET_CARD = 1
+
+SCARD_E_INVALID_HANDLE = 0x80100003
+SCARD_E_NO_SMARTCARD = 0x8010000C
+SCARD_F_COMM_ERROR = 0x80100013
+SCARD_E_NOT_TRANSACTED = 0x80100016
+SCARD_E_READER_UNAVAILABLE = 0x80100017
+SCARD_E_COMM_DATA_LOST = 0x8010002F
+SCARD_W_UNPOWERED_CARD = 0x80100067
+SCARD_W_RESET_CARD = 0x80100068
+SCARD_W_REMOVED_CARD = 0x80100069
+
+TRANSIENT = {
+    SCARD_E_INVALID_HANDLE,
+    SCARD_F_COMM_ERROR,
+    SCARD_E_NOT_TRANSACTED,
+    SCARD_E_COMM_DATA_LOST,
+    SCARD_W_UNPOWERED_CARD,
+    SCARD_W_RESET_CARD,
+}
+CARD_GONE = {SCARD_E_NO_SMARTCARD, SCARD_E_READER_UNAVAILABLE, SCARD_W_REMOVED_CARD}
+CARD_RESET = {SCARD_W_UNPOWERED_CARD, SCARD_W_RESET_CARD}
+
+# PSC verification decrements the error counter before comparing, so an
+# APDU with an unknown outcome is never sent twice.
+NO_RETRY_INS = {0x20}
+# A reset drops the PSC session and the card ignores writes silently, so a
+# write is never replayed once the card may have been reset.
+WRITE_INS = {0xD0, 0xD1, 0xD2}
+WRITE_3W_OPS = {0x30, 0x31, 0x32, 0x33}
+INS_THREE_WIRE = 0x70
+INS_SELECT_CARD = 0xA4
+
+
+def _hresult(exc) -> int:
+    code = getattr(exc, "hresult", None)
+    if code is None:
+        return None
+    return code & 0xFFFFFFFF
+
+
+def _hcard(conn):
+    while conn is not None:
+        hcard = getattr(conn, "hcard", None)
+        if hcard is not None:
+            return hcard
+        conn = getattr(conn, "component", None)
+    return None
+
+
+def is_card_gone(exc) -> bool:
+    return isinstance(exc, NoCardException) or _hresult(exc) in CARD_GONE
+
+
+def is_transient(exc) -> bool:
+    if is_card_gone(exc):
+        return False
+    return _hresult(exc) in TRANSIENT
+
+
+def is_write(apdu) -> bool:
+    if len(apdu) < 2 or apdu[0] != 0xFF:
+        return False
+    if apdu[1] == INS_THREE_WIRE:
+        return len(apdu) > 9 and (apdu[9] & 0x3F) in WRITE_3W_OPS
+    return apdu[1] in WRITE_INS
+
+
+class ConnectionStats:
+    __slots__ = ("opened", "reused", "reconnected", "retried", "closed")
+
+    def __init__(self):
+        self.opened = 0
+        self.reused = 0
+        self.reconnected = 0
+        self.retried = 0
+        self.closed = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ReaderConnection:
+
+    def __init__(self, reader, exclusive: bool = True, retries: int = 1, stats: ConnectionStats = None,
+                 logger=None):
+        self.reader = reader
+        self.name = str(reader)
+        self.exclusive = exclusive
+        self.retries = retries
+        self.stats = stats if stats is not None else ConnectionStats()
+        self.log = logger if logger else (lambda msg: None)
+        self.lock = threading.RLock()
+        self.conn = None
+        self.atr = None
+        self.mode = None
+        self.in_use = False
+        self.reset_epoch = 0
+        self._select = None
+        self._depth = 0
+
+    def __repr__(self):
+        state = "open" if self.conn is not None else "closed"
+        return f"ReaderConnection({self.name!r}, {state})"
+
+    @property
+    def share_mode(self) -> int:
+        return SCARD_SHARE_EXCLUSIVE if self.exclusive else SCARD_SHARE_SHARED
+
+    def open(self):
+        with self.lock:
+            if self.conn is not None:
+                return self
+            conn = self.reader.createConnection()
+            try:
+                conn.connect(mode=self.share_mode)
+            except NoCardException:
+                raise Exception(tr("msg.no_card_inserted"))
+            except Exception as e:
+                raise Exception(f"{tr('msg.error_connect')} {e}")
+            self.conn = conn
+            self.atr = list(conn.getATR())
+            self.mode = self.share_mode
+            self._select = None
+            self.stats.opened += 1
+            return self
+
+    def ensure(self):
+        with self.lock:
+            if self.conn is None:
+                return self.open()
+            try:
+                atr = list(self.conn.getATR())
+            except Exception as e:
+                if not is_transient(e) and not is_card_gone(e):
+                    raise
+                self.reconnect(SCARD_RESET_CARD)
+                return self
+            if atr != self.atr:
+                self.reconnect(SCARD_RESET_CARD)
+            else:
+                self.stats.reused += 1
+                if self.mode != self.share_mode:
+                    self._set_mode(self.share_mode)
+            return self
+
+    def reconnect(self, disposition: int = SCARD_LEAVE_CARD, reset: bool = False):
+        with self.lock:
+            if self.conn is None:
+                return self.open()
+            try:
+                self.conn.reconnect(mode=self.share_mode, disposition=disposition)
+            except NoCardException:
+                raise Exception(tr("msg.no_card_inserted"))
+            except Exception:
+                self.close()
+                self.open()
+                self.reset_epoch += 1
+                return self
+            self.mode = self.share_mode
+            atr = list(self.conn.getATR())
+            if atr != self.atr:
+                self._select = None
+            if reset or disposition != SCARD_LEAVE_CARD or atr != self.atr:
+                self.reset_epoch += 1
+            self.atr = atr
+            self.stats.reconnected += 1
+            self.log(f"[{self.name}] reconnected")
+            if self._select is not None:
+                self.conn.transmit(self._select)
+            return self
+
+    def _set_mode(self, mode: int):
+        try:
+            self.conn.reconnect(mode=mode, disposition=SCARD_LEAVE_CARD)
+            self.mode = mode
+        except Exception:
+            self.close()
+
+    def downgrade(self):
+        with self.lock:
+            if self.conn is not None and self.mode == SCARD_SHARE_EXCLUSIVE:
+                self._set_mode(SCARD_SHARE_SHARED)
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                try:
+                    self.conn.disconnect()
+                except Exception:
+                    pass
+                self.stats.closed += 1
+            self.conn = None
+            self.atr = None
+            self.mode = None
+            self._select = None
+
+    def disconnect(self):
+        self.close()
+
+    def connect(self, *args, **kwargs):
+        self.open()
+
+    def getReader(self):
+        return self.name
+
+    def getATR(self):
+        with self.lock:
+            if self.conn is None:
+                raise Exception(tr("msg.no_connected"))
+            return list(self.atr)
+
+    def transmit(self, apdu, *args, **kwargs):
+        with self.lock:
+            if self.conn is None:
+                raise Exception(tr("error.no_active_connection"))
+            attempt = 0
+            while True:
+                try:
+                    result = self.conn.transmit(apdu, *args, **kwargs)
+                    break
+                except Exception as e:
+                    if is_card_gone(e):
+                        raise Exception(tr("error.no_card_inserted"))
+                    if attempt >= self.retries or not is_transient(e):
+                        raise Exception(f"{tr('error.transmit_apdu')} {e}")
+                    attempt += 1
+                    epoch = self.reset_epoch
+                    self.reconnect(reset=_hresult(e) in CARD_RESET)
+                    if len(apdu) > 1 and apdu[1] in NO_RETRY_INS:
+                        raise Exception(f"{tr('error.transmit_apdu')} {e}")
+                    if self.reset_epoch != epoch and is_write(apdu):
+                        raise Exception(f"{tr('error.card_reset')} {e}")
+                    self.stats.retried += 1
+            if len(apdu) > 1 and apdu[0] == 0xFF and apdu[1] == INS_SELECT_CARD and result[1] == 0x90:
+                self._select = list(apdu)
+            return result
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            hcard = _hcard(self.conn) if self._depth == 0 else None
+            if hcard is not None:
+                from smartcard.scard import SCardBeginTransaction, SCardEndTransaction
+                SCardBeginTransaction(hcard)
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if hcard is not None:
+                    SCardEndTransaction(hcard, SCARD_LEAVE_CARD)
+
+
+class ConnectionManager:
+
+    def __init__(self, logger=None, exclusive: bool = True, retries: int = 1):
+        self.log = logger if logger else (lambda msg: None)
+        self.exclusive = exclusive
+        self.retries = retries
+        self.stats = ConnectionStats()
+        self._lock = threading.Lock()
+        self._links: dict[str, ReaderConnection] = {}
+
+    def link(self, reader) -> ReaderConnection:
+        name = str(reader)
+        with self._lock:
+            link = self._links.get(name)
+            if link is None:
+                link = ReaderConnection(reader, self.exclusive, self.retries, self.stats, self.log)
+                self._links[name] = link
+            else:
+                link.reader = reader
+            return link
+
+    def acquire(self, reader) -> ReaderConnection:
+        link = self.link(reader)
+        link.ensure()
+        link.in_use = True
+        return link
+
+    def release(self, reader, keep: bool = True):
+        with self._lock:
+            link = self._links.get(str(reader))
+        if link is None:
+            return
+        link.in_use = False
+        if not keep:
+            link.close()
+        else:
+            link.downgrade()
+
+    def drop(self, reader):
+        with self._lock:
+            link = self._links.pop(str(reader), None)
+        if link is not None:
+            link.close()
+
+    def close_all(self):
+        with self._lock:
+            links = list(self._links.values())
+            self._links.clear()
+        for link in links:
+            link.close()
@@ -0,0 +1,494 @@
+import threading
+import time
+from collections import Counter
+
+from drivers.acr_commands import ACS, SLE3W, CARD_CODE, FIXED, build_3w_command
+from model.memory_image import MemoryImage
+
+try:
+    from smartcard.Exceptions import NoCardException, CardConnectionException
+except ImportError:
+    class CardConnectionException(Exception):
+        pass
+
+    class NoCardException(Exception):
+        pass
+
+
+SW_OK = (0x90, 0x00)
+SW_WRONG_LENGTH = (0x67, 0x00)
+SW_SECURITY = (0x69, 0x82)
+SW_FUNC_NOT_SUPPORTED = (0x6A, 0x81)
+SW_WRONG_P1P2 = (0x6B, 0x00)
+SW_INS_NOT_SUPPORTED = (0x6D, 0x00)
+
+INS_CHANGE_PSC = 0xD2
+INS_WRITE_PROTECT = 0xD1
+INS_THREE_WIRE = 0x70
+
+THREE_WIRE_HEADER = build_3w_command(0, 0)[:9]
+THREE_WIRE_OP_MASK = 0x3F
+
+
+class EmulatedCard:
+
+    NAME = ""
+    ATR = []
+    CARD_CODE = None
+    SIZE = 0
+    PSC_LEN = 0
+    EC_FULL = 0
+
+    def __init__(self, image=None, psc=None, protected=(), strict: bool = True):
+        self.memory = MemoryImage.blank(self.SIZE, protected=self.protected_size())
+        if image is not None:
+            self.memory.load(0, image)
+        for addr in protected:
+            self.memory.protection[addr] = True
+        self._init_security(psc)
+        self.strict = strict
+        self.authenticated = False
+        self.selected = None
+        self._handlers = {
+            ACS.SELECT_CARD: self._select,
+            ACS.READ_BINARY: self._read,
+            ACS.READ_PROTECTION: self._read_security,
+            ACS.READ_PROTECTION_BITS: self._read_protection,
+            ACS.WRITE_BINARY: self._write,
+            INS_WRITE_PROTECT: self._write_protect,
+            ACS.VERIFY_PSC: self._verify,
+            INS_CHANGE_PSC: self._change_psc,
+        }
+
+    def protected_size(self) -> int:
+        return self.SIZE
+
+    def _init_security(self, psc):
+        self.psc = list(psc) if psc is not None else [0xFF] * self.PSC_LEN
+        self.error_counter = self.EC_FULL
+
+    def reset(self):
+        self.authenticated = False
+        self.selected = None
+
+    @property
+    def locked(self) -> bool:
+        return self.error_counter == 0
+
+    def process(self, apdu):
+        if len(apdu) < 5 or apdu[0] != 0xFF:
+            return [], *SW_INS_NOT_SUPPORTED
+        handler = self._handlers.get(apdu[1])
+        if handler is None:
+            return [], *SW_INS_NOT_SUPPORTED
+        if self.selected is not None and self.selected != self.CARD_CODE and apdu[1] != ACS.SELECT_CARD:
+            return [], *SW_FUNC_NOT_SUPPORTED
+        return handler(apdu)
+
+    def _ok(self, data=()):
+        return list(data), *SW_OK
+
+    def _denied(self):
+        return [], *(SW_SECURITY if self.strict else SW_OK)
+
+    def _addr(self, apdu) -> int:
+        return (apdu[2] << 8) | apdu[3]
+
+    def _body(self, apdu):
+        data = list(apdu[5:])
+        if len(data) != apdu[4]:
+            return None
+        return data
+
+    def _select(self, apdu):
+        if apdu[4] != 1 or len(apdu) < 6:
+            return [], *SW_WRONG_LENGTH
+        self.selected = apdu[5]
+        return self._ok()
+
+    def read_byte(self, addr: int) -> int:
+        return self.memory[addr]
+
+    def _read(self, apdu):
+        addr = self._addr(apdu)
+        if addr >= self.SIZE:
+            return [], *SW_WRONG_P1P2
+        end = min(self.SIZE, addr + (apdu[4] or 256))
+        return self._ok(self.read_byte(a) for a in range(addr, end))
+
+    def _read_protection(self, apdu):
+        addr = self._addr(apdu)
+        bits = self.memory.protection
+        if addr >= len(bits):
+            return [], *SW_WRONG_P1P2
+        out = []
+        for n in range(apdu[4]):
+            byte = 0
+            for bit in range(8):
+                a = addr + n * 8 + bit
+                if a >= len(bits) or not bits[a]:
+                    byte |= 1 << bit
+            out.append(byte)
+        return self._ok(out)
+
+    def _read_security(self, apdu):
+        psc = self.psc if self.authenticated else [0x00] * self.PSC_LEN
+        return self._ok(([self.error_counter] + psc)[:apdu[4]])
+
+    def writable(self, addr: int) -> bool:
+        bits = self.memory.protection
+        return addr < self.SIZE and not (addr < len(bits) and bits[addr])
+
+    def write_byte(self, addr: int, value: int) -> bool:
+        if not self.authenticated or not self.writable(addr):
+            return False
+        self.memory[addr] = value
+        return True
+
+    def _write(self, apdu):
+        data = self._body(apdu)
+        if data is None:
+            return [], *SW_WRONG_LENGTH
+        addr = self._addr(apdu)
+        if addr + len(data) > self.SIZE:
+            return [], *SW_WRONG_P1P2
+        ok = True
+        for i, value in enumerate(data):
+            ok = self.write_byte(addr + i, value) and ok
+        return self._ok() if ok else self._denied()
+
+    def protect_byte(self, addr: int, value: int) -> bool:
+        bits = self.memory.protection
+        if not self.authenticated or addr >= len(bits) or self.memory[addr] != value:
+            return False
+        bits[addr] = True
+        return True
+
+    def _write_protect(self, apdu):
+        data = self._body(apdu)
+        if data is None:
+            return [], *SW_WRONG_LENGTH
+        addr = self._addr(apdu)
+        if addr + len(data) > len(self.memory.protection):
+            return [], *SW_WRONG_P1P2
+        ok = True
+        for i, value in enumerate(data):
+            ok = self.protect_byte(addr + i, value) and ok
+        return self._ok() if ok else self._denied()
+
+    def verify(self, psc) -> bool:
+        if self.locked:
+            return False
+        self.error_counter &= self.error_counter - 1
+        if list(psc) != self.psc:
+            self.authenticated = False
+            return False
+        self.error_counter = self.EC_FULL
+        self.authenticated = True
+        return True
+
+    def _verify(self, apdu):
+        data = self._body(apdu)
+        if data is None or len(data) != self.PSC_LEN:
+            return [], *SW_WRONG_LENGTH
+        self.verify(data)
+        return [], 0x90, self.error_counter
+
+    def _change_psc(self, apdu):
+        data = self._body(apdu)
+        if data is None or len(data) != self.PSC_LEN:
+            return [], *SW_WRONG_LENGTH
+        if not self.authenticated:
+            return self._denied()
+        self.psc = data
+        return self._ok()
+
+
+class SLE4442Card(EmulatedCard):
+
+    NAME = "SLE4442"
+    ATR = [0x3B, 0x04, 0xA2, 0x13, 0x10, 0x91]
+    CARD_CODE = CARD_CODE.SLE4432_4442
+    SIZE = 256
+    PSC_LEN = 3
+    EC_FULL = 0x07
+
+    def __init__(self, image=None, psc=None, protected=(), strict: bool = True):
+        if image is None:
+            image = bytes([0xA2, 0x13, 0x10, 0x91]) + b"\xFF" * (self.SIZE - 4)
+        super().__init__(image, psc, protected, strict)
+
+    def protected_size(self) -> int:
+        return 32
+
+
+class SLE4428Card(EmulatedCard):
+
+    NAME = "SLE4428"
+    ATR = [0x3B, 0x04, 0x92, 0x23, 0x10, 0x91]
+    CARD_CODE = CARD_CODE.SLE4418_4428
+    SIZE = 1024
+    PSC_LEN = 2
+    EC_FULL = 0xFF
+
+    def __init__(self, image=None, psc=None, protected=(), strict: bool = True,
+                 native_reads: bool = True):
+        super().__init__(image, psc, protected, strict)
+        self.native_reads = native_reads
+        self._pending = None
+        self._handlers[INS_THREE_WIRE] = self._three_wire
+        self._3w = {
+            SLE3W.READ_9BITS_DATA_WITH_PROTECT: self._3w_read9,
+            SLE3W.READ_8BITS_DATA_NO_PROTECT: self._3w_read8,
+            SLE3W.WRITE_AND_ERASE_WITH_PROTECT: self._3w_write_protect,
+            SLE3W.WRITE_AND_ERASE_NO_PROTECT: self._3w_write,
+            SLE3W.COMPARE_AND_PROTECT: self._3w_compare_protect,
+            SLE3W.WRITE_ERROR_COUNTER & THREE_WIRE_OP_MASK: self._3w_write_error_counter,
+            SLE3W.VERIFY_PSC & THREE_WIRE_OP_MASK: self._3w_compare_psc,
+        }
+
+    @property
+    def error_counter(self) -> int:
+        return self.memory[FIXED.ERROR_COUNTER]
+
+    @error_counter.setter
+    def error_counter(self, value: int):
+        self.memory[FIXED.ERROR_COUNTER] = value & 0xFF
+
+    @property
+    def psc(self) -> list[int]:
+        return list(self.memory[FIXED.PSC1:FIXED.PSC2 + 1])
+
+    @psc.setter
+    def psc(self, value):
+        self.memory[FIXED.PSC1:FIXED.PSC2 + 1] = bytes(value)
+
+    def _init_security(self, psc):
+        if psc is not None:
+            self.psc = psc
+
+    def reset(self):
+        super().reset()
+        self._pending = None
+
+    def process(self, apdu):
+        if not self.native_reads and len(apdu) > 1 and apdu[1] in (ACS.READ_BINARY, ACS.READ_PROTECTION_BITS):
+            return [], *SW_INS_NOT_SUPPORTED
+        return super().process(apdu)
+
+    def read_byte(self, addr: int) -> int:
+        if addr >= FIXED.PSC1 and not self.authenticated:
+            return 0x00
+        return self.memory[addr]
+
+    def _three_wire(self, apdu):
+        if len(apdu) != len(THREE_WIRE_HEADER) + 4 or list(apdu[:9]) != THREE_WIRE_HEADER:
+            return [], *SW_WRONG_LENGTH
+        control = apdu[9]
+        handler = self._3w.get(control & THREE_WIRE_OP_MASK)
+        if handler is None:
+            return [], *SW_FUNC_NOT_SUPPORTED
+        addr = ((control >> 6) << 8) | apdu[10]
+        return [0x00, 0x00] + handler(addr, apdu[11]), *SW_OK
+
+    def _3w_read9(self, addr, _):
+        return [self.read_byte(addr), 0x00 if self.memory.protection[addr] else 0x01]
+
+    def _3w_read8(self, addr, _):
+        return [self.read_byte(addr)]
+
+    def _3w_write(self, addr, value):
+        self.write_byte(addr, value)
+        return []
+
+    def _3w_write_protect(self, addr, value):
+        if self.write_byte(addr, value):
+            self.memory.protection[addr] = True
+        return []
+
+    def _3w_compare_protect(self, addr, value):
+        self.protect_byte(addr, value)
+        return []
+
+    def _3w_write_error_counter(self, addr, value):
+        if addr != FIXED.ERROR_COUNTER or self.locked:
+            return []
+        cleared = self.error_counter & ~value & 0xFF
+        self.error_counter &= value
+        if cleared:
+            self.authenticated = False
+            self._pending = {}
+        return []
+
+    def _3w_compare_psc(self, addr, value):
+        if self._pending is None or addr not in (FIXED.PSC1, FIXED.PSC2):
+            return []
+        self._pending[addr] = value == self.memory[addr]
+        if len(self._pending) == self.PSC_LEN:
+            self.authenticated = all(self._pending.values())
+            self._pending = None
+        return []
+
+    def write_byte(self, addr: int, value: int) -> bool:
+        if addr == FIXED.ERROR_COUNTER and not self.authenticated:
+            self.error_counter &= value
+            return True
+        return super().write_byte(addr, value)
+
+
+class SLE5528Card(SLE4428Card):
+
+    NAME = "SLE5528"
+    ATR = [0x3B, 0x05, 0x28, 0x92, 0x23, 0x10, 0x91]
+
+
+EMULATED_CARDS = {cls.NAME: cls for cls in (SLE4442Card, SLE4428Card, SLE5528Card)}
+
+
+def create_card(card_type: str, **kwargs) -> EmulatedCard:
+    cls = EMULATED_CARDS.get(card_type)
+    if cls is None:
+        raise ValueError(card_type)
+    return cls(**kwargs)
+
+
+class EmulatorStats:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.apdus = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.busy = 0.0
+        self.by_ins = Counter()
+
+    def as_dict(self) -> dict:
+        return {
+            "apdus": self.apdus,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "busy": self.busy,
+            "by_ins": {f"{ins:02X}": n for ins, n in sorted(self.by_ins.items())},
+        }
+
+
+class EmulatedReader:
+
+    def __init__(self, name: str = "SLE Suite Emulator 0", card: EmulatedCard = None,
+                 latency: float = 0.0, byte_time: float = 0.0, sleep: bool = True):
+        self.name = name
+        self.card = card
+        self.latency = latency
+        self.byte_time = byte_time
+        self.sleep = sleep
+        self.stats = EmulatorStats()
+        self.lock = threading.Lock()
+        self.observers = []
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"EmulatedReader({self.name!r}, {self.card.NAME if self.card else None})"
+
+    def add_observer(self, callback):
+        self.observers.append(callback)
+
+    def remove_observer(self, callback):
+        if callback in self.observers:
+            self.observers.remove(callback)
+
+    def _notify(self):
+        for callback in list(self.observers):
+            callback(self, self.card)
+
+    def insert(self, card: EmulatedCard):
+        if self.card is not None:
+            self.remove()
+        with self.lock:
+            self.card = card
+            card.reset()
+        self._notify()
+
+    def remove(self):
+        with self.lock:
+            self.card = None
+        self._notify()
+
+    def createConnection(self):
+        return EmulatedConnection(self)
+
+    def exchange(self, apdu):
+        apdu = list(apdu)
+        with self.lock:
+            card = self.card
+            if card is None:
+                raise CardConnectionException(f"{self.name}: card removed")
+            data, sw1, sw2 = card.process(apdu)
+
+            cost = self.latency + self.byte_time * (len(apdu) + len(data) + 2)
+            stats = self.stats
+            stats.apdus += 1
+            stats.bytes_sent += len(apdu)
+            stats.bytes_received += len(data) + 2
+            stats.busy += cost
+            stats.by_ins[apdu[1] if len(apdu) > 1 else 0] += 1
+            if self.sleep and cost > 0:
+                time.sleep(cost)
+        return data, sw1, sw2
+
+
+class EmulatedConnection:
+
+    def __init__(self, reader: EmulatedReader):
+        self.reader = reader
+        self.connected = False
+
+    @property
+    def stats(self) -> EmulatorStats:
+        return self.reader.stats
+
+    @property
+    def apdu_count(self) -> int:
+        return self.reader.stats.apdus
+
+    def connect(self, protocol=None, mode=None, disposition=None):
+        card = self.reader.card
+        if card is None:
+            raise NoCardException(f"{self.reader.name}: no card")
+        card.reset()
+        self.connected = True
+
+    def reconnect(self, protocol=None, mode=None, disposition=None):
+        if disposition:
+            self.connect(protocol, mode, disposition)
+            return
+        if self.reader.card is None:
+            raise NoCardException(f"{self.reader.name}: no card")
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+
+    def getReader(self) -> str:
+        return self.reader.name
+
+    def getATR(self) -> list[int]:
+        card = self.reader.card
+        if card is None:
+            raise NoCardException(f"{self.reader.name}: no card")
+        return list(card.ATR)
+
+    def transmit(self, apdu, protocol=None):
+        if not self.connected:
+            raise CardConnectionException(f"{self.reader.name}: not connected")
+        return self.reader.exchange(apdu)
+
+
+def emulated_readers(card_types, **kwargs) -> list[EmulatedReader]:
+    return [
+        EmulatedReader(f"SLE Suite Emulator {i} ({ctype})", create_card(ctype), **kwargs)
+        for i, ctype in enumerate(card_types)
+    ]
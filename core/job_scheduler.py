@@ -0,0 +1,160 @@
+import heapq
+import itertools
+import threading
+
+from core.language_manager import tr
+
+
+INTERACTIVE = 0
+NORMAL = 10
+BACKGROUND = 20
+
+
+class JobCancelled(BaseException):
+    pass
+
+
+class Job:
+
+    def __init__(self, job_id: int, command: str, args: tuple, priority: int,
+                 key=None, preempts: bool = False):
+        self.id = job_id
+        self.command = command
+        self.args = args
+        self.priority = priority
+        self.key = key
+        self.preempts = preempts
+        self.done = 0
+        self.total = 0
+        self.running = False
+        self.finished = False
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.command}, prio={self.priority})"
+
+
+class JobScheduler:
+
+    def __init__(self, runner, on_progress=None, on_cancelled=None):
+        self.runner = runner
+        self.on_progress = on_progress
+        self.on_cancelled = on_cancelled
+        self._heap = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._keys: dict = {}
+        self._stack: list[Job] = []
+
+    def submit(self, command: str, args: tuple = (), priority: int = NORMAL,
+               coalesce: bool = False, preempts: bool = False) -> Job:
+        key = (command, args) if coalesce else None
+        with self._lock:
+            if key is not None:
+                existing = self._keys.get(key)
+                if existing is not None and not existing.cancelled:
+                    return existing
+
+            job = Job(next(self._ids), command, args, priority, key, preempts)
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            if key is not None:
+                self._keys[key] = job
+            return job
+
+    def pending(self) -> list[Job]:
+        with self._lock:
+            return [job for _, _, job in sorted(self._heap)]
+
+    @property
+    def current(self):
+        return self._stack[-1] if self._stack else None
+
+    def cancel(self, job_id: int = None, keep=()):
+        with self._lock:
+            jobs = [job for _, _, job in self._heap] + list(self._stack)
+        for job in jobs:
+            if (job_id is None or job.id == job_id) and job.command not in keep:
+                job.cancel()
+
+    def cancel_all(self, keep=()):
+        self.cancel(None, keep)
+
+    def _pop(self, max_priority=None, preempting=False):
+        with self._lock:
+            skipped = []
+            found = None
+            while self._heap:
+                item = heapq.heappop(self._heap)
+                job = item[2]
+                if max_priority is not None and job.priority >= max_priority:
+                    skipped.append(item)
+                    break
+                if preempting and not job.preempts:
+                    skipped.append(item)
+                    continue
+                found = job
+                break
+            for item in skipped:
+                heapq.heappush(self._heap, item)
+            return found
+
+    def _release(self, job: Job):
+        with self._lock:
+            if job.key is not None and self._keys.get(job.key) is job:
+                del self._keys[job.key]
+
+    def _run(self, job: Job):
+        if job.cancelled:
+            self._release(job)
+            if self.on_cancelled:
+                self.on_cancelled(job)
+            return
+
+        job.running = True
+        self._stack.append(job)
+        try:
+            self.runner(job)
+        except JobCancelled:
+            if self.on_cancelled:
+                self.on_cancelled(job)
+        finally:
+            self._stack.pop()
+            job.running = False
+            job.finished = True
+            self._release(job)
+
+    def run_pending(self) -> int:
+        count = 0
+        while True:
+            job = self._pop()
+            if job is None:
+                return count
+            self._run(job)
+            count += 1
+
+    def checkpoint(self, done: int = 0, total: int = 0):
+        job = self.current
+        if job is None:
+            return
+
+        if job.cancelled:
+            raise JobCancelled(tr("msg.job_cancelled"))
+
+        job.done = done
+        job.total = total
+        if self.on_progress:
+            self.on_progress(job, done, total)
+
+        while True:
+            urgent = self._pop(max_priority=job.priority, preempting=True)
+            if urgent is None:
+                break
+            self._run(urgent)
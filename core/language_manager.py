@@ -1,26 +1,58 @@
 import json
+import marshal
 import os
 from core.resource import resource_path
 
+FALLBACK_LANG = "es"
+CACHE_VERSION = 1
+
 _language_manager = None
 
 
-class LanguageManager:
-    def __init__(self, lang="es"):
-        self.current_lang = lang
-        self.data = {}
-        self.fallback = {}
+class _Catalog(dict):
 
-        self.available_langs = self._scan_languages()
-        self._load_fallback()
-        self.load(lang)
+    def __init__(self):
+        super().__init__()
+        self.loaded = False
+
+    def __missing__(self, key):
+        if self.loaded:
+            return key
+        get_language_manager().load(FALLBACK_LANG)
+        return self[key]
+
+
+_catalog = _Catalog()
 
-    def _scan_languages(self):
-        folder = resource_path("i18n")
 
+def _cache_path():
+    from core.settings_manager import get_config_dir
+    return os.path.join(get_config_dir(), "cache", "i18n.marshal")
+
+
+class LanguageManager:
+    def __init__(self, lang=None):
+        self.current_lang = None
+        self.folder = resource_path("i18n")
+        self._langs = None
+        self._compiled = None
+        if lang is not None:
+            self.load(lang)
+
+    @property
+    def available_langs(self):
+        if self._langs is None:
+            self._langs = self._scan_languages()
+        return self._langs
+
+    @property
+    def data(self):
+        return _catalog
+
+    def _scan_languages(self):
         langs = []
         try:
-            for f in os.listdir(folder):
+            for f in os.listdir(self.folder):
                 if f.endswith(".json"):
                     langs.append(f[:-5])
         except FileNotFoundError:
@@ -28,39 +60,91 @@ class LanguageManager:
 
         return sorted(langs)
 
-    def _load_fallback(self):
-        path = resource_path("i18n/es.json")
+    def _cache_key(self):
+        key = []
+        for lang in self.available_langs:
+            st = os.stat(os.path.join(self.folder, f"{lang}.json"))
+            key.append((lang, st.st_mtime_ns, st.st_size))
+        return tuple(key)
 
+    def _read_cache(self, key):
+        try:
+            with open(_cache_path(), "rb") as f:
+                version, cached_key, compiled = marshal.load(f)
+        except Exception:
+            return None
+        if version != CACHE_VERSION or cached_key != key:
+            return None
+        return compiled
+
+    def _write_cache(self, key, compiled):
+        path = _cache_path()
+        tmp = path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                marshal.dump((CACHE_VERSION, key, compiled), f)
+            os.replace(tmp, path)
+        except Exception:
+            pass
+
+    def _compile(self):
+        path = os.path.join(self.folder, f"{FALLBACK_LANG}.json")
         with open(path, "r", encoding="utf-8") as f:
-            self.fallback = json.load(f)
+            fallback = json.load(f)
+
+        compiled = {}
+        for lang in self.available_langs:
+            if lang == FALLBACK_LANG:
+                compiled[lang] = dict(fallback)
+                continue
+            with open(os.path.join(self.folder, f"{lang}.json"), "r", encoding="utf-8") as f:
+                merged = dict(fallback)
+                merged.update(json.load(f))
+                compiled[lang] = merged
+        return compiled
+
+    def compiled(self):
+        if self._compiled is None:
+            try:
+                key = self._cache_key()
+            except OSError:
+                key = None
+            compiled = self._read_cache(key) if key is not None else None
+            if compiled is None:
+                compiled = self._compile()
+                if key is not None:
+                    self._write_cache(key, compiled)
+            self._compiled = compiled
+        return self._compiled
 
     def load(self, lang):
+        compiled = self.compiled()
+        if lang not in compiled:
+            raise FileNotFoundError(f"Missing language file: {resource_path(f'i18n/{lang}.json')}")
 
-        path = resource_path(f"i18n/{lang}.json")
-
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"Missing language file: {path}")
-
-        with open(path, "r", encoding="utf-8") as f:
-            self.data = json.load(f)
-
+        _catalog.clear()
+        _catalog.update(compiled[lang])
+        _catalog.loaded = True
         self.current_lang = lang
 
     def tr(self, key):
-        if key in self.data:
-            return self.data[key]
-        if key in self.fallback:
-            return self.fallback[key]
-        return key
+        return _catalog[key]
 
 
-def init_language(lang="es"):
+def get_language_manager():
     global _language_manager
-    _language_manager = LanguageManager(lang)
+    if _language_manager is None:
+        _language_manager = LanguageManager()
+    return _language_manager
+
+
+def init_language(lang="es"):
+    manager = get_language_manager()
+    if manager.current_lang != lang:
+        manager.load(lang)
+    return manager
 
 
 def tr(key):
-    global _language_manager
-    if _language_manager is None:
-        init_language("es")
-    return _language_manager.tr(key)
+    return _catalog[key]
@@ -0,0 +1,187 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from core.language_manager import tr
+from core.atr_detector import ATRDetector
+from core.card_log import CardLogger, INFO
+from core.transport import Transport
+from core.connection_manager import ConnectionManager
+from drivers.registry import driver_for, resolve_card_type
+
+
+class SlotResult:
+
+    def __init__(self, reader: str, op: str, ok: bool, value=None, error: str = "",
+                 card_type: str = None, elapsed: float = 0.0):
+        self.reader = reader
+        self.op = op
+        self.ok = ok
+        self.value = value
+        self.error = error
+        self.card_type = card_type
+        self.elapsed = elapsed
+
+    def __str__(self):
+        state = "OK" if self.ok else f"ERROR: {self.error}"
+        return f"[{self.reader}] {self.op} {self.card_type or '-'} {self.elapsed * 1000:.1f} ms {state}"
+
+
+class ReaderSlot:
+
+    def __init__(self, reader, connections: ConnectionManager, logger=None):
+        self.reader = reader
+        self.connections = connections
+        self.name = str(reader)
+        self.log = logger if logger else (lambda msg: None)
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.active = False
+        self.conn = None
+        self.transport = None
+        self.card = None
+        self.card_type = None
+
+    def _prefixed(self, msg):
+        self.log(f"[{self.name}] {msg}")
+
+    def open(self):
+        if self.card is not None:
+            return self.card
+
+        conn = self.connections.acquire(self.reader)
+        self.conn = conn
+        self.transport = Transport(conn)
+
+        atr = conn.getATR()
+        self.card_type = resolve_card_type(ATRDetector.detect(atr, conn, logger=self._prefixed))
+        driver_cls = driver_for(self.card_type)
+        self.card = driver_cls(conn=self.transport, logger=CardLogger(self._prefixed, INFO))
+        return self.card
+
+    def close(self, keep: bool = True):
+        if self.transport:
+            self.transport.close()
+        if self.conn:
+            self.connections.release(self.reader, keep=keep)
+        self.conn = None
+        self.transport = None
+        self.card = None
+        self.card_type = None
+
+
+class MultiReaderEngine:
+
+    def __init__(self, pcsc, logger=None, max_workers: int = None):
+        self.pcsc = pcsc
+        self.log = logger if logger else (lambda msg: None)
+        self.max_workers = max_workers
+        self.connections = getattr(pcsc, "connections", None) or ConnectionManager(logger=self.log)
+        self.slots: dict[str, ReaderSlot] = {}
+        self._executor = None
+
+    def open(self):
+        for reader in self.pcsc.list_readers():
+            name = str(reader)
+            if name not in self.slots:
+                self.slots[name] = ReaderSlot(reader, self.connections, self.log)
+
+        if not self.slots:
+            raise Exception(tr("msg.no_readers"))
+
+        if self._executor is None:
+            workers = self.max_workers or len(self.slots)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slot")
+        return list(self.slots)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for slot in self.slots.values():
+            slot.close(keep=False)
+        self.slots.clear()
+
+    def submit(self, op, *args, readers=None) -> list[Future]:
+        if self._executor is None:
+            self.open()
+
+        names = readers if readers is not None else list(self.slots)
+        futures = []
+        for name in names:
+            slot = self.slots[name]
+            fut = Future()
+            slot.queue.put((op, args, fut))
+            futures.append(fut)
+
+            with slot.lock:
+                if not slot.active:
+                    slot.active = True
+                    self._executor.submit(self._drain, slot)
+        return futures
+
+    def run(self, op, *args, readers=None) -> list[SlotResult]:
+        return [f.result() for f in self.submit(op, *args, readers=readers)]
+
+    def _drain(self, slot: ReaderSlot):
+        while True:
+            with slot.lock:
+                try:
+                    op, args, fut = slot.queue.get_nowait()
+                except queue.Empty:
+                    slot.active = False
+                    return
+            fut.set_result(self._execute(slot, op, args))
+
+    def _execute(self, slot: ReaderSlot, op, args) -> SlotResult:
+        label = op if isinstance(op, str) else getattr(op, "__name__", "job")
+        t0 = time.perf_counter()
+        try:
+            card = slot.open()
+            if callable(op):
+                value = op(card, *args)
+            else:
+                value = getattr(self, f"_op_{op}")(card, *args)
+            return SlotResult(slot.name, label, True, value,
+                              card_type=slot.card_type, elapsed=time.perf_counter() - t0)
+        except Exception as e:
+            card_type = slot.card_type
+            slot.close()
+            return SlotResult(slot.name, label, False, error=str(e),
+                              card_type=card_type, elapsed=time.perf_counter() - t0)
+
+    def _op_detect(self, card):
+        return card.__class__.__name__
+
+    def _op_read(self, card):
+        return bytes(card.read_all())
+
+    def _op_write(self, card, addr: int, data, psc=None):
+        if psc is not None and not card.is_authenticated:
+            card.authenticate(list(psc))
+        card.write_bytes(addr, data)
+        return len(data)
+
+    def _op_verify(self, card, addr: int, data):
+        current = bytes(card.read_range(addr, len(data)))
+        expected = bytes(data)
+        if current != expected:
+            bad = [addr + i for i, (a, b) in enumerate(zip(current, expected)) if a != b]
+            raise Exception(f"{tr('error.verify_mismatch')}: {len(bad)} @ {bad[:8]}")
+        return True
+
+    def eject(self, readers=None):
+        names = readers if readers is not None else list(self.slots)
+        for name in names:
+            self.slots[name].close()
+
+    @staticmethod
+    def summary(results: list[SlotResult]) -> dict:
+        ok = sum(1 for r in results if r.ok)
+        return {
+            "total": len(results),
+            "ok": ok,
+            "failed": len(results) - ok,
+            "elapsed": max((r.elapsed for r in results), default=0.0),
+        }
@@ -1,13 +1,17 @@
 from smartcard.System import readers
-from smartcard.Exceptions import NoCardException
 from core.language_manager import tr
+from core.transport import Transport
+from core.connection_manager import ConnectionManager
 
 class PCSCManager:
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, emulated=None, exclusive: bool = True):
         self.reader = None
+        self.emulated = list(emulated or [])
         self.conn = None
+        self.transport = None
         self.log = logger if logger else (lambda x: None)
+        self.connections = ConnectionManager(logger=self.log, exclusive=exclusive)
                                                                  
     def _log(self, msg):
         self.log(msg)
@@ -15,10 +19,10 @@ class PCSCManager:
     def list_readers(self):
         try:
             r = readers()
-            return r
         except Exception as e:
             self._log(f"{tr('msg.enumerating_error')}: {e}")
-            return []
+            r = []
+        return list(r) + self.emulated
 
     def auto_select_reader(self):
         rlist = self.list_readers()
@@ -40,21 +44,17 @@ class PCSCManager:
         if reader is None:
             reader = self.auto_select_reader()
 
-        try:
-            self.conn = reader.createConnection()
-            self.conn.connect()
-            self._log(f"{tr('msg.connected_to')}: {reader}")
-        except NoCardException:
-            raise Exception(tr('msg.no_card_inserted'))
-        except Exception as e:
-            raise Exception(f"{tr('msg.error_connect')} {e}")
+        self.conn = self.connections.acquire(reader)
+        self.reader = reader
+        self.transport = Transport(self.conn)
+        self._log(f"{tr('msg.connected_to')}: {reader}")
 
     def disconnect(self):
+        if self.transport:
+            self.transport.close()
+        self.transport = None
         if self.conn:
-            try:
-                self.conn.disconnect()
-            except:
-                pass
+            self.connections.release(self.conn.reader)
         self.conn = None
         self._log(tr('msg.reader_disconnected'))
          
@@ -64,13 +64,13 @@ class PCSCManager:
         return self.conn.getATR()
                    
     def transmit(self, apdu):
-        if not self.conn:
+        if not self.transport:
             raise Exception(tr('error.no_active_connection'))
 
-        try:
-            data, sw1, sw2 = self.conn.transmit(apdu)
-            return data, sw1, sw2
-        except NoCardException:
-            raise Exception(tr('error.no_card_inserted'))
-        except Exception as e:
-            raise Exception(f"{tr('error.transmit_apdu')} {e}")
\ No newline at end of file
+        return self.transport.transmit(apdu)
+
+    def transmit_many(self, apdus):
+        if not self.transport:
+            raise Exception(tr('error.no_active_connection'))
+
+        return self.transport.transmit_many(apdus)
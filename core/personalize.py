@@ -0,0 +1,362 @@
+import csv
+import json
+import os
+import queue
+import time
+
+from core.language_manager import tr
+from core.card_monitor import CardMonitor, CARD_INSERTED, CARD_REMOVED
+from drivers.registry import driver_for
+from model.ranges import RangeSet
+
+
+FORMATS = ("ascii", "hex", "bcd", "uint_be", "uint_le")
+
+STATUS_OK = "ok"
+STATUS_INVALID = "invalid"
+STATUS_FAILED = "failed"
+STATUS_BLOCKED = "blocked"
+STATUS_MISMATCH = "mismatch"
+
+
+def iter_csv(path: str):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def iter_jsonl(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_records(path: str):
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        return iter_jsonl(path)
+    return iter_csv(path)
+
+
+class Field:
+    __slots__ = ("name", "addr", "length", "format", "column", "pad", "offset")
+
+    def __init__(self, name: str, addr: int, length: int, format: str = "ascii", column: str = None,
+                 pad: int = 0x00, offset: int = 0):
+        if format not in FORMATS:
+            raise Exception(f"{tr('error.field_format')}: {name} ({format})")
+        self.name = name
+        self.addr = addr
+        self.length = length
+        self.format = format
+        self.column = column or name
+        self.pad = pad
+        self.offset = offset
+
+    @classmethod
+    def from_dict(cls, raw: dict):
+        def num(value):
+            return int(value, 0) if isinstance(value, str) else int(value)
+
+        return cls(
+            raw["name"],
+            num(raw["addr"]),
+            num(raw["length"]),
+            raw.get("format", "ascii"),
+            raw.get("column"),
+            num(raw.get("pad", 0)),
+            num(raw.get("offset", 0)),
+        )
+
+    @property
+    def end(self) -> int:
+        return self.addr + self.length
+
+    def value(self, record: dict, index: int):
+        if self.column == "_index":
+            return index + self.offset
+        try:
+            value = record[self.column]
+        except KeyError:
+            raise Exception(f"{tr('error.field_missing')}: {self.column}")
+        if self.offset and self.format in ("uint_be", "uint_le"):
+            value = int(value, 0) if isinstance(value, str) else int(value)
+            value += self.offset
+        return value
+
+    def encode(self, value) -> bytes:
+        n = self.length
+        fmt = self.format
+        if fmt == "ascii":
+            raw = str(value).encode("ascii")
+        elif fmt == "hex":
+            raw = bytes.fromhex(str(value).replace(" ", ""))
+        elif fmt == "bcd":
+            digits = str(value)
+            if not digits.isdigit():
+                raise Exception(f"{tr('error.field_format')}: {self.name} ({value})")
+            digits = digits.rjust(n * 2, "0")
+            raw = bytes.fromhex(digits)
+        else:
+            number = int(value, 0) if isinstance(value, str) else int(value)
+            order = "big" if fmt == "uint_be" else "little"
+            try:
+                raw = number.to_bytes(n, order)
+            except OverflowError:
+                raise Exception(f"{tr('error.field_too_long')}: {self.name} ({value})")
+
+        if len(raw) > n:
+            raise Exception(f"{tr('error.field_too_long')}: {self.name} ({value})")
+        return raw + bytes([self.pad]) * (n - len(raw))
+
+
+class FieldMap:
+
+    def __init__(self, fields):
+        self.fields = sorted(fields, key=lambda f: f.addr)
+        for prev, cur in zip(self.fields, self.fields[1:]):
+            if cur.addr < prev.end:
+                raise Exception(f"{tr('error.field_overlap')}: {prev.name} / {cur.name}")
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if isinstance(raw, dict):
+            raw = raw["fields"]
+        return cls(Field.from_dict(item) for item in raw)
+
+    def check(self, size: int):
+        for field in self.fields:
+            if field.addr < 0 or field.end > size:
+                raise Exception(f"{tr('error.field_out_of_range')}: {field.name} [{field.addr}:{field.end}]")
+
+    def ranges(self) -> RangeSet:
+        return RangeSet((f.addr, f.end) for f in self.fields)
+
+    def render(self, base, record: dict, index: int = 0) -> bytearray:
+        image = bytearray(base)
+        for field in self.fields:
+            image[field.addr:field.end] = field.encode(field.value(record, index))
+        return image
+
+
+class Outcome:
+    __slots__ = ("index", "key", "reader", "status", "bytes_written", "apdus", "blocked",
+                 "mismatched", "error", "elapsed")
+
+    def __init__(self, index: int, key=None):
+        self.index = index
+        self.key = key
+        self.reader = None
+        self.status = STATUS_FAILED
+        self.bytes_written = 0
+        self.apdus = 0
+        self.blocked = []
+        self.mismatched = []
+        self.error = ""
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+    def as_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "key": self.key,
+            "reader": self.reader,
+            "status": self.status,
+            "bytes_written": self.bytes_written,
+            "apdus": self.apdus,
+            "blocked": self.blocked,
+            "mismatched": self.mismatched,
+            "error": self.error,
+            "elapsed": round(self.elapsed, 4),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+
+class OutcomeLog:
+
+    def __init__(self, path: str):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, outcome: Outcome):
+        self._file.write(json.dumps(outcome.as_dict()) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    @staticmethod
+    def done_indices(path: str) -> set:
+        done = set()
+        try:
+            for entry in iter_jsonl(path):
+                if entry.get("status") == STATUS_OK:
+                    done.add(entry["index"])
+        except OSError:
+            pass
+        return done
+
+
+class Personalizer:
+
+    def __init__(self, base, field_map: FieldMap, psc=None, key_field: str = None,
+                 trust_base: bool = False, verify: bool = True, logger=None):
+        self.base = bytes(base)
+        self.field_map = field_map
+        self.psc = list(psc) if psc is not None else None
+        self.key_field = key_field
+        self.trust_base = trust_base
+        self.verify = verify
+        self.log = logger if logger else (lambda msg: None)
+        field_map.check(len(self.base))
+
+    def render(self, record: dict, index: int = 0) -> bytearray:
+        return self.field_map.render(self.base, record, index)
+
+    def _prepare(self, card):
+        if len(self.base) > card.size:
+            raise Exception(f"{tr('error.field_out_of_range')}: {len(self.base)} > {card.size}")
+        card.select_card()
+        if self.trust_base:
+            card.restore({"memory": self.base})
+            card.mirror_confirmed = True
+        else:
+            card.read_all()
+        try:
+            card.read_protection_memory()
+        except Exception:
+            pass
+        if self.psc is not None and not card.is_authenticated:
+            card.authenticate(self.psc)
+        if not card.is_authenticated:
+            raise Exception(tr("msg.write_blocked"))
+
+    def _key(self, record: dict):
+        return record.get(self.key_field) if self.key_field else None
+
+    def personalize(self, card, record: dict, index: int = 0, image=None) -> Outcome:
+        outcome = Outcome(index, self._key(record))
+        t0 = time.perf_counter()
+        try:
+            if image is None:
+                image = self.render(record, index)
+            self._prepare(card)
+            plan = card.write_bytes(0, image)
+            if plan is not None:
+                outcome.bytes_written = plan.bytes_written
+                outcome.apdus = plan.apdu_count
+                outcome.blocked = plan.blocked
+
+            if self.verify:
+                outcome.mismatched = card.verify_touched().mismatch_ranges()
+
+            if outcome.blocked:
+                outcome.status = STATUS_BLOCKED
+            elif outcome.mismatched:
+                outcome.status = STATUS_MISMATCH
+            else:
+                outcome.status = STATUS_OK
+        except Exception as e:
+            outcome.status = STATUS_FAILED
+            outcome.error = str(e)
+        finally:
+            outcome.elapsed = time.perf_counter() - t0
+        return outcome
+
+    def run(self, records, next_card, outcome_log: OutcomeLog = None, skip=None, limit: int = None) -> dict:
+        summary = {"total": 0, STATUS_OK: 0, STATUS_INVALID: 0, STATUS_FAILED: 0, STATUS_BLOCKED: 0,
+                   STATUS_MISMATCH: 0, "elapsed": 0.0}
+        t0 = time.perf_counter()
+        for index, record in enumerate(records):
+            if limit is not None and summary["total"] >= limit:
+                break
+            if skip and index in skip:
+                continue
+
+            try:
+                image = self.render(record, index)
+            except Exception as e:
+                outcome = Outcome(index, self._key(record))
+                outcome.status = STATUS_INVALID
+                outcome.error = str(e)
+            else:
+                reader, card = next_card(index, record)
+                if card is None:
+                    break
+                outcome = self.personalize(card, record, index, image)
+                outcome.reader = reader
+
+            if outcome_log is not None:
+                outcome_log.write(outcome)
+
+            summary["total"] += 1
+            summary[outcome.status] += 1
+            state = "OK" if outcome.ok else f"{outcome.status.upper()} {outcome.error}".rstrip()
+            self.log(f"#{index} {outcome.key or ''} {outcome.bytes_written} bytes "
+                     f"{outcome.elapsed * 1000:.1f} ms {state}")
+        summary["elapsed"] = time.perf_counter() - t0
+        return summary
+
+
+class CardFeeder:
+
+    def __init__(self, controller, reader, card_type: str = None, timeout: float = None, on_wait=None):
+        self.controller = controller
+        self.reader = reader
+        self.name = str(reader)
+        self.card_type = card_type
+        self.timeout = timeout
+        self.on_wait = on_wait
+        self.present = False
+        self.used = False
+        self._events = queue.Queue()
+        self.monitor = CardMonitor(self._on_event)
+
+    def _on_event(self, event):
+        if event.reader == self.name and event.kind in (CARD_INSERTED, CARD_REMOVED):
+            self._events.put(event.kind)
+
+    def start(self):
+        if hasattr(self.reader, "add_observer"):
+            self.monitor.start(pcsc=False, emulated=[self.reader])
+        else:
+            self.monitor.start()
+        return self
+
+    def stop(self):
+        self.monitor.stop()
+
+    def _next_event(self):
+        try:
+            kind = self._events.get(timeout=self.timeout)
+        except queue.Empty:
+            raise Exception(tr("msg.no_card_inserted"))
+        self.present = kind == CARD_INSERTED
+
+    def __call__(self, index: int, record: dict):
+        while not self._events.empty():
+            self._next_event()
+        if self.used:
+            if self.on_wait is not None:
+                self.on_wait(index)
+            while self.present:
+                self._next_event()
+        while not self.present:
+            self._next_event()
+        self.used = True
+
+        controller = self.controller
+        controller.card_type = self.card_type
+        controller.auto_connect(self.name)
+        card_type = controller.detect_card_type()
+        card = driver_for(card_type)(conn=controller.transport, logger=controller.card_logger())
+        controller.card = card
+        return self.name, card
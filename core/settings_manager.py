@@ -1,16 +1,20 @@
 import os
 import json
-from core.language_manager import LanguageManager
+from core.language_manager import get_language_manager
 
 
-def _get_settings_path():
+def get_config_dir():
     if os.name == "nt":
         base = os.path.join(os.getenv("APPDATA"), "sle_suite")
     else:
         base = os.path.join(os.path.expanduser("~"), ".config", "sle_suite")
 
     os.makedirs(base, exist_ok=True)
-    return os.path.join(base, "settings.json")
+    return base
+
+
+def _get_settings_path():
+    return os.path.join(get_config_dir(), "settings.json")
 
 
 class SettingsManager:
@@ -22,9 +26,20 @@ class SettingsManager:
             "language": "es",
             "accent_color": "#00aaff",
             "reader_preference": None,
+            "log_level": "debug",
+            "write_delays": {},
+            "write_floors": {},
+            "card_cache": True,
+            "log_max_lines": 5000,
+            "log_spill": False,
+            "emulated_readers": [],
+            "apdu_trace": False,
+            "auto_read": True,
+            "exclusive_connections": True,
+            "verify_writes": False,
         }
         self.load()
-        self.lang_manager = LanguageManager(self.data["language"])
+        self.lang_manager = get_language_manager()
         self.available_langs = self.lang_manager.available_langs
         self.validate()
 
@@ -48,6 +63,22 @@ class SettingsManager:
         if self.data.get("theme") not in ("dark", "light"):
             self.data["theme"] = "dark"
 
+        if self.data.get("log_level") not in ("debug", "info", "error"):
+            self.data["log_level"] = "debug"
+
+        if not isinstance(self.data.get("log_max_lines"), int) or self.data["log_max_lines"] < 100:
+            self.data["log_max_lines"] = 5000
+
+        emulated = self.data.get("emulated_readers")
+        if not isinstance(emulated, list):
+            emulated = []
+        self.data["emulated_readers"] = [t for t in emulated if t in ("SLE4442", "SLE4428", "SLE5528")]
+
+        if not isinstance(self.data.get("write_delays"), dict):
+            self.data["write_delays"] = {}
+        if not isinstance(self.data.get("write_floors"), dict):
+            self.data["write_floors"] = {}
+
         if self.data.get("language") not in self.available_langs:
             self.data["language"] = "es"
 
@@ -58,6 +89,20 @@ class SettingsManager:
         self.data[key] = value
         self.save()
 
+    def get_write_delay(self, reader):
+        return self.data["write_delays"].get(str(reader))
+
+    def set_write_delay(self, reader, delay: float):
+        self.data["write_delays"][str(reader)] = round(delay, 4)
+        self.save()
+
+    def get_write_floor(self, reader):
+        return self.data["write_floors"].get(str(reader))
+
+    def set_write_floor(self, reader, delay: float):
+        self.data["write_floors"][str(reader)] = round(delay, 4)
+        self.save()
+
     def apply_theme(self, window):
         from gui.themes import THEMES
         theme = self.get("theme", "dark")
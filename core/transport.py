@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Transport:
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._lock = threading.RLock()
+        self._executor = None
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def transmit(self, apdu):
+        with self._lock:
+            return self.conn.transmit(apdu)
+
+    def transaction(self):
+        begin = getattr(self.conn, "transaction", None)
+        return begin() if begin is not None else nullcontext()
+
+    def transmit_many(self, apdus, stop_on_error: bool = True):
+        results = []
+        with self._lock, self.transaction():
+            transmit = self.conn.transmit
+            for apdu in apdus:
+                data, sw1, sw2 = transmit(apdu)
+                results.append((data, sw1, sw2))
+                if stop_on_error and sw1 != 0x90:
+                    break
+        return results
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transport")
+        return self._executor
+
+    async def call_async(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), lambda: fn(*args))
+
+    async def transmit_async(self, apdu):
+        return await self.call_async(self.transmit, apdu)
+
+    async def transmit_many_async(self, apdus, stop_on_error: bool = True):
+        return await self.call_async(self.transmit_many, list(apdus), stop_on_error)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def as_transport(conn):
+    if conn is None or isinstance(conn, Transport):
+        return conn
+    return Transport(conn)
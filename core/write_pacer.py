@@ -0,0 +1,98 @@
+import time
+
+from core.language_manager import tr
+
+
+class WritePacer:
+
+    BUSY_SW = ((0x6F, 0x00), (0x64, 0x00))
+
+    def __init__(self, delay: float = 0.2, min_delay: float = 0.005, max_delay: float = 0.5,
+                 first_retry: float = 0.005, backoff: float = 2.0, retries: int = 8,
+                 adaptive: bool = True, write_time: float = 0.0):
+        self.delay = delay
+        self.adaptive = adaptive
+        self.min_delay = min_delay
+        self.write_time = write_time
+        self.max_delay = max_delay
+        self.first_retry = first_retry
+        self.backoff = backoff
+        self.retries = retries
+        self._last_write = None
+
+    @property
+    def floor(self) -> float:
+        return max(self.min_delay, self.write_time)
+
+    def is_busy(self, sw1: int, sw2: int) -> bool:
+        return (sw1, sw2) in self.BUSY_SW
+
+    def wait(self):
+        if self._last_write is None or self.delay <= 0:
+            return
+        remaining = self.delay - (time.perf_counter() - self._last_write)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def run(self, send):
+        self.wait()
+
+        waited = 0.0
+        pause = self.first_retry
+        for attempt in range(self.retries + 1):
+            data, sw1, sw2 = send()
+            if not self.is_busy(sw1, sw2):
+                break
+            if attempt == self.retries:
+                break
+            time.sleep(pause)
+            waited += pause
+            pause = min(pause * self.backoff, self.max_delay)
+
+        if self.adaptive:
+            if waited:
+                self.delay = min(self.max_delay, self.delay + waited)
+            else:
+                self.delay = max(self.floor, self.delay / 2)
+
+        self._last_write = time.perf_counter()
+        return data, sw1, sw2
+
+
+def _write_and_wait(card, addr: int, chunk: bytes, timeout: float) -> float:
+    data, sw1, sw2 = card.transport.transmit(card._build_write_apdu(addr, chunk))
+    if sw1 != 0x90:
+        raise Exception(f"{tr('log.sw_error')} SW={sw1:02X}{sw2:02X}")
+
+    probe = [0xFF, 0xB0, (addr >> 8) & 0xFF, addr & 0xFF, len(chunk)]
+    t0 = time.perf_counter()
+    pause = 0.001
+    while True:
+        data, sw1, sw2 = card.transport.transmit(probe)
+        elapsed = time.perf_counter() - t0
+        if sw1 == 0x90 and bytes(data) == chunk:
+            return elapsed
+        if elapsed > timeout:
+            raise Exception(f"{tr('log.sw_error')} SW={sw1:02X}{sw2:02X}")
+        time.sleep(pause)
+        pause = min(pause * 2, 0.05)
+
+
+def calibrate(card, addr: int, length: int = 16, samples: int = 5, timeout: float = 1.0) -> float:
+    if not card.memory_loaded:
+        card.read_all()
+
+    original = bytes(card.main_memory[addr:addr + length])
+    inverted = bytes(b ^ 0xFF for b in original)
+
+    worst = 0.0
+    current = original
+    try:
+        for i in range(samples):
+            current = inverted if i % 2 == 0 else original
+            worst = max(worst, _write_and_wait(card, addr, current, timeout))
+    finally:
+        if current != original:
+            _write_and_wait(card, addr, original, timeout)
+
+    return worst
@@ -8,6 +8,7 @@ class ACS:
     WRITE_BINARY = 0xD0
     WRITE_PROTECTION = 0x30
     SELECT_CARD = 0xA4
+    READ_PROTECTION_BITS = 0xB2
 
 
 class SLE3W:
@@ -31,6 +32,11 @@ class HID:
     CHANGE_PSC = 0x21
 
 
+class CARD_CODE:
+    SLE4418_4428 = 0x05
+    SLE4432_4442 = 0x06
+
+
 class FIXED:
     ERROR_COUNTER = 1021
     PSC1 = 1022
@@ -67,6 +73,27 @@ def build_protect_byte(addr: int):
     return [0xFF, ACS.WRITE_PROTECTION, 0x00, addr & 0xFF, 0x01, 0xFF]
 
 
+def build_select_card(card_code: int):
+    return [0xFF, ACS.SELECT_CARD, 0x00, 0x00, 0x01, card_code & 0xFF]
+
+
+def build_read_long(addr: int, length: int):
+    return [0xFF, ACS.READ_BINARY, (addr >> 8) & 0xFF, addr & 0xFF, length & 0xFF]
+
+
+def build_read_protection_bits(addr: int, length: int):
+    n_bytes = 1 + (length - 1) // 8
+    return [0xFF, ACS.READ_PROTECTION_BITS, (addr >> 8) & 0xFF, addr & 0xFF, n_bytes]
+
+
+def decode_protection_bits(raw, length: int):
+    bits = bytearray(length)
+    for i in range(length):
+        bit_val = (raw[i >> 3] >> (i & 7)) & 1
+        bits[i] = 1 if bit_val == 0 else 0
+    return bits
+
+
                                                                
                           
                                                                
@@ -89,7 +116,7 @@ def build_3w_command(cmd: int, addr: int, data: int = 0):
         0x00,           
     ]
 
-    base[9] = cmd & 0xFF
+    base[9] = (cmd & 0xFF) | (((addr >> 8) & 0x03) << 6)
     base[10] = addr & 0xFF
     base[11] = data & 0xFF
     return base
@@ -1,75 +1,299 @@
 from core.language_manager import tr
+from core.card_log import DEBUG, INFO, ERROR, LogRecord, as_card_logger, lazy_text
+from core.transport import as_transport
+from drivers.write_planner import WritePlan, VerifyReport, plan_writes
+from drivers.acr_commands import build_read_long
+from model.ranges import RangeSet, coalesce, diff_ranges
+from model.memory_image import MemoryImage
+
+
+_READ_CHUNK_CACHE: dict = {}
+
+
+def clear_read_chunk_cache():
+    _READ_CHUNK_CACHE.clear()
+
+
+def _hex(arr) -> str:
+    return " ".join(f"{b:02X}" for b in arr)
+
+
+def _fmt_send(desc, apdu) -> str:
+    return f"<< {tr('log.apdu_send')} ({lazy_text(desc)}): {_hex(apdu)}"
+
+
+def _fmt_recv(data) -> str:
+    if data:
+        return f">> {tr('log.apdu_recv')} DATA: {_hex(data)}"
+    return f">> {tr('log.sw_ok')}"
 
 
 class BaseCard:
 
+    WRITE_CHUNK = 16
+    READ_CHUNK_CANDIDATES = (255, 240, 128, 64, 32, 16)
+    DEFAULT_READ_CHUNK = 128
+    PIPELINE_DEPTH = 4
+    VERIFY_GAP = 8
+    PSC_SPAN = None
+    VOLATILE_FROM = None
+
     def __init__(self, conn, logger=None):
         self.conn = conn
-        self.log = logger if logger else (lambda msg: None)
+        self.transport = as_transport(conn)
+        self.logger = as_card_logger(logger)
+        self.log = self.logger
         self.size = 0
-        self.main_memory: list[int] = []
+        self.main_memory = MemoryImage()
         self.protection_memory: list[int] = []
         self.security_memory: list[int] = []
-        self.is_authenticated: bool = False
+        self._authenticated = False
+        self._auth_epoch = 0
+        self.memory_loaded: bool = False
+        self.mirror_confirmed: bool = False
+        self.pacer = None
+        self.read_chunk = None
+        self.on_change = None
+        self.dirty_ranges = RangeSet()
+        self.touched = RangeSet()
+        self.verify_writes = False
+        self.checkpoint = None
 
     def _log(self, text: str):
-        self.log(text)
+        self.logger.log(INFO, text)
+
+    def _checkpoint(self, done: int, total: int):
+        if self.checkpoint is not None:
+            self.checkpoint(done, total)
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self)
+
+    @property
+    def protection_bits(self):
+        return self.main_memory.protection
+
+    def _reset_epoch(self) -> int:
+        return getattr(self.transport, "reset_epoch", 0)
+
+    @property
+    def is_authenticated(self) -> bool:
+        if self._authenticated and self._reset_epoch() != self._auth_epoch:
+            self._authenticated = False
+            self._log(tr("error.card_reset"))
+        return self._authenticated
+
+    @is_authenticated.setter
+    def is_authenticated(self, value: bool):
+        self._authenticated = bool(value)
+        self._auth_epoch = self._reset_epoch()
+
+    def take_dirty_ranges(self) -> list[tuple[int, int]]:
+        return self.dirty_ranges.pop_all()
+
+    def _store_memory(self, addr: int, data):
+        n = self.main_memory.load(addr, data)
+        self.dirty_ranges.add(addr, addr + n)
+
+    def _wrote(self, addr: int, data):
+        n = self.main_memory.load(addr, data)
+        self.dirty_ranges.add(addr, addr + n)
+        self.touched.add(addr, addr + n)
+
+    def verify_touched(self) -> VerifyReport:
+        report = VerifyReport()
+        touched = self.touched.pop_all()
+        report.ranges = touched
+        report.checked = sum(e - s for s, e in touched)
+
+        i = 0
+        for start, end in coalesce(touched, self.VERIFY_GAP):
+            block = bytearray()
+            for _, data in self.iter_read(start, end - start):
+                block.extend(data)
+                report.apdus += 1
+            report.read += len(block)
+
+            while i < len(touched) and touched[i][0] < end:
+                s, e = touched[i]
+                i += 1
+                expected = bytes(self.main_memory[s:e])
+                actual = bytes(block[s - start:e - start])
+                if actual == expected:
+                    continue
+                for ms, me in diff_ranges(actual, expected):
+                    report.mismatches.append((s + ms, expected[ms:me], actual[ms:me]))
+                self._store_memory(s, actual)
+
+        if report.mismatches:
+            self.logger.log(ERROR, report.describe())
+            self._changed()
+        else:
+            self._log(report.describe())
+        return report
+
+    def _finish_write(self, plan: WritePlan):
+        if not self.verify_writes:
+            return plan
+        plan.verified = self.verify_touched()
+        if not plan.verified.ok:
+            raise Exception(plan.verified.describe())
+        return plan
+
+    def select_card(self):
+        pass
+
+    def _public_memory(self) -> bytes:
+        memory = bytearray(self.main_memory)
+        if self.PSC_SPAN is not None:
+            start, end = self.PSC_SPAN
+            memory[start:end] = bytes(len(memory[start:end]))
+        return bytes(memory)
+
+    def _public_security(self) -> bytes:
+        sm = self.security_memory
+        return bytes(sm[:1]) + bytes(max(0, len(sm) - 1))
+
+    def snapshot(self) -> dict:
+        return {
+            "memory": self._public_memory(),
+            "protection": bytes(self.protection_memory),
+            "security": self._public_security(),
+        }
+
+    def restore(self, snap: dict):
+        self._store_memory(0, snap["memory"])
+        self.protection_memory = list(snap.get("protection", b""))
+        self.security_memory = list(snap.get("security", b""))
+        self.memory_loaded = True
+        self.mirror_confirmed = False
 
     def _hex(self, arr) -> str:
-        return " ".join(f"{b:02X}" for b in arr)
+        return _hex(arr)
 
-    def tx(self, apdu, desc: str = ""):
-        self._log(f"<< {tr('log.apdu_send')} ({desc}): {self._hex(apdu)}")
-
-        data, sw1, sw2 = self.conn.transmit(apdu)
+    def _check_response(self, desc, data, sw1, sw2):
+        logger = self.logger
 
         if sw1 != 0x90:
             msg_tr = tr("log.sw_error")
-            msg = f"{msg_tr} SW={sw1:02X}{sw2:02X} en {desc}"
-            self._log(f">> {msg}")
+            msg = f"{msg_tr} SW={sw1:02X}{sw2:02X} en {lazy_text(desc)}"
+            logger.log(ERROR, f">> {msg}")
             raise Exception(msg)
 
-        if data:
-            self._log(f">> {tr('log.apdu_recv')} DATA: {self._hex(data)}")
-        else:
-            self._log(f">> {tr('log.sw_ok')}")
+        if logger.enabled(DEBUG):
+            logger.emit(LogRecord(DEBUG, _fmt_recv, data))
 
         return data
 
-    def read_range(self, addr: int, length: int) -> list[int]:
-        result: list[int] = []
-        pos = addr
-        remaining = length
+    def tx(self, apdu, desc="", pacer=None):
+        logger = self.logger
+        if logger.enabled(DEBUG):
+            logger.emit(LogRecord(DEBUG, _fmt_send, desc, apdu))
+
+        if pacer is not None:
+            data, sw1, sw2 = pacer.run(lambda: self.transport.transmit(apdu))
+        else:
+            data, sw1, sw2 = self.transport.transmit(apdu)
+        return self._check_response(desc, data, sw1, sw2)
 
-        while remaining > 0:
-            chunk = min(remaining, 240)
-            apdu = [0xFF, 0xB0, 0x00, pos & 0xFF, chunk]
-            data = self.tx(apdu, f"{tr('log.read_chunk')}[{pos}:{chunk}]")
+    def tx_many(self, apdus, descs=None) -> list:
+        if descs is None:
+            descs = [""] * len(apdus)
 
-            if not data:
-                raise Exception(tr("msg.error_card_read"))
+        results = self.transport.transmit_many(apdus)
 
-            result.extend(data)
+        logger = self.logger
+        out = []
+        for apdu, desc, (data, sw1, sw2) in zip(apdus, descs, results):
+            if logger.enabled(DEBUG):
+                logger.emit(LogRecord(DEBUG, _fmt_send, desc, apdu))
+            out.append(self._check_response(desc, data, sw1, sw2))
+        return out
 
-            real = len(data)
-            if real < chunk:
-                remaining -= real
-                pos += real
+    def _reader_key(self):
+        try:
+            reader = self.transport.getReader()
+        except Exception:
+            reader = id(self.conn)
+        return (str(reader), self.__class__.__name__)
+
+    def _probe_read_chunk(self):
+        for candidate in self.READ_CHUNK_CANDIDATES:
+            if candidate > self.size:
                 continue
+            try:
+                data, sw1, sw2 = self.transport.transmit(build_read_long(0, candidate))
+            except Exception:
+                continue
+            if sw1 == 0x90 and len(data) == candidate:
+                return candidate
+        return None
+
+    def max_read_chunk(self) -> int:
+        if self.read_chunk is not None:
+            return self.read_chunk
+
+        key = self._reader_key()
+        chunk = _READ_CHUNK_CACHE.get(key)
+        if chunk is None:
+            chunk = self._probe_read_chunk() or min(self.DEFAULT_READ_CHUNK, self.size or self.DEFAULT_READ_CHUNK)
+            _READ_CHUNK_CACHE[key] = chunk
+            self._log(f"{tr('log.max_read_chunk')}: {chunk}")
+
+        self.read_chunk = chunk
+        return chunk
+
+    def read_range(self, addr: int, length: int) -> bytearray:
+        result = bytearray()
+        for _, data in self.iter_read(addr, length):
+            result.extend(data)
+        return result
+
+    def iter_read(self, addr: int, length: int):
+        pos = addr
+        end = addr + length
+        max_chunk = self.max_read_chunk()
 
-            remaining -= chunk
-            pos += chunk
+        while pos < end:
+            self._checkpoint(pos - addr, length)
+            apdus = []
+            descs = []
+            p = pos
+            while p < end and len(apdus) < self.PIPELINE_DEPTH:
+                chunk = min(end - p, max_chunk)
+                apdus.append(build_read_long(p, chunk))
+                descs.append(lambda p=p, chunk=chunk: f"{tr('log.read_chunk')}[{p}:{chunk}]")
+                p += chunk
 
-        return result
+            for apdu, data in zip(apdus, self.tx_many(apdus, descs)):
+                if not data:
+                    raise Exception(tr("msg.error_card_read"))
 
-    def read_all(self) -> list[int]:
+                yield pos, bytes(data)
+                pos += len(data)
+
+                if len(data) < apdu[4]:
+                    break
+
+        self._checkpoint(length, length)
+
+    def iter_all(self):
         if self.size <= 0:
             raise Exception(tr("msg.error_card_read"))
 
         self._log(f"{tr('log.read_full')} ({self.size} bytes)…")
-        data = self.read_range(0, self.size)
-        self.main_memory = data
-        return data
+        self.memory_loaded = False
+        for addr, data in self.iter_read(0, self.size):
+            self._store_memory(addr, data)
+            yield addr, data
+        self.memory_loaded = True
+        self.mirror_confirmed = True
+
+    def read_all(self) -> MemoryImage:
+        for _ in self.iter_all():
+            pass
+        return self.main_memory
 
     def read_security_memory(self) -> list[int]:
         apdu = [0xFF, 0xB1, 0x00, 0x00, 4]
@@ -92,7 +316,7 @@ class BaseCard:
 
         apdu = [0xFF, 0x20, 0x00, 0x00, 3] + list(psc)
         self._log(f"<< AUTH: {self._hex(apdu)}")
-        data, sw1, sw2 = self.conn.transmit(apdu)
+        data, sw1, sw2 = self.transport.transmit(apdu)
         self._log(f">> SW={sw1:02X}{sw2:02X}")
 
         if sw1 != 0x90:
@@ -134,6 +358,37 @@ class BaseCard:
         self.security_memory = [counter] + list(new_psc)
         self._log(tr("log.change_psc_ok"))
 
+    def protected_map(self):
+        return self.protection_bits if len(self.protection_bits) else None
+
+    def plan_write(self, addr: int, data) -> WritePlan:
+        current = self.main_memory if self.memory_loaded and self.mirror_confirmed else None
+        return plan_writes(
+            addr,
+            data,
+            current,
+            max_chunk=self.WRITE_CHUNK,
+            protected=self.protected_map(),
+            limit=self.size or None,
+        )
+
+    def _build_write_apdu(self, addr: int, chunk) -> list[int]:
+        return [0xFF, 0xD0, 0x00, addr & 0xFF, len(chunk)] + list(chunk)
+
+    def execute_plan(self, plan: WritePlan):
+        written = 0
+        for pos, chunk in plan.chunks:
+            self._checkpoint(written, plan.bytes_written)
+            apdu = self._build_write_apdu(pos, chunk)
+            self.tx(apdu, lambda a=pos, n=len(chunk): f"{tr('log.write_chunk')}[{a}:{n}]", pacer=self.pacer)
+
+            self._wrote(pos, chunk)
+            written += len(chunk)
+
+        self._checkpoint(written, plan.bytes_written)
+        if plan.chunks:
+            self._changed()
+
     def write_bytes(self, addr: int, data):
         if not self.is_authenticated:
             raise Exception(tr("msg.write_blocked"))
@@ -141,26 +396,12 @@ class BaseCard:
         if addr < 0:
             raise ValueError(tr("log.write_addr"))
         if not data:
-            return
-
-        max_chunk = 16
-        total_len = len(data)
-        offset = 0
-
-        while offset < total_len:
-            chunk = list(data[offset:offset + max_chunk])
-            chunk_len = len(chunk)
-            current_addr = addr + offset
-
-            apdu = [0xFF, 0xD0, 0x00, current_addr & 0xFF, chunk_len] + chunk
-            self.tx(apdu, f"{tr('log.write_chunk')}[{current_addr}:{chunk_len}]")
-
-            for i, b in enumerate(chunk):
-                idx = current_addr + i
-                if 0 <= idx < len(self.main_memory):
-                    self.main_memory[idx] = b
+            return None
 
-            offset += chunk_len
+        plan = self.plan_write(addr, data)
+        self._log(plan.describe())
+        self.execute_plan(plan)
+        return self._finish_write(plan)
 
     def read_protection_memory(self) -> list[int]:
         apdu = [0xFF, 0xB2, 0x00, 0x00, 4]
@@ -0,0 +1,22 @@
+from drivers.sle4442 import SLE4442
+from drivers.sle4428 import SLE4428
+from drivers.sle5528 import SLE5528
+from core.atr_detector import CardType
+
+
+DRIVER_CLASSES = {
+    CardType.SLE4442: SLE4442,
+    CardType.SLE4428: SLE4428,
+    CardType.SLE5528: SLE5528,
+    CardType.SLE5542: SLE4442,
+}
+
+
+def driver_for(card_type: str):
+    return DRIVER_CLASSES.get(card_type)
+
+
+def resolve_card_type(ctype: str) -> str:
+    if ctype in DRIVER_CLASSES:
+        return ctype
+    return CardType.SLE4442
@@ -1,35 +1,43 @@
 from core.language_manager import tr
 from drivers.base_card import BaseCard
-import time
+from core.write_pacer import WritePacer
+from drivers.acr_commands import FIXED
+from model.memory_image import MemoryImage
 
 
 class SLE4428(BaseCard):
+    PSC_SPAN = (FIXED.PSC1, FIXED.PSC2 + 1)
+    VOLATILE_FROM = FIXED.ERROR_COUNTER
+    WRITE_TIME = 0.01
+
     def __init__(self, conn, logger=None):
         super().__init__(conn=conn, logger=logger)
         self.size = 1024
         self.is_authenticated = False
-        self.main_memory = []
+        self.main_memory = MemoryImage.blank(self.size)
         self._pm_cache = None
-        self.protection_bits = []
+        self.pacer = WritePacer(write_time=self.WRITE_TIME)
 
-    def read_all(self):
+    def select_card(self):
         try:
-            self.conn.transmit([0xFF, 0xA4, 0x00, 0x00, 0x01, 0x05])
+            self.transport.transmit([0xFF, 0xA4, 0x00, 0x00, 0x01, 0x05])
         except Exception:
             pass
 
-        data = []
-        pos = 0
-        while pos < self.size:
-            chunk = min(128, self.size - pos)
-            p1 = (pos >> 8) & 0xFF
-            p2 = pos & 0xFF
-            apdu = [0xFF, 0xB0, p1, p2, chunk]
-            data.extend(self.tx(apdu, f"{tr('log.read')}[{pos}:{chunk}]"))
-            pos += chunk
+    def iter_all(self):
+        self.select_card()
+        yield from super().iter_all()
+
+    def snapshot(self):
+        snap = super().snapshot()
+        snap["protection"] = self._pm_cache or b""
+        return snap
 
-        self.main_memory = data
-        return data
+    def restore(self, snap):
+        super().restore(snap)
+        self._pm_cache = bytes(snap["protection"]) if snap.get("protection") else None
+        if self._pm_cache:
+            self._decode_protection_bits()
 
     def read_protection_memory(self):
         if self._pm_cache is not None:
@@ -48,13 +56,7 @@ class SLE4428(BaseCard):
         return self.read_protection_memory()
 
     def _decode_protection_bits(self):
-        bits = []
-        for b in self._pm_cache:
-            for bit in range(0, 8):
-                bit_val = (b >> bit) & 1
-                is_protected = (bit_val == 0)
-                bits.append(is_protected)
-        self.protection_bits = bits
+        self.protection_bits.load_pm(self._pm_cache)
 
     def authenticate(self, psc):
         if len(psc) != 2:
@@ -63,39 +65,34 @@ class SLE4428(BaseCard):
         self.tx(apdu, tr("log.auth_4428"))
         self.is_authenticated = True
 
-    def write_bytes(self, addr, data):
+    def change_psc(self, new_psc):
+        if len(new_psc) != 2:
+            raise ValueError(tr("error.psc_must_be_2bytes"))
         if not self.is_authenticated:
             raise Exception(tr("msg.psc_required"))
+        apdu = [0xFF, 0xD2, 0x00, 0x00, 2] + list(new_psc)
+        self.tx(apdu, tr("log.change_psc_ok"))
+        if self.memory_loaded:
+            self.main_memory[FIXED.PSC1:FIXED.PSC2 + 1] = bytes(new_psc)
+        self._log(tr("log.change_psc_ok"))
 
-        if not self.main_memory:
-            raise Exception(tr("msg.read_card_first"))
-
-        new = list(data)
-        old = self.main_memory
+    def _build_write_apdu(self, addr, chunk):
+        return [0xFF, 0xD0, (addr >> 8) & 0xFF, addr & 0xFF, len(chunk)] + list(chunk)
 
-        pos = addr
-        off = 0
-        size = len(new)
-
-        while off < size:
-            chunk = new[off: off + 16]
-            old_chunk = old[pos: pos + len(chunk)]
-
-            if chunk != old_chunk:
-                apdu = [0xFF, 0xD0, (pos >> 8) & 0xFF, pos & 0xFF, len(chunk)] + chunk
-                self.tx(apdu, f"{tr('log.write')}[{pos}]")
-                for i, b in enumerate(chunk):
-                    idx = pos + i
-                    if 0 <= idx < len(self.main_memory):
-                        self.main_memory[idx] = b
-                time.sleep(0.2)
+    def write_bytes(self, addr, data):
+        if not self.is_authenticated:
+            raise Exception(tr("msg.psc_required"))
 
-            pos += len(chunk)
-            off += len(chunk)
+        if not self.memory_loaded:
+            raise Exception(tr("msg.read_card_first"))
 
+        plan = self.plan_write(addr, data)
+        self._log(plan.describe())
+        self.execute_plan(plan)
+        return self._finish_write(plan)
 
     def _protect_range(self, start, length):
-        if not self.main_memory or len(self.main_memory) < start + length:
+        if not self.memory_loaded or len(self.main_memory) < start + length:
             raise Exception(tr("msg.read_card_first"))
 
         end = start + length
@@ -133,7 +130,7 @@ class SLE4428(BaseCard):
                 continue
 
             length = end - start + 1
-            chunk = self.main_memory[start:start+length]
+            chunk = list(self.main_memory[start:start+length])
 
             p1 = (start >> 8) & 0xFF
             p2 = start & 0xFF
@@ -145,4 +142,5 @@ class SLE4428(BaseCard):
                 start = end = i
 
         self._pm_cache = None
-        self.read_protection_memory()
\ No newline at end of file
+        self.read_protection_memory()
+        self._changed()
@@ -1,6 +1,7 @@
 from .base_card import BaseCard
 from model.page16 import Page16
 from model.chipdata import ChipData
+from model.memory_image import MemoryImage
 from core.language_manager import tr                      
 
 
@@ -10,11 +11,12 @@ class SLE4442(BaseCard):
         super().__init__(conn=conn, logger=logger)
         self.size = 256
         self.page_size = 16
-        self.main_memory = [0xFF] * self.size
+        self.main_memory = MemoryImage.blank(self.size, protected=32)
         self.protection_memory = [0xFF] * 4
-        self.protection_bits: dict[int, bool] = {i: False for i in range(32)}
         self.security_memory = [0, 0xFF, 0xFF, 0xFF]
-        self.pages: list[Page16] = []
+        self.pages: list[Page16] = [
+            Page16.view(self.main_memory, addr) for addr in range(0, self.size, self.page_size)
+        ]
         self.atr_header: list[ChipData] = []
         self.atr_data: list[ChipData] = []
         self.dir_data: list[ChipData] = []
@@ -23,53 +25,51 @@ class SLE4442(BaseCard):
     def error_counter(self) -> int:
         return self.security_memory[0] if self.security_memory else 0
 
-    def _build_pages_from_memory(self):
-        self.pages.clear()
-        for addr in range(0, self.size, self.page_size):
-            chunk = self.main_memory[addr:addr + self.page_size]
-            page = Page16(addr, chunk)
-            self.pages.append(page)
+    def page_at(self, addr: int) -> Page16:
+        return self.pages[addr // self.page_size]
+
+    def _refresh_pages(self, start: int, end: int):
+        if end <= start:
+            return
+        last = min(end, self.size) - 1
+        for idx in range(start // self.page_size, last // self.page_size + 1):
+            self.pages[idx].refresh(self.main_memory)
+
+    def _store_memory(self, addr: int, data):
+        super()._store_memory(addr, data)
+        self._refresh_pages(addr, addr + len(data))
 
     def set_display_mode(self, is_ascii: bool):
         for p in self.pages:
             p.is_ascii = is_ascii
 
-    def read_all(self):
+    def select_card(self):
         try:
             self._log(tr("log.select_file"))                                           
-            self.conn.transmit([0xFF, 0xA4, 0x00, 0x00, 0x01, 0x06])
+            self.transport.transmit([0xFF, 0xA4, 0x00, 0x00, 0x01, 0x06])
         except Exception:
             pass
 
-        raw = super().read_all()
-        self.main_memory = raw[:]                  
-        self._build_pages_from_memory()
-        return raw
+    def iter_all(self):
+        self.select_card()
+        yield from super().iter_all()
+
+    def restore(self, snap: dict):
+        super().restore(snap)
+        if len(self.protection_memory) == 4:
+            self._decode_protection_bits(self.protection_memory)
 
     def read_page(self, addr_from: int) -> Page16:
         if addr_from % self.page_size != 0:
             raise ValueError(tr("error.addr_not_mult_16"))
 
         data = self.read_range(addr_from, self.page_size)
-
-        for i, b in enumerate(data):
-            self.main_memory[addr_from + i] = b
-
-        for p in self.pages:
-            if p.addr_from == addr_from:
-                p.data = data[:]
-                p.dirty = False
-                return p
-
-        page = Page16(addr_from, data)
-        self.pages.append(page)
-        return page
+        self._store_memory(addr_from, data)
+        return self.page_at(addr_from)
 
     def read_bytes(self, addr: int, length: int) -> list[int]:
         data = self.read_range(addr, length)
-        for i, b in enumerate(data):
-            if addr + i < len(self.main_memory):
-                self.main_memory[addr + i] = b
+        self._store_memory(addr, data)
         return data
 
     def read_protection_memory(self) -> list[int]:
@@ -79,30 +79,13 @@ class SLE4442(BaseCard):
 
     
     def _decode_protection_bits(self, pm: list[int]):
-        
-        bits_dict: dict[int, bool] = {}
-        idx = 0
-        for byte in pm:
-            mask = 1
-            for _ in range(8):
-                free = (byte & mask) != 0   
-                bits_dict[idx] = not free   
-                mask <<= 1
-                idx += 1
-
-        self.protection_bits = bits_dict
+        self.protection_bits.load_pm(pm)
         self._log(tr("log.pm_decoded"))
         
     
     @property
     def protection_bits_list(self):
-        if isinstance(self.protection_bits, dict):
-            out = []
-            last = max(self.protection_bits.keys(), default=-1)
-            for i in range(last + 1):
-                out.append(bool(self.protection_bits.get(i, False)))
-            return out
-        return list(self.protection_bits)
+        return self.protection_bits.to_list()
 
     def protect_byte(self, addr: int):
         if not self.is_authenticated:
@@ -121,8 +104,9 @@ class SLE4442(BaseCard):
             new_val = old_val & ~(1 << bit_index)
             self.protection_memory[byte_index] = new_val
 
-        if isinstance(self.protection_bits, dict):
-            self.protection_bits[addr] = True
+        self.protection_bits[addr] = True
+
+        self._changed()
 
 
     def read_security_memory(self) -> list[int]:
@@ -139,14 +123,10 @@ class SLE4442(BaseCard):
 
         self.write_bytes(addr, [value])
 
-        if addr < len(self.main_memory):
-            self.main_memory[addr] = value
-
-        page_idx = addr // self.page_size
-        offset = addr % self.page_size
-        if 0 <= page_idx < len(self.pages):
-            self.pages[page_idx].data[offset] = value
-            self.pages[page_idx].dirty = False
+        if 0 <= addr < self.size:
+            page = self.page_at(addr)
+            page.data[addr % self.page_size] = value
+            page.dirty = False
 
     def write_page(self, page: Page16):
         addr = page.addr_from
@@ -156,12 +136,9 @@ class SLE4442(BaseCard):
             raise ValueError(tr("error.page_not_16bytes"))
 
         self._log(f"{tr('msg.page_write')} {tr('msg.in')} {addr}…")
-        self.write_bytes(addr, page.data)
-
-        for i, b in enumerate(page.data):
-            if addr + i < len(self.main_memory):
-                self.main_memory[addr + i] = b
+        self.write_bytes(addr, bytes(page.data))
 
+        page.attach()
         page.dirty = False
         self._log(f"{tr('msg.page_write')} {addr} {tr('msg.write_ok')}")
 
@@ -309,9 +286,8 @@ class SLE4442(BaseCard):
 
         for addr in sorted(set(indices)):
             if 0 <= addr < 32:
-                if isinstance(self.protection_bits, dict):
-                    if self.protection_bits.get(addr, False):
-                        continue
+                if self.protection_bits[addr]:
+                    continue
                 self.protect_byte(addr)
 
         try:
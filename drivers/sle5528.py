@@ -4,6 +4,7 @@
                                 
 
 from core.language_manager import tr
+from core.card_log import lazy_text
 from drivers.base_card import BaseCard
 from drivers.acr_commands import (
     build_3w_read9,
@@ -11,33 +12,41 @@ from drivers.acr_commands import (
     build_3w_write,
     build_3w_verify,
     build_3w_command,
+    build_select_card,
+    build_read_long,
+    build_read_protection_bits,
+    decode_protection_bits,
+    CARD_CODE,
     FIXED,
+    SLE3W,
 )
+from drivers.write_planner import plan_writes
+from model.memory_image import MemoryImage
 
 
 class SLE5528(BaseCard):
 
+    PSC_SPAN = (FIXED.PSC1, FIXED.PSC2 + 1)
+    VOLATILE_FROM = FIXED.ERROR_COUNTER
 
     def __init__(self, conn, logger=None):
         super().__init__(conn=conn, logger=logger)
         self.size = 1024
-        self.main_memory = bytearray(self.size)
-        self.prot = bytearray(self.size)                                
+        self.main_memory = MemoryImage(self.size)
         self.psc = [0xFF, 0xFF]
         self.is_authenticated = False
+        self.batch_supported = None
 
                                                                
                            
                                                                
-    def _exec_3w(self, label: str, apdu: list, expect_len: int = 0):
-        self._log(f"<< {label}: {self._hex(apdu)}")
-
+    def _exec_3w(self, label, apdu: list, expect_len: int = 0):
         data = self.tx(apdu, label)
         if expect_len > 0:
                                            
             if len(data) < expect_len + 2:
                 error_msg = tr("error.invalid_length")
-                raise Exception(f"{label} {error_msg}")
+                raise Exception(f"{lazy_text(label)} {error_msg}")
             return data[2 : 2 + expect_len]
         return data
 
@@ -46,60 +55,162 @@ class SLE5528(BaseCard):
                                                                
     def _read9(self, addr: int):
         apdu = build_3w_read9(addr)
-        resp = self._exec_3w(f"{tr('log.read_byte_9')}[{addr}]", apdu, expect_len=2)
+        resp = self._exec_3w(lambda: f"{tr('log.read_byte_9')}[{addr}]", apdu, expect_len=2)
         return resp
 
     def _read8(self, addr: int):
         apdu = build_3w_read8(addr)
-        resp = self._exec_3w(f"{tr('log.read_byte_8')}[{addr}]", apdu, expect_len=1)
+        resp = self._exec_3w(lambda: f"{tr('log.read_byte_8')}[{addr}]", apdu, expect_len=1)
         return resp[0]
 
                                                                
                
                                                                
-    def read_all(self):
-        self._log(f"{tr('log.read_full')} ({self.size} bytes)…")
+    def _iter_batched(self, addr: int, length: int, with_prot: bool = True):
+        apdus = []
+        descs = []
+        chunks = []
+        pos = addr
+        end = addr + length
+        max_chunk = self.max_read_chunk()
+
+        while pos < end:
+            chunk = min(max_chunk, end - pos)
+            chunks.append((pos, chunk))
+            apdus.append(build_read_long(pos, chunk))
+            descs.append(lambda pos=pos, chunk=chunk: f"{tr('log.read')}[{pos}:{chunk}]")
+            if with_prot:
+                apdus.append(build_read_protection_bits(pos, chunk))
+                descs.append(lambda pos=pos, chunk=chunk: f"{tr('log.read_prot_page')}[{pos}:{chunk}]")
+            pos += chunk
+
+        per_chunk = 2 if with_prot else 1
+        depth = self.PIPELINE_DEPTH * per_chunk
+        responses = iter(())
+
+        for n, (pos, chunk) in enumerate(chunks):
+            if n % self.PIPELINE_DEPTH == 0:
+                self._checkpoint(pos - addr, length)
+                start = n * per_chunk
+                responses = iter(self.tx_many(apdus[start:start + depth], descs[start:start + depth]))
+
+            resp = next(responses)
+            if len(resp) < chunk:
+                raise Exception(f"{tr('log.read')}[{pos}:{chunk}] {tr('error.invalid_length')}")
+
+            prot = b""
+            if with_prot:
+                raw = next(responses)
+                if len(raw) < 1 + (chunk - 1) // 8:
+                    raise Exception(f"{tr('log.read_prot_page')}[{pos}:{chunk}] {tr('error.invalid_length')}")
+                prot = decode_protection_bits(raw, chunk)
 
-        for i in range(self.size):
-            resp = self._read9(i)
-            data_byte = resp[0]
-            prot_bit = resp[1]
+            yield pos, bytes(resp[:chunk]), prot
 
-            self.main_memory[i] = data_byte
-            self.prot[i] = 1 if prot_bit == 0 else 0
+    def _iter_per_byte(self, addr: int, length: int, block: int = 16):
+        for start in range(0, length, block):
+            self._checkpoint(start, length)
+            n = min(block, length - start)
+            data = bytearray(n)
+            prot = bytearray(n)
+            for i in range(n):
+                resp = self._read9(addr + start + i)
+                data[i] = resp[0]
+                prot[i] = 1 if resp[1] == 0 else 0
+            yield addr + start, bytes(data), prot
+
+    def _iter_with_prot(self, addr: int, length: int, with_prot: bool = True):
+        if self.batch_supported is not False:
+            try:
+                if self.batch_supported is None:
+                    try:
+                        self.transport.transmit(build_select_card(CARD_CODE.SLE4418_4428))
+                    except Exception:
+                        pass
+                chunks = self._iter_batched(addr, length, with_prot)
+                first = next(chunks, None)
+                self.batch_supported = True
+            except Exception as e:
+                if self.batch_supported:
+                    raise
+                self.batch_supported = False
+                self._log(f"{tr('log.batch_read_unsupported')}: {e}")
+            else:
+                if first is not None:
+                    yield first
+                    yield from chunks
+                return
+
+        yield from self._iter_per_byte(addr, length)
+
+                                                               
+               
+                                                               
+    def iter_all(self):
+        self._log(f"{tr('log.read_full')} ({self.size} bytes)…")
 
-        return bytes(self.main_memory)
+        self.memory_loaded = False
+        for addr, data, prot in self._iter_with_prot(0, self.size):
+            self._store_memory(addr, data)
+            self.protection_bits.load_flags(prot, addr)
+            yield addr, data
+        self.memory_loaded = True
+        self.mirror_confirmed = True
 
                                                                
                 
                                                                
-    def read_range(self, addr: int, length: int):
-        out = bytearray(length)
-        for i in range(length):
-            resp = self._read9(addr + i)
-            out[i] = resp[0]
-        return bytes(out)
+    def iter_read(self, addr: int, length: int):
+        for pos, data, _ in self._iter_with_prot(addr, length, with_prot=False):
+            yield pos, data
 
                                                                
            
                                                                
+    def snapshot(self):
+        snap = super().snapshot()
+        snap["protection"] = self.protection_bits.to_flags()
+        return snap
+
+    def restore(self, snap):
+        self._store_memory(0, snap["memory"])
+        if snap.get("protection"):
+            self.protection_bits.load_flags(snap["protection"])
+        self.security_memory = list(snap.get("security", b""))
+        self.memory_loaded = True
+        self.mirror_confirmed = False
+
+    def plan_write(self, addr: int, data, protect=False):
+        current = self.main_memory if (self.memory_loaded and self.mirror_confirmed and not protect) else None
+        return plan_writes(
+            addr,
+            data,
+            current,
+            max_chunk=1,
+            protected=self.protection_bits,
+            limit=min(self.size, FIXED.ERROR_COUNTER),
+        )
+
     def write_bytes(self, addr: int, data: bytes, protect=False):
         if not self.is_authenticated:
             raise Exception(tr("msg.psc_required"))
 
-        for i, b in enumerate(data):
-            a = addr + i
-            if a >= self.size:
-                break
-            if a == FIXED.ERROR_COUNTER:
-                break
+        plan = self.plan_write(addr, data, protect=protect)
+        self._log(plan.describe())
 
+        for n, (a, chunk) in enumerate(plan.chunks):
+            self._checkpoint(n, plan.apdu_count)
+            b = chunk[0]
             apdu = build_3w_write(a, b, protect=protect)
-            self._exec_3w(f"{tr('log.write_byte')}[{a}]", apdu)
+            self._exec_3w(lambda a=a: f"{tr('log.write_byte')}[{a}]", apdu)
 
-            self.main_memory[a] = b
+            self._wrote(a, chunk)
             if protect:
-                self.prot[a] = 1
+                self.protection_bits[a] = True
+
+        if plan.chunks:
+            self._changed()
+        return self._finish_write(plan)
 
                                                                
                   
@@ -112,10 +223,26 @@ class SLE5528(BaseCard):
         apdu = build_3w_command(0x30, addr, val)
         self._exec_3w(f"{tr('log.protect_byte')}[{addr}]", apdu)
 
-        self.prot[addr] = 1
+        self.protection_bits[addr] = True
+        self._changed()
+
+    def set_protection_bits(self, indices):
+        if not self.is_authenticated:
+            raise Exception(tr("msg.psc_required"))
+
+        if not indices:
+            return
+
+        if not self.memory_loaded:
+            raise Exception(tr("msg.read_card_first"))
+
+        limit = min(self.size, FIXED.ERROR_COUNTER)
+        for addr in sorted(set(indices)):
+            if 0 <= addr < limit and not self.protection_bits[addr]:
+                self.protect_byte(addr)
 
     def read_protection_map(self):
-        return list(self.prot)
+        return self.protection_bits.to_list()
 
                                                                
                                 
@@ -124,8 +251,25 @@ class SLE5528(BaseCard):
         if len(psc) != 2:
             raise ValueError(tr("error.psc_must_be_2bytes"))
 
-        apdu = build_3w_verify(psc)
-        self._exec_3w(tr("log.verify_psc"), apdu)
+        self.is_authenticated = False
+        counter = self._read8(FIXED.ERROR_COUNTER)
+        self._log(f"{tr('log.security_before_auth')}: {counter}")
+        if counter == 0:
+            raise Exception(tr("error.card_is_locked"))
+
+        apdu = build_3w_command(SLE3W.WRITE_ERROR_COUNTER, FIXED.ERROR_COUNTER, counter & (counter - 1))
+        self._exec_3w(tr("log.security_counter"), apdu)
+        self._exec_3w(tr("log.verify_psc"), build_3w_verify(psc))
+        self._exec_3w(tr("log.verify_psc"), build_3w_command(SLE3W.VERIFY_PSC, FIXED.PSC2, psc[1]))
+
+        apdu = build_3w_write(FIXED.ERROR_COUNTER, 0xFF, protect=False)
+        self._exec_3w(tr("log.security_counter"), apdu)
+        counter = self._read8(FIXED.ERROR_COUNTER)
+        if counter != 0xFF:
+            self._log(f"{tr('log.auth_fail')}. {tr('log.security_counter')}={counter}")
+            raise Exception(
+                f"{tr('log.auth_fail')}. {tr('error.auth_fail_attempts')} {counter} {tr('log.security_counter')}."
+            )
 
         self.psc = list(psc)
         self.is_authenticated = True
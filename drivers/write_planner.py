@@ -0,0 +1,117 @@
+from core.language_manager import tr
+
+
+class WritePlan:
+
+    def __init__(self, chunks, blocked, unchanged: int, requested: int):
+        self.chunks: list[tuple[int, bytes]] = chunks
+        self.blocked: list[int] = blocked
+        self.unchanged = unchanged
+        self.requested = requested
+        self.verified = None
+
+    @property
+    def apdu_count(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(len(c) for _, c in self.chunks)
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+    def describe(self) -> str:
+        text = (
+            f"{tr('log.write_plan')}: {self.apdu_count} APDU, "
+            f"{self.bytes_written}/{self.requested} bytes, "
+            f"{self.unchanged} {tr('log.write_plan_unchanged')}"
+        )
+        if self.blocked:
+            text += f", {len(self.blocked)} {tr('log.write_plan_protected')}"
+        return text
+
+    def __str__(self):
+        return self.describe()
+
+
+class VerifyReport:
+
+    def __init__(self):
+        self.ranges: list[tuple[int, int]] = []
+        self.mismatches: list[tuple[int, bytes, bytes]] = []
+        self.checked = 0
+        self.read = 0
+        self.apdus = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+    @property
+    def mismatched(self) -> int:
+        return sum(len(expected) for _, expected, _ in self.mismatches)
+
+    def mismatch_ranges(self) -> list[tuple[int, int]]:
+        return [(addr, addr + len(expected)) for addr, expected, _ in self.mismatches]
+
+    def __bool__(self):
+        return self.ok
+
+    def describe(self) -> str:
+        text = f"{tr('log.verify_report')}: {self.checked} bytes, {self.apdus} APDU"
+        if self.mismatches:
+            spans = ", ".join(f"{a:04X}-{b - 1:04X}" for a, b in self.mismatch_ranges()[:8])
+            text += f", {tr('error.verify_mismatch')}: {self.mismatched} ({spans})"
+        return text
+
+    def __str__(self):
+        return self.describe()
+
+
+def plan_writes(addr: int, data, current=None, max_chunk: int = 16, max_gap: int = 0,
+                protected=None, limit: int = None) -> WritePlan:
+    data = bytes(data)
+    requested = len(data)
+    blocked: list[int] = []
+    if limit is not None and addr + len(data) > limit:
+        keep = max(0, limit - addr)
+        blocked.extend(range(addr + keep, addr + len(data)))
+        data = data[:keep]
+
+    n_current = len(current) if current is not None else 0
+    n_protected = len(protected) if protected is not None else 0
+
+    runs: list[list[int]] = []
+    unchanged = 0
+
+    for i, value in enumerate(data):
+        a = addr + i
+
+        if current is not None and a < n_current and current[a] == value:
+            unchanged += 1
+            continue
+
+        if a < n_protected and protected[a]:
+            blocked.append(a)
+            continue
+
+        if runs:
+            last = runs[-1]
+            gap = a - last[1]
+            if gap == 0 or (gap <= max_gap and not any(
+                    p < n_protected and protected[p] for p in range(last[1], a))):
+                last[1] = a + 1
+                continue
+        runs.append([a, a + 1])
+
+    chunks: list[tuple[int, bytes]] = []
+    for start, end in runs:
+        pos = start
+        while pos < end:
+            n = min(max_chunk, end - pos)
+            chunks.append((pos, data[pos - addr: pos - addr + n]))
+            pos += n
+
+    blocked.sort()
+    return WritePlan(chunks, blocked, unchanged, requested)
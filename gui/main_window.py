@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (
     QComboBox, QPushButton, QLabel, QTabWidget, QStatusBar,
     QFileDialog, QMessageBox, QSplitter, QLineEdit
 )
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, QThread
 from gui.dialogs.about_dialog import AboutDialog
 from PySide6 import QtCore
 
@@ -15,9 +15,11 @@ from gui.tabs.tab_protection import TabProtection
 from gui.themes import THEMES
 
 from core.pcsc_manager import PCSCManager
+from core.emulator import emulated_readers
+from core.card_monitor import CardMonitor, READER_REMOVED, CARD_INSERTED, CARD_REMOVED
 from controllers.app_controller import AppController
 from core.settings_manager import SettingsManager
-from core.language_manager import LanguageManager, init_language
+from core.language_manager import init_language
 from core.card_worker import CardWorker
 from PySide6.QtCore import QTimer
 from PySide6.QtGui import QIcon
@@ -25,16 +27,14 @@ from core.resource import resource_path
 
 
 class MainWindow(QMainWindow):
-    requestReadCard = Signal()
-
     def __init__(self):
         super().__init__()
 
         self.settings = SettingsManager()
         lang_code = self.settings.get("language", "es")
-        self.lang = LanguageManager(lang_code)
-        init_language(lang_code)
-        self.pcsc = PCSCManager()
+        self.lang = init_language(lang_code)
+        self.pcsc = PCSCManager(emulated=emulated_readers(self.settings.get("emulated_readers", [])),
+                                exclusive=self.settings.get("exclusive_connections", True))
 
         self.controller = AppController(
             self.pcsc,
@@ -60,59 +60,118 @@ class MainWindow(QMainWindow):
         self.thread.start()
 
         self.worker.log.connect(self.log)
-        self.worker.error.connect(self.on_worker_error)
-        self.worker.finished.connect(self.on_worker_finished)
-
-        self.requestReadCard.connect(self.worker.read_card)
-
-        self.controller.log = lambda msg: self.worker.log.emit(msg)
+        self.worker.failed.connect(self.on_worker_failed)
+        self.worker.cardStarted.connect(self.on_card_started)
+        self.worker.chunkRead.connect(self.on_chunk_read)
+        self.worker.cardLoaded.connect(self.on_card_loaded)
+        self.worker.protectionLoaded.connect(self.tab_protection.show_bits)
+        self.worker.protectionWritten.connect(self.tab_protection.on_written)
+        self.worker.authenticated.connect(self.on_authenticated)
+        self.worker.pscChanged.connect(lambda psc: self.log(self.tr("msg.psc_changed_ok")))
+        self.worker.pscRecovered.connect(self.tab_card.on_psc_recovered)
+        self.worker.written.connect(self.tab_card.on_written)
+        self.worker.rangeRead.connect(self.tab_card.on_range_read)
+        self.worker.disconnected.connect(self.on_disconnected)
+        self.worker.readersChanged.connect(self._fill_reader_combo)
+        self.worker.progress.connect(self.on_job_progress)
+        self.worker.cancelled.connect(self.on_job_cancelled)
+        self.worker.connected.connect(self.on_reader_connected)
+        self.worker.cardEvent.connect(self.on_card_event)
+
+        self.controller.log = self.log_panel.log
         icon_path = resource_path("assets/logo.ico")
         self.setWindowIcon(QIcon(icon_path))
         self.refresh_readers()
+        self.monitor = CardMonitor(self.worker.cardEvent.emit)
+        try:
+            self.monitor.start(emulated=self.pcsc.emulated)
+        except Exception as exc:
+            self.log(f"{self.tr('msg.monitor_unavailable')}: {exc}")
         QTimer.singleShot(200, lambda: AboutDialog(self, self.tr).exec())
 
     def closeEvent(self, event):
+        self.monitor.stop()
         try:
             self.thread.quit()
             self.thread.wait()
         except Exception:
             pass
+        self.controller.connections.close_all()
+        self.log_panel.flush()
         super().closeEvent(event)
 
-    def on_worker_error(self, msg):
-        self.log(f"ERROR: {msg}")
-        self.lbl_status.setText(self.tr("msg.error"))
-        self.btn_read.setEnabled(True)
+    def submit(self, command: str, *args, priority: int = None):
+        return self.worker.submit(command, *args, priority=priority)
+
+    def on_job_progress(self, job_id: int, command: str, done: int, total: int):
+        if total:
+            self.statusBar().showMessage(f"{self.tr('msg.job_progress')} {command}: {done}/{total}", 2000)
+
+    def on_job_cancelled(self, job_id: int, command: str):
+        self.on_worker_failed(command, self.tr("msg.job_cancelled"))
+
+    def on_worker_failed(self, command: str, msg: str):
+        if command in ("read_card", "card_inserted"):
+            self.log(f"ERROR: {msg}")
+            self.lbl_status.setText(self.tr("msg.error"))
+            self.btn_read.setEnabled(True)
+        elif command == "read_protection":
+            self.tab_protection.show_error(msg)
+            self.log(f"{self.tr('msg.protection_tab_error')}: {msg}")
+        elif command == "set_protection_bits":
+            self.tab_protection.on_write_failed(msg)
+        elif command in ("write_ranges", "write_bytes"):
+            self.tab_card.on_write_failed(msg)
+        elif command == "authenticate":
+            self.log(f"{self.tr('msg.error_auth')} {msg}")
+            self.update_psc_state()
+        elif command == "change_psc":
+            self.log(f"{self.tr('msg.error_change_psc')} {msg}")
+        elif command == "connect":
+            self.log(f"{self.tr('msg.error_connect')} {msg}")
+            self.btn_connect.setEnabled(True)
+        elif command == "recover_psc":
+            self.log(f"{self.tr('msg.error_psc')} {msg}")
+        else:
+            self.log(f"ERROR: {msg}")
 
-    def on_worker_finished(self, result):
+    def on_authenticated(self, ok: bool):
+        self.log(self.tr("msg.psc_ok"))
+        self.update_psc_state()
+
+    def on_card_started(self, card_type: str, size: int):
+        self.tab_card.begin_stream(size)
+        self.tab_protection.card = self.controller.card
+        try:
+            self.tab_chipinfo.begin(self.controller.card)
+        except Exception as exc:
+            self.log(f"{self.tr('msg.chipinfo_tab_error')}: {exc}")
+
+    def on_chunk_read(self, addr: int, data):
+        self.tab_card.load_range(addr, data)
+        self.tab_chipinfo.feed(addr, data)
+
+    def on_card_loaded(self, result):
         self.btn_read.setEnabled(True)
 
-        if isinstance(result, list):
-            try:
-                self.tab_card.load_data(result)
-                self.tab_card.update_state(connected=True, card_loaded=True)
-                idx = self.tabs.indexOf(self.tab_card)
-                if idx != -1:
-                    self.tabs.setCurrentIndex(idx)
-                self.log(self.tr("msg.card_ok"))
-            except Exception as exc:
-                self.log(f"{self.tr('msg.error')} {exc}")
-
-            try:
-                self.tab_protection.load_from_card(self.controller.card)
-            except Exception as exc:
-                self.log(f"{self.tr('msg.protection_tab_error')}: {exc}")
-
-            try:
-                self.tab_chipinfo.load_chip(self.controller.card)
-                self.update_psc_state()
-                self.lbl_psc_state.setVisible(True)
-            except Exception as exc:
-                self.log(f"{self.tr('msg.chipinfo_tab_error')}: {exc}")
-
-        elif result is True:
+        try:
+            self.tab_card.load_data(result)
+            self.tab_card.update_state(connected=True, card_loaded=True)
+            idx = self.tabs.indexOf(self.tab_card)
+            if idx != -1:
+                self.tabs.setCurrentIndex(idx)
+            self.log(self.tr("msg.card_ok"))
+        except Exception as exc:
+            self.log(f"{self.tr('msg.error')} {exc}")
+
+        self.tab_protection.card = self.controller.card
+
+        try:
+            self.tab_chipinfo.load_chip(self.controller.card)
             self.update_psc_state()
-            self.log(self.tr("msg.operation_done"))
+            self.lbl_psc_state.setVisible(True)
+        except Exception as exc:
+            self.log(f"{self.tr('msg.chipinfo_tab_error')}: {exc}")
 
     def tr(self, key: str) -> str:
         return self.lang.tr(key)
@@ -201,7 +260,8 @@ class MainWindow(QMainWindow):
         top_layout.addWidget(self.tabs)
 
         is_dark = (self.current_theme == "dark")
-        self.log_panel = LogPanel(is_dark=is_dark)
+        self.log_panel = LogPanel(is_dark=is_dark, max_lines=self.settings.get("log_max_lines", 5000),
+                                  spill=self.settings.get("log_spill", False))
 
         splitter.addWidget(top_container)
         splitter.addWidget(self.log_panel)
@@ -230,59 +290,92 @@ class MainWindow(QMainWindow):
 
         self.log(self.tr("msg.reading_card"))
         self.btn_read.setEnabled(False)
-        self.requestReadCard.emit()
+        self.submit("read_card")
 
     def log(self, msg: str):
         self.log_panel.log(msg)
 
     def refresh_readers(self):
-        self.reader_combo.clear()
         readers = self.controller.list_readers()
+        self._fill_reader_combo(readers)
+        if readers:
+            self.log(self.tr("msg.readers_found"))
+        else:
+            self.log(self.tr("msg.no_readers"))
+
+    def _fill_reader_combo(self, readers):
+        current = self.reader_combo.currentText()
+        self.reader_combo.clear()
 
         if readers:
             for r in readers:
                 self.reader_combo.addItem(str(r))
+            idx = self.reader_combo.findText(current)
+            if idx >= 0:
+                self.reader_combo.setCurrentIndex(idx)
 
             self.btn_connect.setEnabled(True)
-            self.log(self.tr("msg.readers_found"))
         else:
             self.btn_connect.setEnabled(False)
             self.btn_read.setVisible(False)
             self.lbl_status.setText(self.tr("status.reader_none"))
             self.lbl_status.setStyleSheet("color: red; font-weight: bold;")
-            self.log(self.tr("msg.no_readers"))
+
+    def on_card_event(self, event):
+        if event.kind in (CARD_REMOVED, READER_REMOVED) and self.controller.is_connected_to(event.reader):
+            self.worker.cancel_all()
+            self.btn_disconnect.setEnabled(False)
+            self.btn_read.setEnabled(False)
+        self.submit("card_event", event)
+
+        if event.kind == CARD_REMOVED:
+            self.log(f"{self.tr('msg.card_removed')}: {event.reader}")
+        elif event.kind == CARD_INSERTED:
+            self.log(f"{self.tr('msg.card_inserted')}: {event.reader}")
+            if not self.settings.get("auto_read", True):
+                return
+            if self.controller.connected_reader is None or self.controller.is_connected_to(event.reader):
+                self.btn_read.setEnabled(False)
+                self.submit("card_inserted", event.reader)
+
+    def on_reader_connected(self, reader: str, atr):
+        self.btn_connect.setEnabled(True)
+        idx = self.reader_combo.findText(reader)
+        if idx >= 0:
+            self.reader_combo.setCurrentIndex(idx)
+        self._show_connected(reader, atr)
+
+    def _show_connected(self, reader, atr):
+        atr_str = " ".join(f"{x:02X}" for x in atr)
+        self.log(f"{self.tr('msg.connected_to')} {reader} | ATR: {atr_str}")
+
+        self.tab_card.update_state(connected=True, card_loaded=False)
+
+        self.lbl_status.setText(f"{self.tr('status.reader')}: {reader}")
+        self.lbl_status.setStyleSheet("color: green; font-weight: bold;")
+
+        self.btn_connect.setVisible(False)
+        self.btn_refresh.setVisible(False)
+        self.btn_disconnect.setVisible(True)
+        self.btn_read.setVisible(True)
 
     def connect_reader(self):
         idx = self.reader_combo.currentIndex()
         if idx < 0:
             return
 
-        readers = self.controller.list_readers()
-        if not readers or idx >= len(readers):
-            return
-
-        reader = readers[idx]
-
-        try:
-            atr = self.controller.connect_reader(reader)
-            atr_str = " ".join(f"{x:02X}" for x in atr)
-            self.log(f"{self.tr('msg.connected_to')} {reader} | ATR: {atr_str}")
-
-            self.tab_card.update_state(connected=True, card_loaded=False)
-
-            self.lbl_status.setText(f"{self.tr('status.reader')}: {reader}")
-            self.lbl_status.setStyleSheet("color: green; font-weight: bold;")
-
-            self.btn_connect.setVisible(False)
-            self.btn_refresh.setVisible(False)
-            self.btn_disconnect.setVisible(True)
-            self.btn_read.setVisible(True)
-
-        except Exception as exc:
-            self.log(f"{self.tr('msg.error_connect')} {exc}")
+        self.btn_connect.setEnabled(False)
+        self.submit("connect", self.reader_combo.currentText())
 
     def disconnect_reader(self):
-        self.controller.disconnect_reader()
+        self.worker.cancel_all()
+        self.btn_disconnect.setEnabled(False)
+        self.btn_read.setEnabled(False)
+        self.submit("disconnect")
+
+    def on_disconnected(self):
+        self.btn_disconnect.setEnabled(True)
+        self.btn_read.setEnabled(True)
         self.log(self.tr("msg.reader_disconnected_ok"))
         self.tab_card.update_state(connected=False, card_loaded=False)
 
@@ -310,7 +403,9 @@ class MainWindow(QMainWindow):
             with open(path, "rb") as fh:
                 data = fh.read()
 
-            self.tab_card.load_data(list(data))
+            card = self.controller.card
+            baseline = card.main_memory if card is not None and card.memory_loaded else None
+            self.tab_card.load_data(self.controller.import_memory(data), baseline)
             self.log(f"{self.tr('msg.import_ok')}: {path}")
         except Exception as exc:
             self.log(f"{self.tr('msg.error')} {exc}")
@@ -347,7 +442,6 @@ class MainWindow(QMainWindow):
 
     def update_language(self, lang: str):
         self.settings.set("language", lang)
-        self.lang.load(lang)
         init_language(lang)
 
         QMessageBox.information(
@@ -8,6 +8,9 @@ from PySide6.QtCore import Qt
 from core.language_manager import tr
 
 
+HEADER_LEN = 30
+
+
 class TabChipInfo(QWidget):
     def __init__(self, main):
         super().__init__()
@@ -44,6 +47,10 @@ class TabChipInfo(QWidget):
 
         self.layout.addStretch()
 
+        self._card = None
+        self._header = bytearray()
+        self._header_done = False
+
     def _make_group(self, title):
         box = QGroupBox(title)
         layout = QGridLayout()
@@ -179,10 +186,9 @@ class TabChipInfo(QWidget):
         return header, manuf, app
 
     def _build_sm_4428(self, card):
-        try:
-            sm = card.read_security_memory()
-        except Exception as e:
-            self._add_line(self.grp_sm, 0, tr("msg.error"), str(e))
+        sm = list(getattr(card, "security_memory", None) or [])
+        if not sm:
+            self._add_line(self.grp_sm, 0, tr("msg.error"), tr("desc.unknown"))
             return
 
         sm_hex = " ".join(f"{b:02X}" for b in sm)
@@ -215,10 +221,9 @@ class TabChipInfo(QWidget):
             self.grp_sm.grid.addWidget(psc_lbl, 2, 1)
 
     def _build_sm_4442(self, card):
-        try:
-            sm = card.read_security_memory()
-        except Exception as e:
-            self._add_line(self.grp_sm, 0, tr("msg.error"), str(e))
+        sm = list(getattr(card, "security_memory", None) or [])
+        if not sm:
+            self._add_line(self.grp_sm, 0, tr("msg.error"), tr("desc.unknown"))
             return
 
         sm_hex = " ".join(f"{b:02X}" for b in sm)
@@ -249,27 +254,52 @@ class TabChipInfo(QWidget):
             self.grp_sm.grid.addWidget(QLabel(tr("label.psc_mem")), 2, 0)
             self.grp_sm.grid.addWidget(psc_lbl, 2, 1)
 
-    def load_chip(self, card):
+    def begin(self, card):
         self.clear()
+        self._card = card
+        self._header = bytearray()
+        self._header_done = False
 
         atr = self.main.controller.conn.getATR()
         atr_hex = " ".join(f"{b:02X}" for b in atr)
         self._add_line(self.grp_atr, 0, tr("label.atr"), atr_hex)
 
-        ctype = getattr(self.main.controller, "card_type", None)
-        if not ctype:
-            ctype = self.main.controller.detect_card_type()
+        ctype = getattr(self.main.controller, "card_type", None) or "-"
         self._add_line(self.grp_chip, 0, tr("label.detected_type"), ctype)
 
-        mem = getattr(card, "main_memory", None)
-        if not mem:
-            try:
-                mem = card.read_all()
-            except Exception as e:
-                self.main.log(f"{tr('log.memory_read_fail')}: {e}")
-                mem = []
+    def feed(self, addr: int, data):
+        if self._header_done or addr != len(self._header):
+            return
+        self._header.extend(data[:HEADER_LEN - len(self._header)])
+        if len(self._header) >= HEADER_LEN:
+            self._load_header(self._header)
+
+    def load_chip(self, card):
+        if card is not self._card:
+            self.begin(card)
+
+        if not self._header_done:
+            mem = getattr(card, "main_memory", None)
+            if not mem or not getattr(card, "memory_loaded", False):
+                self.main.log(tr("log.memory_read_fail"))
+                mem = b""
+            self._load_header(mem)
 
-        mem_bytes = list(mem) if mem else []
+        for group in (self.grp_sm,):
+            while group.grid.count():
+                item = group.grid.takeAt(0)
+                w = item.widget()
+                if w:
+                    w.deleteLater()
+
+        ctype = getattr(self.main.controller, "card_type", None)
+        if ctype in ("SLE4428", "SLE5528"):
+            self._build_sm_4428(card)
+        else:
+            self._build_sm_4442(card)
+
+    def _load_header(self, mem_bytes):
+        self._header_done = True
         header_items, manuf_items, dir_items = self._decode_common_layout(mem_bytes)
 
         r = 1
@@ -288,16 +318,4 @@ class TabChipInfo(QWidget):
         r = 0
         for it in dir_items:
             self._add_line(self.grp_dir, r, it.name + ":", it.value)
-            r += 1
-
-        for group in (self.grp_sm,):
-            while group.grid.count():
-                item = group.grid.takeAt(0)
-                w = item.widget()
-                if w:
-                    w.deleteLater()
-
-        if ctype in ("SLE4428", "SLE5528"):
-            self._build_sm_4428(card)
-        else:
-            self._build_sm_4442(card)
\ No newline at end of file
+            r += 1
\ No newline at end of file
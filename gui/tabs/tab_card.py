@@ -5,12 +5,13 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
-    QMessageBox
+    QMessageBox,
+    QMenu,
 )
 from PySide6.QtGui import QRegularExpressionValidator
-from PySide6.QtCore import QRegularExpression
+from PySide6.QtCore import Qt, QRegularExpression
 
-from gui.widgets.hex_editor import HexEditor
+from gui.widgets.hex_editor import HexEditor, BYTES_PER_ROW
 
 
 class TabCard(QWidget):
@@ -56,6 +57,8 @@ class TabCard(QWidget):
         layout.addLayout(top)
 
         self.hex = HexEditor()
+        self.hex.view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.hex.view.customContextMenuRequested.connect(self.show_hex_menu)
         layout.addWidget(self.hex)
 
         self.update_state(connected=False, card_loaded=False)
@@ -73,11 +76,37 @@ class TabCard(QWidget):
         self.btn_write.setVisible(visible)
         self.btn_pinobtain.setVisible(visible)
 
-    def load_data(self, data: bytes):
+    def load_data(self, data: bytes, baseline=None):
         self.adjust_psc_field()
-        self.hex.load_data(data)
+        self.hex.load_data(data, baseline)
         self.update_state(connected=True, card_loaded=True)
 
+    def begin_stream(self, size: int):
+        self.adjust_psc_field()
+        self.hex.begin_stream(size)
+
+    def load_range(self, addr: int, data):
+        self.hex.load_range(addr, data)
+
+    def show_hex_menu(self, pos):
+        if self.main.controller.card is None:
+            return
+        addr = self.hex.model.byte_index(self.hex.view.indexAt(pos))
+        if addr < 0:
+            return
+
+        row = addr - addr % BYTES_PER_ROW
+        size = len(self.hex.data)
+        menu = QMenu(self)
+        menu.addAction(f"{self.tr('menu.refresh_byte')} {addr:04X}").triggered.connect(
+            lambda: self.main.submit("read_range", addr, 1))
+        menu.addAction(f"{self.tr('menu.refresh_row')} {row:04X}").triggered.connect(
+            lambda: self.main.submit("read_range", row, min(BYTES_PER_ROW, size - row)))
+        menu.exec(self.hex.view.viewport().mapToGlobal(pos))
+
+    def on_range_read(self, addr: int, data):
+        self.hex.load_range(addr, data)
+
     def _validate_and_get_psc(self):
         card = self.main.controller.card
         if not card:
@@ -125,41 +154,44 @@ class TabCard(QWidget):
         if psc_bytes is None:
             return
 
-        try:
-            card = self.main.controller.card
-            card.authenticate(psc_bytes)
-            self.main.log(self.tr("msg.psc_ok"))
-            self.main.update_psc_state()
-
-        except Exception as e:
-            self.main.log(f"{self.tr('msg.error_auth')} {e}")
+        self.main.submit("authenticate", psc_bytes)
 
     def change_psc(self):
         new_psc = self._validate_and_get_psc()
         if new_psc is None:
             return
 
-        try:
-            card = self.main.controller.card
-            card.change_psc(new_psc)
-            self.main.log(self.tr("msg.psc_changed_ok"))
-
-        except Exception as e:
-            self.main.log(f"{self.tr('msg.error_change_psc')} {e}")
+        self.main.submit("change_psc", new_psc)
 
     def write_changes(self):
-        try:
-            card = self.main.controller.card
-            if not card:
-                self.main.log(self.tr("msg.no_card_loaded"))
-                return
+        card = self.main.controller.card
+        if not card:
+            self.main.log(self.tr("msg.no_card_loaded"))
+            return
 
-            data = self.hex.get_bytes()
-            card.write_bytes(0, data)
-            self.main.log(self.tr("msg.write_ok"))
+        self.hex.commit_all()
+        ranges = self.hex.changed_ranges()
+        if not ranges:
+            self.main.log(self.tr("msg.no_changes"))
+            return
 
-        except Exception as e:
-            self.main.log(f"{self.tr('msg.error_write')} {e}")
+        data = self.hex.get_bytes()
+        self.btn_write.setEnabled(False)
+        self.main.submit("write_ranges", [(start, bytes(data[start:end])) for start, end in ranges])
+
+    def on_written(self, ranges):
+        self.btn_write.setEnabled(True)
+        card = self.main.controller.card
+        if card is not None:
+            self.hex.mark_clean(card.main_memory)
+        self.main.log(self.tr("msg.write_ok"))
+
+    def on_write_failed(self, msg: str):
+        self.btn_write.setEnabled(True)
+        card = self.main.controller.card
+        if card is not None:
+            self.hex.mark_clean(card.main_memory)
+        self.main.log(f"{self.tr('msg.error_write')} {msg}")
 
     def adjust_psc_field(self):
         card = self.main.controller.card
@@ -178,13 +210,27 @@ class TabCard(QWidget):
             self.lbl_psc.setText(self.tr("label.psc_2bytes"))
 
     def obtain_psc(self):
-        try:
-            card = self.main.controller.card
-            if not card:
-                self.main.log(self.tr("msg.no_card_loaded"))
-                return
+        card = self.main.controller.card
+        if not card:
+            self.main.log(self.tr("msg.no_card_loaded"))
+            return
+
+        if card.is_authenticated:
+            self.main.log(self.tr("msg.pin_autenthicated"))
+            self.main.update_psc_state()
+            return
+
+        if card.__class__.__name__ in ("SLE4428", "SLE5528"):
+            psc = self.main.ask_psc_dialog()
+            if psc:
+                self.main.submit("authenticate", psc)
+            return
 
-            psc = self.main.controller.obtain_psc()
+        self.main.submit("recover_psc")
+
+    def on_psc_recovered(self, psc):
+        self.main.update_psc_state()
+        try:
             if psc is None:
                 self.main.log(self.tr("msg.psc_recovery_not_supported"))
                 return
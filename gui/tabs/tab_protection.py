@@ -64,38 +64,27 @@ class TabProtection(QWidget):
         self.clear_grid()
         self.original_bits = []
 
-        try:
-            ctype = self.main.controller.detect_card_type()
-        except Exception:
-            ctype = None
-
         if not hasattr(card, "read_protection_memory"):
-            self.lbl_info.setText(tr("msg.no_protection_memory"))
-            self.btn_apply.setEnabled(False)
+            self.show_bits(None)
             return
 
-        try:
-            card.read_protection_memory()
-        except Exception as exc:
-            self.lbl_info.setText(str(exc))
-            self.btn_apply.setEnabled(False)
-            return
+        self.btn_reload.setEnabled(False)
+        self.main.submit("read_protection")
 
-        bits = getattr(card, "protection_bits", None)
+    def show_error(self, msg: str):
+        self.btn_reload.setEnabled(True)
+        self.lbl_info.setText(msg)
+        self.btn_apply.setEnabled(False)
 
-        if isinstance(bits, dict):
-            if bits:
-                max_index = max(bits.keys()) + 1
-                tmp = [False] * max_index
-                for i, v in bits.items():
-                    if 0 <= i < max_index:
-                        tmp[i] = bool(v)
-                bits = tmp
-            else:
-                bits = []
+    def show_bits(self, bits):
+        self.btn_reload.setEnabled(True)
+        self.clear_grid()
+        self.original_bits = []
 
         if bits is None:
-            bits = []
+            self.lbl_info.setText(tr("msg.no_protection_memory"))
+            self.btn_apply.setEnabled(False)
+            return
 
         bits = list(bits)
         self.original_bits = list(bits)
@@ -106,8 +95,7 @@ class TabProtection(QWidget):
             self.btn_apply.setEnabled(False)
             return
 
-        
-        self.btn_apply.setEnabled(True)
+        self.btn_apply.setEnabled(hasattr(self.card, "set_protection_bits"))
 
         self.lbl_info.setText(f"{tr('label.protection_bits')}: {total}")
 
@@ -173,19 +161,14 @@ class TabProtection(QWidget):
         if not self.card or not hasattr(self.card, "set_protection_bits"):
             return
 
-        if hasattr(self.card, "ensure_authenticated"):
-            ok = self.card.ensure_authenticated(self.main)
-            if not ok:
+        psc = None
+        if not self.card.is_authenticated:
+            if self.card.__class__.__name__ in ("SLE4442", "SLE5542"):
                 QMessageBox.critical(self, tr("msg.error"), tr("msg.psc_required"))
                 return
-        else:
-            try:
-                sm = self.card.read_security_memory()
-                if sm[0] == 0:
-                    QMessageBox.critical(self, tr("msg.error"), tr("msg.psc_required"))
-                    return
-            except Exception as e:
-                QMessageBox.critical(self, tr("msg.error"), str(e))
+            psc = self.main.ask_psc_dialog()
+            if not psc:
+                QMessageBox.critical(self, tr("msg.error"), tr("msg.psc_required"))
                 return
 
         targets = []
@@ -209,10 +192,15 @@ class TabProtection(QWidget):
         if reply != QMessageBox.Yes:
             return
 
-        try:
-            self.card.set_protection_bits(targets)
-            self.main.log(tr("log.protection_written_ok"))
-            self.load_from_card(self.card)
-        except Exception as exc:
-            QMessageBox.critical(self, tr("msg.error"), str(exc))
-            self.main.log(f"{tr('log.error_writing_protection')}: {exc}")
+        self.btn_apply.setEnabled(False)
+        if psc is not None:
+            self.main.submit("authenticate", psc)
+        self.main.submit("set_protection_bits", targets)
+
+    def on_written(self, indices):
+        self.main.log(tr("log.protection_written_ok"))
+
+    def on_write_failed(self, msg: str):
+        self.btn_apply.setEnabled(True)
+        QMessageBox.critical(self, tr("msg.error"), msg)
+        self.main.log(f"{tr('log.error_writing_protection')}: {msg}")
@@ -1,222 +1,251 @@
-from PySide6.QtWidgets import QWidget, QGridLayout, QLineEdit, QLabel, QScrollArea, QVBoxLayout, QFrame
-from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
+    QStyledItemDelegate,
+    QLineEdit,
+)
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRegularExpression
+from PySide6.QtGui import QColor, QFont, QFontDatabase, QRegularExpressionValidator
+
+from model.memory_image import MemoryImage
+from model.ranges import RangeSet, diff_ranges
+
+
+BYTES_PER_ROW = 16
+ASCII_COL = BYTES_PER_ROW
+
+
+def _ascii(chunk) -> str:
+    return "".join(chr(b) if 32 <= b < 127 else "." for b in chunk)
+
+
+def _parse_hex(text: str) -> int:
+    raw = text.strip()
+    if raw == "":
+        return 0xFF
+    try:
+        return int(raw, 16) & 0xFF
+    except ValueError:
+        return 0xFF
+
+
+class HexTableModel(QAbstractTableModel):
+
+    def __init__(self, editor):
+        super().__init__()
+        self.editor = editor
+        self.data_bytes = MemoryImage()
+        self.original = b""
+        self.dirty = RangeSet()
+
+    def load(self, data, baseline=None):
+        self.beginResetModel()
+        self.data_bytes = data.copy() if isinstance(data, MemoryImage) else MemoryImage(data)
+        if baseline is None:
+            self.original = data
+            self.dirty = RangeSet()
+        else:
+            self.original = baseline
+            self.dirty = diff_ranges(self.data_bytes, baseline)
+        self.endResetModel()
+        return self.data_bytes
+
+    def load_range(self, addr: int, data):
+        n = self.data_bytes.load(addr, data)
+        if isinstance(self.original, MemoryImage):
+            self.original.load(addr, data)
+        self._emit_range(addr, addr + n)
+
+    def mark_clean(self, baseline=None):
+        ranges = self.dirty.pop_all()
+        if baseline is not None:
+            self.original = baseline
+        for start, end in ranges:
+            if baseline is not None:
+                for s, e in diff_ranges(self.data_bytes[start:end], baseline[start:end]):
+                    self.dirty.add(start + s, start + e)
+            self._emit_range(start, end)
+
+    def _emit_range(self, start: int, end: int):
+        end = min(end, len(self.data_bytes))
+        if end <= start:
+            return
+        first = start // BYTES_PER_ROW
+        last = (end - 1) // BYTES_PER_ROW
+        left = 0 if first != last else start % BYTES_PER_ROW
+        self.dataChanged.emit(self.index(first, left), self.index(last, ASCII_COL))
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return (len(self.data_bytes) + BYTES_PER_ROW - 1) // BYTES_PER_ROW
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return BYTES_PER_ROW + 1
+
+    def byte_index(self, index: QModelIndex) -> int:
+        if not index.isValid() or index.column() >= BYTES_PER_ROW:
+            return -1
+        i = index.row() * BYTES_PER_ROW + index.column()
+        return i if i < len(self.data_bytes) else -1
+
+    def is_changed(self, i: int) -> bool:
+        return i >= len(self.original) or self.data_bytes[i] != self.original[i]
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if index.column() == ASCII_COL:
+            if role == Qt.DisplayRole:
+                start = index.row() * BYTES_PER_ROW
+                return _ascii(self.data_bytes[start:start + BYTES_PER_ROW])
+            if role == Qt.TextAlignmentRole:
+                return int(Qt.AlignLeft | Qt.AlignVCenter)
+            return None
+
+        i = self.byte_index(index)
+        if i < 0:
+            return None
+
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return f"{self.data_bytes[i]:02X}"
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter)
+        if role == Qt.BackgroundRole and self.is_changed(i):
+            return QColor(self.editor.changed_bg_color)
+        if role == Qt.ForegroundRole and self.is_changed(i):
+            return QColor("black")
+        if role == Qt.FontRole and self.is_changed(i):
+            font = QFont(self.editor.font_fixed)
+            font.setBold(True)
+            return font
+        return None
+
+    def setData(self, index: QModelIndex, value, role=Qt.EditRole):
+        if role != Qt.EditRole:
+            return False
+        i = self.byte_index(index)
+        if i < 0:
+            return False
+        self.set_byte(i, _parse_hex(str(value)))
+        return True
+
+    def set_byte(self, i: int, value: int):
+        if self.data_bytes[i] == value:
+            return
+        self.data_bytes[i] = value
+        self.dirty.add(i, i + 1)
+        row = i // BYTES_PER_ROW
+        col = i % BYTES_PER_ROW
+        cell = self.index(row, col)
+        self.dataChanged.emit(cell, cell)
+        ascii_cell = self.index(row, ASCII_COL)
+        self.dataChanged.emit(ascii_cell, ascii_cell)
+
+    def flags(self, index: QModelIndex):
+        if self.byte_index(index) < 0:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return "ASCII" if section == ASCII_COL else f"{section:02X}"
+        return f"{section * BYTES_PER_ROW:04X}"
+
+
+class _HexDelegate(QStyledItemDelegate):
+
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setMaxLength(2)
+        editor.setAlignment(Qt.AlignCenter)
+        editor.setValidator(QRegularExpressionValidator(QRegularExpression(r"[0-9A-Fa-f]{0,2}"), editor))
+        return editor
 
 
 class HexEditor(QWidget):
     def __init__(self):
         super().__init__()
 
-        self.data = bytearray()
-        self.cells = []
-        self.ascii_rows = []
-        self.offset_labels = []
-
         self.header_color = "#e8e8e8"
         self.changed_bg_color = "#c8ffda"
         self.cell_width = 42
-
-        self.scroll = QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        self.scroll.setAlignment(Qt.AlignLeft | Qt.AlignTop)
-
-        self.inner = QWidget()
-        self.grid = QGridLayout()
-        self.grid.setSpacing(2)
-        self.grid.setContentsMargins(6, 6, 6, 6)
-        self.grid.setAlignment(Qt.AlignLeft | Qt.AlignTop)
-        self.inner.setLayout(self.grid)
-
-        self.scroll.setWidget(self.inner)
+        self.font_fixed = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+
+        self.model = HexTableModel(self)
+
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setItemDelegate(_HexDelegate(self.view))
+        self.view.setFont(self.font_fixed)
+        self.view.setShowGrid(False)
+        self.view.setWordWrap(False)
+        self.view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.view.setEditTriggers(
+            QAbstractItemView.DoubleClicked
+            | QAbstractItemView.EditKeyPressed
+            | QAbstractItemView.AnyKeyPressed
+        )
+
+        hh = self.view.horizontalHeader()
+        hh.setSectionResizeMode(QHeaderView.Fixed)
+        hh.setDefaultSectionSize(self.cell_width)
+        hh.setStretchLastSection(True)
+        hh.setStyleSheet(f"QHeaderView::section {{ font-weight: bold; background:{self.header_color}; }}")
+
+        vh = self.view.verticalHeader()
+        vh.setSectionResizeMode(QHeaderView.Fixed)
+        vh.setDefaultSectionSize(vh.fontMetrics().height() + 8)
+        vh.setMinimumWidth(60)
+        vh.setDefaultAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        vh.setStyleSheet(f"QHeaderView::section {{ font-weight: bold; background:{self.header_color}; padding-right:6px; }}")
 
         wrapper = QVBoxLayout()
-        wrapper.addWidget(self.scroll)
+        wrapper.addWidget(self.view)
         wrapper.setContentsMargins(0, 0, 0, 0)
-        wrapper.setAlignment(Qt.AlignLeft | Qt.AlignTop)
         self.setLayout(wrapper)
 
+    @property
+    def data(self) -> MemoryImage:
+        return self.model.data_bytes
+
     def clear(self):
-        for row in self.cells:
-            for cell in row:
-                cell.deleteLater()
-
-        for line in self.ascii_rows:
-            line.deleteLater()
-
-        for lbl in self.offset_labels:
-            lbl.deleteLater()
-
-        self.cells.clear()
-        self.ascii_rows.clear()
-        self.offset_labels.clear()
-        self.data = bytearray()
-
-        while self.grid.count():
-            item = self.grid.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-
-    def load_data(self, data: bytes):
-        self.clear()
-
-        self.data = bytearray(data)
-        total = len(self.data)
-
-        header_style = f"font-weight: bold; background:{self.header_color};"
-
-        offset_header = QLabel("Offset")
-        offset_header.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        offset_header.setStyleSheet(header_style + " padding-right:6px;")
-        offset_header.setFixedWidth(60)
-        self.grid.addWidget(offset_header, 0, 0)
-
-        for col in range(16):
-            lbl = QLabel(f"{col:02X}")
-            lbl.setAlignment(Qt.AlignCenter)
-            lbl.setStyleSheet(header_style)
-            lbl.setFixedWidth(self.cell_width)
-            self.grid.addWidget(lbl, 0, col + 1)
-
-        sep = QFrame()
-        sep.setFrameShape(QFrame.VLine)
-        sep.setFrameShadow(QFrame.Sunken)
-        sep.setStyleSheet("color: #888888;")
-        self.grid.addWidget(sep, 0, 17, 1, 1)
-
-        ascii_header = QLabel("ASCII")
-        ascii_header.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        ascii_header.setStyleSheet(header_style + " padding-left:8px;")
-        self.grid.addWidget(ascii_header, 0, 18)
-
-        row = 1
-        idx = 0
-
-        while idx < total:
-            offset_lbl = QLabel(f"{idx:04X}")
-            offset_lbl.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            offset_lbl.setStyleSheet(header_style + " padding-right:6px;")
-            offset_lbl.setFixedWidth(60)
-            self.grid.addWidget(offset_lbl, row, 0)
-            self.offset_labels.append(offset_lbl)
-
-            row_cells = []
-
-            for col in range(16):
-                if idx >= total:
-                    break
-
-                val = self.data[idx]
-                text = f"{val:02X}"
-
-                cell = _HexCell(self, idx, text)
-                cell.setAlignment(Qt.AlignCenter)
-                cell.setFixedWidth(self.cell_width)
-                cell.setMaxLength(2)
-                cell.setStyleSheet("font-family: monospace;")
-                self.grid.addWidget(cell, row, col + 1)
-                row_cells.append(cell)
-
-                idx += 1
-
-            self.cells.append(row_cells)
-
-            ascii_text = []
-            base_index = (row - 1) * 16
-            for col in range(16):
-                byte_index = base_index + col
-                if byte_index >= len(self.data):
-                    break
-                b = self.data[byte_index]
-                ch = chr(b) if 32 <= b < 127 else "."
-                ascii_text.append(ch)
-
-            ascii_line = QLineEdit("".join(ascii_text))
-            ascii_line.setReadOnly(True)
-            ascii_line.setFrame(False)
-            ascii_line.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-            ascii_line.setStyleSheet(
-                "font-family: monospace; padding-left:8px; background: transparent;"
-            )
-            self.grid.addWidget(ascii_line, row, 18)
-            self.ascii_rows.append(ascii_line)
-
-            row += 1
+        self.model.load(b"")
 
-    def write_cell(self, index: int, new_text: str):
-        row = index // 16
-        col = index % 16
+    def load_data(self, data: bytes, baseline=None):
+        self.model.load(data, baseline)
+        self.view.scrollToTop()
 
-        try:
-            cell = self.cells[row][col]
-        except IndexError:
-            return
+    def begin_stream(self, size: int):
+        self.model.load(MemoryImage.blank(size))
+        self.view.scrollToTop()
 
-        raw = new_text.strip()
-        old_val = self.data[index] if index < len(self.data) else 0
+    def load_range(self, addr: int, data):
+        self.model.load_range(addr, data)
 
-        if raw == "":
-            val = 0xFF
-            normalized = "FF"
-        else:
-            try:
-                val = int(raw, 16) & 0xFF
-                normalized = f"{val:02X}"
-            except ValueError:
-                val = 0xFF
-                normalized = "FF"
-
-        cell.blockSignals(True)
-        cell.setText(normalized)
-        cell.blockSignals(False)
-
-        if val != old_val:
-            cell.setStyleSheet(
-                f"background-color: {self.changed_bg_color}; "
-                f"color: black; "
-                f"font-weight: bold; "
-                f"font-family: monospace;"
-            )
-        else:
-            cell.setStyleSheet("font-family: monospace;")
+    def changed_ranges(self) -> list[tuple[int, int]]:
+        return list(self.model.dirty)
 
-        if index < len(self.data):
-            self.data[index] = val
+    def mark_clean(self, baseline=None):
+        self.model.mark_clean(baseline)
 
-            try:
-                ascii_line = self.ascii_rows[row]
-            except IndexError:
-                return
-
-            ascii_chars = []
-            base_index = row * 16
-            for c in range(16):
-                byte_index = base_index + c
-                if byte_index >= len(self.data):
-                    break
-                b = self.data[byte_index]
-                ch = chr(b) if 32 <= b < 127 else "."
-                ascii_chars.append(ch)
-
-            ascii_line.setText("".join(ascii_chars))
+    def write_cell(self, index: int, new_text: str):
+        if 0 <= index < len(self.data):
+            self.model.set_byte(index, _parse_hex(new_text))
 
-    def get_bytes(self) -> bytes:
-        return bytes(self.data)
+    def get_bytes(self) -> memoryview:
+        return self.data.view().toreadonly()
 
     def commit_all(self):
-        for row_idx, row in enumerate(self.cells):
-            for col_idx, cell in enumerate(row):
-                index = row_idx * 16 + col_idx
-                if index >= len(self.data):
-                    break
-                self.write_cell(index, cell.text())
-
-
-class _HexCell(QLineEdit):
-    def __init__(self, editor: HexEditor, index: int, text: str):
-        super().__init__(text)
-        self.editor = editor
-        self.index = index
-
-    def focusOutEvent(self, event):
-        self.editor.write_cell(self.index, self.text())
-        super().focusOutEvent(event)
+        index = self.view.currentIndex()
+        editor = self.view.indexWidget(index) if index.isValid() else None
+        if editor is not None:
+            self.view.commitData(editor)
@@ -1,10 +1,33 @@
+import logging
+import os
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
 from PySide6.QtWidgets import QTextEdit
-from PySide6.QtGui import QTextCursor, QColor, QPalette
+from PySide6.QtGui import QTextCursor, QTextCharFormat, QColor, QPalette
 from PySide6.QtCore import QTimer, Qt
 
+from core.settings_manager import get_config_dir
+from core.apdu_trace import LogRedactor
+
+
+def _spill_logger(path: str, max_bytes: int, backups: int):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    logger = logging.getLogger(f"sle_suite.log_panel.{path}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                      encoding="utf-8", delay=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return logger
+
 
 class LogPanel(QTextEdit):
-    def __init__(self, is_dark=True):
+    def __init__(self, is_dark=True, max_lines: int = 5000, flush_ms: int = 33, spill: bool = False,
+                 spill_path: str = None, spill_bytes: int = 1024 * 1024, spill_backups: int = 3):
         super().__init__()
         self.setReadOnly(True)
         self.setObjectName("logPanel")
@@ -13,6 +36,25 @@ class LogPanel(QTextEdit):
         self.colors = {}
         self._apply_palette(is_dark)
 
+        self.max_lines = max(1, int(max_lines))
+        self.document().setMaximumBlockCount(self.max_lines)
+
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._history = deque()
+        self._formats = {}
+
+        self._spill_log = None
+        if spill:
+            path = spill_path or os.path.join(get_config_dir(), "logs", "log_panel.log")
+            self._spill_log = _spill_logger(path, spill_bytes, spill_backups)
+            self._redact = LogRedactor()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(flush_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
     def _apply_palette(self, is_dark: bool):
         self._is_dark = is_dark
 
@@ -38,22 +80,75 @@ class LogPanel(QTextEdit):
                 "error": "#ff5c5c",
             }
 
+        self._formats = {}
         self.setPalette(palette)
 
     def set_dark_mode(self, is_dark: bool):
         if is_dark != self._is_dark:
             self._apply_palette(is_dark)
 
+    def _spill(self, msg: str):
+        if self._spill_log is not None:
+            self._spill_log.info(self._redact(msg))
+
+    def set_max_lines(self, max_lines: int):
+        self.max_lines = max(1, int(max_lines))
+        while len(self._history) > self.max_lines:
+            self._spill(self._history.popleft())
+        self.document().setMaximumBlockCount(self.max_lines)
+
     def clear_log(self):
+        with self._lock:
+            self._pending.clear()
+        self._history.clear()
         self.clear()
 
     def log(self, msg: str):
-        category = self._infer_category(msg)
-        color_hex = self.colors.get(category, self.colors.get("default", "#ffffff"))
-        self.setTextColor(QColor(color_hex))
-        self.append(msg)
-        self.setTextColor(QColor(self.colors.get("default", "#ffffff")))
-        QTimer.singleShot(0, self._scroll_to_bottom)
+        with self._lock:
+            self._pending.append(str(msg))
+
+    def _format_for(self, category: str) -> QTextCharFormat:
+        fmt = self._formats.get(category)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(self.colors.get(category, self.colors.get("default", "#ffffff"))))
+            self._formats[category] = fmt
+        return fmt
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            batch = list(self._pending)
+            self._pending.clear()
+
+        history = self._history
+        if len(batch) >= self.max_lines:
+            for msg in history:
+                self._spill(msg)
+            history.clear()
+            for msg in batch[:-self.max_lines]:
+                self._spill(msg)
+            batch = batch[-self.max_lines:]
+            self.clear()
+
+        for msg in batch:
+            if len(history) >= self.max_lines:
+                self._spill(history.popleft())
+            history.append(msg)
+
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        first = self.document().isEmpty()
+        for msg in batch:
+            if not first:
+                cursor.insertBlock()
+            first = False
+            cursor.insertText(msg, self._format_for(self._infer_category(msg)))
+        cursor.endEditBlock()
+
+        self._scroll_to_bottom()
 
     def _infer_category(self, msg: str) -> str:
         m = msg.strip()
@@ -68,12 +163,15 @@ class LogPanel(QTextEdit):
         return "default"
 
     def _scroll_to_bottom(self):
-        cursor = self.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.setTextCursor(cursor)
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.maximum())
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Space and (event.modifiers() & Qt.ControlModifier):
             self.clear_log()
             return
         super().keyPressEvent(event)
+
+    def closeEvent(self, event):
+        self.flush()
+        super().closeEvent(event)
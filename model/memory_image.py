@@ -0,0 +1,92 @@
+class ProtectionBits:
+    __slots__ = ("_bits", "_size")
+
+    def __init__(self, size: int = 0):
+        self._size = size
+        self._bits = bytearray((size + 7) // 8)
+
+    def __len__(self):
+        return self._size
+
+    def _index(self, i: int) -> int:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._size))]
+        i = self._index(i)
+        return bool((self._bits[i >> 3] >> (i & 7)) & 1)
+
+    def __setitem__(self, i: int, value):
+        i = self._index(i)
+        if value:
+            self._bits[i >> 3] |= 1 << (i & 7)
+        else:
+            self._bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def __iter__(self):
+        bits = self._bits
+        for i in range(self._size):
+            yield bool((bits[i >> 3] >> (i & 7)) & 1)
+
+    def __eq__(self, other):
+        if isinstance(other, ProtectionBits):
+            return self._size == other._size and self._bits == other._bits
+        return NotImplemented
+
+    def clear(self):
+        self._bits[:] = bytes(len(self._bits))
+
+    def count(self) -> int:
+        return sum(bin(b).count("1") for b in self._bits)
+
+    def indices(self) -> list[int]:
+        return [i for i, p in enumerate(self) if p]
+
+    def to_list(self) -> list[bool]:
+        return list(self)
+
+    def load_flags(self, flags, addr: int = 0):
+        for i, flag in enumerate(flags):
+            if addr + i >= self._size:
+                break
+            self[addr + i] = flag
+
+    def to_flags(self) -> bytes:
+        return bytes(1 if p else 0 for p in self)
+
+    def load_pm(self, raw):
+        n = min(len(raw), len(self._bits))
+        self._bits[:n] = bytes(~b & 0xFF for b in raw[:n])
+        tail = self._size & 7
+        if tail and n == len(self._bits):
+            self._bits[-1] &= (1 << tail) - 1
+
+
+class MemoryImage(bytearray):
+    __slots__ = ("protection",)
+
+    def __init__(self, data=b"", protected: int = None):
+        super().__init__(data)
+        self.protection = ProtectionBits(len(self) if protected is None else protected)
+
+    @classmethod
+    def blank(cls, size: int, fill: int = 0xFF, protected: int = None):
+        return cls(bytes([fill]) * size, protected)
+
+    def view(self, start: int = 0, end: int = None) -> memoryview:
+        return memoryview(self)[start:end]
+
+    def load(self, addr: int, data) -> int:
+        n = max(0, min(len(data), len(self) - addr))
+        self[addr:addr + n] = data[:n] if n < len(data) else data
+        return n
+
+    def copy(self):
+        image = MemoryImage(self, len(self.protection))
+        image.protection._bits[:] = self.protection._bits
+        return image
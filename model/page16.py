@@ -16,7 +16,8 @@ class Page16:
             raise ValueError(tr("error.page_not_16bytes"))              
 
                                                       
-        self.data = list(data)
+        self.data = bytearray(data)
+        self.buffer = None
 
         self.dirty = False
         self.is_ascii = False                   
@@ -27,9 +28,27 @@ class Page16:
     def refresh(self, full_memory, start_addr=None):
    
         addr = self.addr_from if start_addr is None else start_addr
-        self.data = list(full_memory[addr:addr+16])
+        if full_memory is self.buffer and addr == self.addr_from:
+            self.attach()
+        else:
+            self.data = bytearray(full_memory[addr:addr+16])
         self.dirty = False
 
+    @staticmethod
+    def view(buffer, addr_from: int):
+        page = Page16(addr_from, bytes(16))
+        page.buffer = buffer
+        page.attach()
+        return page
+
+    @property
+    def is_view(self) -> bool:
+        return isinstance(self.data, memoryview)
+
+    def attach(self):
+        if self.buffer is not None:
+            self.data = memoryview(self.buffer)[self.addr_from:self.addr_from + 16]
+
                                                                         
                    
                                                                         
@@ -41,6 +60,8 @@ class Page16:
         if not (0 <= value <= 255):
             raise ValueError(tr("error.value_not_byte"))              
 
+        if self.is_view:
+            self.data = bytearray(self.data)
         self.data[index] = value
         self.dirty = True
 
@@ -0,0 +1,84 @@
+from bisect import bisect_left, bisect_right
+
+
+class RangeSet:
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, ranges=None):
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        for start, end in ranges or ():
+            self.add(start, end)
+
+    def add(self, start: int, end: int):
+        if end <= start:
+            return
+
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def add_span(self, addr: int, length: int):
+        self.add(addr, addr + length)
+
+    def __contains__(self, addr: int) -> bool:
+        i = bisect_right(self._starts, addr) - 1
+        return i >= 0 and addr < self._ends[i]
+
+    def __iter__(self):
+        return iter(list(zip(self._starts, self._ends)))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __bool__(self):
+        return bool(self._starts)
+
+    def __repr__(self):
+        return f"RangeSet({list(self)})"
+
+    @property
+    def total(self) -> int:
+        return sum(e - s for s, e in zip(self._starts, self._ends))
+
+    def clear(self):
+        self._starts.clear()
+        self._ends.clear()
+
+    def pop_all(self) -> list[tuple[int, int]]:
+        out = list(self)
+        self.clear()
+        return out
+
+
+def coalesce(ranges, max_gap: int = 0) -> list[tuple[int, int]]:
+    out: list[list[int]] = []
+    for start, end in sorted(ranges):
+        if out and start - out[-1][1] <= max_gap:
+            out[-1][1] = max(out[-1][1], end)
+        else:
+            out.append([start, end])
+    return [(s, e) for s, e in out]
+
+
+def diff_ranges(a, b) -> RangeSet:
+    out = RangeSet()
+    n = min(len(a), len(b))
+    start = None
+    for i in range(n):
+        if a[i] != b[i]:
+            if start is None:
+                start = i
+        elif start is not None:
+            out.add(start, i)
+            start = None
+    if start is not None:
+        out.add(start, n)
+    if len(a) != len(b):
+        out.add(n, max(len(a), len(b)))
+    return out
@@ -0,0 +1,23 @@
+import time
+
+from core.apdu_trace import APDU, Trace, TraceRecord, TraceReplayer
+
+
+APDUS = [bytes([0xFF, 0xB0, 0x00, n, 0x01]) for n in range(3)]
+
+
+def replay(**kwargs):
+    records = [TraceRecord(APDU, n * 0.05, 0.001, apdu, b"\x00", 0x90, 0x00) for n, apdu in enumerate(APDUS)]
+    conn = TraceReplayer(Trace("reader", 0.0, records), **kwargs)
+    t0 = time.perf_counter()
+    for apdu in APDUS:
+        conn.transmit(list(apdu))
+    return time.perf_counter() - t0
+
+
+def test_replay_keeps_recorded_gaps():
+    assert replay(speed=1.0) >= 0.095
+
+
+def test_replay_can_skip_gaps():
+    assert replay(speed=1.0, gaps=False) < 0.05
@@ -0,0 +1,34 @@
+import pytest
+
+from core.card_cache import CardImageCache
+from core.emulator import EmulatedReader, create_card
+from drivers.registry import driver_for
+
+
+PSC = {"SLE4442": [0xFF, 0xFF, 0xFF], "SLE4428": [0xFF, 0xFF], "SLE5528": [0xFF, 0xFF]}
+
+
+def open_card(reader, card_type):
+    conn = reader.createConnection()
+    conn.connect()
+    card = driver_for(card_type)(conn)
+    card.authenticate(PSC[card_type])
+    return conn, card
+
+
+@pytest.mark.parametrize("card_type", sorted(PSC))
+def test_cached_image_round_trip(tmp_path, card_type):
+    emulated = create_card(card_type)
+    emulated.memory[:64] = bytes(range(64))
+    reader = EmulatedReader("reader", emulated, sleep=False)
+    cache = CardImageCache(path=str(tmp_path))
+
+    conn, card = open_card(reader, card_type)
+    card.read_all()
+    key = cache.make_key(conn.getATR(), card.main_memory[:32])
+    cache.store(key, card_type, card.snapshot())
+
+    conn, card = open_card(reader, card_type)
+    found, entry = cache.lookup(card, card_type, conn.getATR())
+    assert found == key
+    assert entry is not None
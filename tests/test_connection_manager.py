@@ -0,0 +1,143 @@
+from core.connection_manager import (
+    ConnectionManager,
+    SCARD_F_COMM_ERROR,
+    SCARD_SHARE_EXCLUSIVE,
+    SCARD_SHARE_SHARED,
+    SCARD_W_RESET_CARD,
+    is_transient,
+    is_write,
+)
+from core.emulator import EmulatedReader, create_card
+from core.transport import Transport
+from drivers.sle4442 import SLE4442
+from drivers.sle5528 import SLE5528
+
+
+class PCSCError(Exception):
+
+    def __init__(self, hresult: int):
+        super().__init__(f"0x{hresult:08X}")
+        self.hresult = hresult
+
+
+class FaultyReader(EmulatedReader):
+
+    def __init__(self, card, fail_on, hresult: int = SCARD_W_RESET_CARD):
+        super().__init__("faulty reader", card, sleep=False)
+        self.fail_on = fail_on
+        self.hresult = hresult
+        self.sent = []
+
+    def exchange(self, apdu):
+        apdu = list(apdu)
+        self.sent.append(apdu)
+        if self.fail_on is not None and self.fail_on(apdu):
+            self.fail_on = None
+            if self.hresult == SCARD_W_RESET_CARD:
+                self.card.reset()
+            raise PCSCError(self.hresult)
+        return super().exchange(apdu)
+
+
+def nth_write(n: int):
+    seen = []
+
+    def match(apdu):
+        if is_write(apdu):
+            seen.append(apdu)
+        return len(seen) == n and seen[-1] is apdu
+
+    return match
+
+
+def open_card(reader, driver_cls):
+    manager = ConnectionManager()
+    link = manager.acquire(reader)
+    return manager, link, driver_cls(Transport(link))
+
+
+def test_reset_during_write_raises_and_drops_authentication():
+    reader = FaultyReader(create_card("SLE4442"), None)
+    _, link, card = open_card(reader, SLE4442)
+    card.read_all()
+    card.authenticate([0xFF, 0xFF, 0xFF])
+    card.pacer = None
+    reader.sent.clear()
+    reader.fail_on = nth_write(2)
+
+    data = bytes(range(1, 65))
+    try:
+        card.write_bytes(64, data)
+    except Exception:
+        pass
+    else:
+        raise AssertionError("write survived a card reset")
+
+    assert not card.is_authenticated
+    assert link.reset_epoch == 1
+    assert sum(1 for a in reader.sent if is_write(a)) == 2
+    assert bytes(reader.card.memory[80:128]) == b"\xFF" * 48
+    assert card.main_memory[80:128] == b"\xFF" * 48
+
+
+def test_reset_during_3wire_write_is_not_replayed():
+    reader = FaultyReader(create_card("SLE5528"), None)
+    _, link, card = open_card(reader, SLE5528)
+    card.read_all()
+    card.authenticate([0xFF, 0xFF])
+    reader.fail_on = nth_write(2)
+
+    try:
+        card.write_bytes(0x140, b"\x01\x02\x03\x04")
+    except Exception:
+        pass
+    else:
+        raise AssertionError("write survived a card reset")
+
+    assert not card.is_authenticated
+    assert reader.card.memory[0x140] == 0x01
+    assert bytes(reader.card.memory[0x141:0x144]) == b"\xFF" * 3
+
+
+def test_read_is_retried_after_reset():
+    reader = FaultyReader(create_card("SLE4442"), lambda apdu: apdu[1] == 0xB0)
+    _, link, card = open_card(reader, SLE4442)
+    card.authenticate([0xFF, 0xFF, 0xFF])
+
+    assert len(card.read_range(0, 16)) == 16
+    assert link.stats.retried == 1
+    assert not card.is_authenticated
+
+
+def test_comm_error_keeps_session_and_retries_write():
+    reader = FaultyReader(create_card("SLE4442"), None, hresult=SCARD_F_COMM_ERROR)
+    _, link, card = open_card(reader, SLE4442)
+    card.read_all()
+    card.authenticate([0xFF, 0xFF, 0xFF])
+    card.pacer = None
+    reader.fail_on = nth_write(1)
+
+    card.write_bytes(64, b"\x11\x22")
+    assert card.is_authenticated
+    assert link.reset_epoch == 0
+    assert bytes(reader.card.memory[64:66]) == b"\x11\x22"
+
+
+def test_unknown_errors_are_not_transient():
+    assert not is_transient(Exception("boom"))
+    assert is_transient(PCSCError(SCARD_W_RESET_CARD))
+
+
+def test_release_gives_up_exclusive_access():
+    reader = EmulatedReader("reader", create_card("SLE4442"), sleep=False)
+    manager = ConnectionManager()
+    link = manager.acquire(reader)
+    assert link.mode == SCARD_SHARE_EXCLUSIVE
+
+    manager.release(reader)
+    assert link.conn is not None
+    assert link.mode == SCARD_SHARE_SHARED
+
+    manager.acquire(reader)
+    assert link.mode == SCARD_SHARE_EXCLUSIVE
+    assert link.stats.opened == 1
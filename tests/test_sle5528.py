@@ -0,0 +1,54 @@
+from core.emulator import EmulatedReader, create_card
+from drivers.acr_commands import FIXED
+from drivers.sle5528 import SLE5528
+
+
+IMAGE = bytes((i * 7 + (i >> 8) * 0x35) & 0xFF for i in range(FIXED.ERROR_COUNTER))
+
+
+def open_card(**kwargs):
+    reader = EmulatedReader("reader", create_card("SLE5528", image=IMAGE, **kwargs), sleep=False)
+    conn = reader.createConnection()
+    conn.connect()
+    return reader, SLE5528(conn)
+
+
+def test_3wire_read_across_0x100():
+    _, card = open_card(native_reads=False)
+    card.select_card()
+    assert bytes(card.read_range(0xF8, 16)) == IMAGE[0xF8:0x108]
+
+
+def test_3wire_write_across_0x100():
+    reader, card = open_card()
+    card.select_card()
+    card.read_all()
+    card.authenticate([0xFF, 0xFF])
+    card.write_bytes(0xFE, b"\x11\x22\x33\x44")
+    assert bytes(reader.card.memory[0xFC:0x104]) == IMAGE[0xFC:0xFE] + b"\x11\x22\x33\x44" + IMAGE[0x102:0x104]
+
+
+def test_authenticate_rejects_wrong_psc():
+    reader, card = open_card()
+    card.select_card()
+    try:
+        card.authenticate([0x12, 0x34])
+    except Exception:
+        pass
+    else:
+        raise AssertionError("wrong PSC accepted")
+    assert not card.is_authenticated
+    assert reader.card.error_counter == 0xFE
+
+
+def test_set_protection_bits():
+    reader, card = open_card()
+    card.select_card()
+    card.read_all()
+    card.authenticate([0xFF, 0xFF])
+    card.set_protection_bits([0x10, 0x101, FIXED.ERROR_COUNTER])
+    assert reader.card.memory.protection[0x10]
+    assert reader.card.memory.protection[0x101]
+    assert not reader.card.memory.protection[0x11]
+    assert not reader.card.memory.protection[FIXED.ERROR_COUNTER]
+    assert card.protection_bits[0x101]
@@ -0,0 +1,17 @@
+from core.write_pacer import WritePacer
+
+
+def test_adaptive_delay_stops_at_write_time():
+    pacer = WritePacer(delay=0.2, min_delay=0.0, write_time=0.01)
+    pacer.wait = lambda: None
+    for _ in range(20):
+        pacer.run(lambda: ([], 0x90, 0x00))
+    assert pacer.delay == 0.01
+
+
+def test_reader_floor_below_write_time_is_ignored():
+    pacer = WritePacer(write_time=0.01)
+    pacer.min_delay = 0.002
+    assert pacer.floor == 0.01
+    pacer.min_delay = 0.03
+    assert pacer.floor == 0.03
@@ -0,0 +1,14 @@
+from drivers.write_planner import plan_writes
+
+
+def test_bytes_past_limit_are_blocked():
+    plan = plan_writes(1016, bytes(8), limit=1021)
+    assert plan.bytes_written == 5
+    assert plan.blocked == [1021, 1022, 1023]
+    assert plan.requested == 8
+
+
+def test_write_entirely_past_limit():
+    plan = plan_writes(300, bytes(4), limit=256)
+    assert not plan.chunks
+    assert plan.blocked == [300, 301, 302, 303]